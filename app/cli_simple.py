@@ -44,6 +44,9 @@ def main():
                 print("\nGoodbye!\n")
                 break
             
+            # A background scrape job may have given the session a new catalog
+            csv_file = db.get_csv_file_for_session(session_id) or csv_file
+            
             # Save user message
             db.save_message(session_id, user_id, "user", user_input, csv_file)
             
@@ -55,6 +58,7 @@ def main():
                 "csv_file": csv_file,
                 "url_to_scrape": None,
                 "scraping_complete": False,
+                "scrape_job_id": None,
                 "requires_human_escalation": False,
                 "knowledge_base_ready": bool(csv_file)
             }
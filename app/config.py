@@ -22,6 +22,36 @@ class Settings(BaseSettings):
     app_port: int = 8000
     data_dir: str = "./data/csvs"
     
+    # Catalog cache (shared CSVKnowledgeBase instances per process)
+    catalog_cache_max_entries: int = 64
+    catalog_cache_max_bytes: int = 512 * 1024 * 1024
+    catalog_sidecar_enabled: bool = True
+    # Knowledge-base backend: "pandas" (columnar, large catalogs) or "lite" (pure Python, no pandas import)
+    kb_backend: str = "pandas"
+    
+    # Shared product store (deduplicated by product link across sessions)
+    catalog_store_ttl_seconds: int = 24 * 3600
+    # A further URL scraped in a session is merged into its catalog instead of replacing it
+    catalog_merge_sessions: bool = True
+    
+    # Scraper page cache under data_dir/page_cache: "normal", "off", or "replay" (cache only, never the network)
+    page_cache_mode: str = "normal"
+    page_cache_ttl_seconds: int = 15 * 60
+    # Entries older than this are deleted after a scrape (stale ones still serve conditional re-fetches until then)
+    page_cache_max_age_seconds: int = 7 * 24 * 3600
+    # Per-domain politeness: seconds between page loads and pages in flight at once
+    scrape_domain_delay_seconds: float = 1.0
+    scrape_domain_concurrency: int = 2
+    
+    # Scrape jobs: "redis" (shared by all processes) or "local" (in-process; also used when Redis is down)
+    scrape_queue_backend: str = "redis"
+    scrape_workers: int = 1
+    scrape_job_ttl_seconds: int = 24 * 3600
+    
+    # Product search: "keyword" (BM25) or "semantic" (offline hashed n-gram vectors)
+    search_mode: str = "keyword"
+    semantic_dim: int = 1024
+    
     # Contact
     support_contact_number: str = "+91-1800-XXX-XXXX"
     
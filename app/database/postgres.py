@@ -107,7 +107,8 @@ class PostgresManager:
             checkpoint = session.query(Checkpoint).filter(Checkpoint.session_id == session_id).first()
             if checkpoint:
                 checkpoint.state = serialized_state
-                checkpoint.csv_file = csv_file
+                # No catalog keeps the session's current one (a background scrape may have just set it)
+                checkpoint.csv_file = csv_file or checkpoint.csv_file
                 checkpoint.last_updated = datetime.utcnow()
             else:
                 checkpoint = Checkpoint(
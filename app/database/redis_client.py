@@ -41,3 +41,36 @@ class RedisClient:
     def delete_session_data(self, session_id: str):
         """Delete session data"""
         self.client.delete(f"session:{session_id}")
+    
+    def ping(self) -> bool:
+        """True if the Redis server answers"""
+        try:
+            return bool(self.client.ping())
+        except redis.RedisError:
+            return False
+    
+    def set_job_data(self, job_id: str, data: dict, expiry: int = 24 * 3600):
+        """Store a scrape job's status with expiry"""
+        self.client.setex(f"scrape_job:{job_id}", expiry, json.dumps(data))
+    
+    def get_job_data(self, job_id: str) -> Optional[dict]:
+        """Retrieve a scrape job's status"""
+        data = self.client.get(f"scrape_job:{job_id}")
+        return json.loads(data) if data else None
+    
+    def set_session_job(self, session_id: str, job_id: str, expiry: int = 24 * 3600):
+        """Remember the latest scrape job of a session"""
+        self.client.setex(f"session_job:{session_id}", expiry, job_id)
+    
+    def get_session_job(self, session_id: str) -> Optional[str]:
+        """ID of the latest scrape job of a session"""
+        return self.client.get(f"session_job:{session_id}")
+    
+    def enqueue_job(self, job_id: str, queue: str = "scrape_jobs"):
+        """Append a job ID to a work queue"""
+        self.client.lpush(queue, job_id)
+    
+    def dequeue_job(self, timeout: int = 5, queue: str = "scrape_jobs") -> Optional[str]:
+        """Pop the oldest job ID from a work queue, waiting up to timeout seconds"""
+        item = self.client.brpop(queue, timeout=timeout)
+        return item[1] if item else None
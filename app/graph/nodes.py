@@ -2,8 +2,9 @@ from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from app.graph.state import AgentState
 from app.graph.prompts import CHATBOT_SYSTEM_PROMPT, ESCALATION_CHECK_PROMPT, PRODUCT_QUERY_PROMPT
-from app.utils.csv_handler import CSVKnowledgeBase
-from app.tools.scraper_tool import scrape_website_tool
+from app.utils.catalog_cache import get_knowledge_base, session_catalog
+from app.utils.catalog_store import catalog_store
+from app.tools.scrape_jobs import scrape_jobs
 from app.config import get_settings
 from app.database.postgres import PostgresManager
 from app.database.redis_client import RedisClient
@@ -49,23 +50,39 @@ def url_extraction_node(state: AgentState) -> AgentState:
     return state
 
 def scraping_node(state: AgentState) -> AgentState:
-    """Execute scraping if URL is provided"""
+    """Load a recently scraped catalog for the URL, or submit a background scrape job"""
     if state.get("url_to_scrape") and not state.get("scraping_complete"):
-        from app.utils.session import get_csv_filename
-        
-        csv_filename = get_csv_filename(state["session_id"], state["user_id"])
-        csv_path = os.path.join(settings.data_dir, csv_filename)
-        
         try:
             print(f"\n🔍 Scraping node activated")
             print(f"URL: {state['url_to_scrape']}")
-            print(f"CSV filename: {csv_filename}")
             
-            # Run scraper - FIX: Call the function directly with correct parameters
-            result = scrape_website_tool.invoke({
-                "url": state["url_to_scrape"],
-                "output_filename": csv_filename  # Pass just the filename
-            })
+            # A fresh scrape of the same URL by any session is reused without opening a browser
+            shared_csv = catalog_store.catalog_for_source(state["url_to_scrape"])
+            if not shared_csv:
+                # The scrape runs in a worker; this request returns with the job ID right away
+                job = scrape_jobs.submit(
+                    state["url_to_scrape"],
+                    state["session_id"],
+                    state["user_id"],
+                    previous_csv=state.get("csv_file")
+                )
+                state["scrape_job_id"] = job["job_id"]
+                result = (
+                    f"⏳ Scraping {state['url_to_scrape']} in the background (job {job['job_id']}).\n"
+                    f"You can ask questions meanwhile; I'll answer from the products found so far. "
+                    f"Progress: GET /scrape/{job['job_id']}"
+                )
+                db.save_message(state["session_id"], state["user_id"], "assistant", result, state.get("csv_file"))
+                state["messages"].append(AIMessage(content=result))
+                return state
+            
+            product_count = get_knowledge_base(shared_csv).get_product_count()
+            result = f"✅ Loaded {product_count} products for this URL from the shared catalog (scraped recently)."
+            
+            # A further URL in the same session adds to its catalog instead of replacing it
+            csv_path = session_catalog(state.get("csv_file"), shared_csv)
+            if csv_path != shared_csv:
+                result += f"\n🔗 Merged with this session's earlier catalog: {get_knowledge_base(csv_path).get_product_count()} products in total."
             
             state["csv_file"] = csv_path
             state["scraping_complete"] = True
@@ -108,12 +125,20 @@ def query_answering_node(state: AgentState) -> AgentState:
         return state
     
     # Skip if last message was from scraping
-    if state.get("scraping_complete") and isinstance(state["messages"][-1], AIMessage):
+    if (state.get("scraping_complete") or state.get("scrape_job_id")) and isinstance(state["messages"][-1], AIMessage):
         return state
     
     # Check if we have a CSV file
     csv_file = state.get("csv_file") or db.get_csv_file_for_session(state["session_id"])
     
+    # While the session's scrape job runs, answer from the rows it has extracted so far
+    scraping_note = ""
+    if not (csv_file and os.path.exists(csv_file)):
+        partial_csv = scrape_jobs.partial_catalog(state["session_id"])
+        if partial_csv:
+            csv_file = partial_csv
+            scraping_note = " (the website is still being scraped; more products will follow)"
+    
     # Build conversation context for the LLM (only last 6 messages to keep it manageable)
     conversation_context = ""
     if len(state["messages"]) > 1:
@@ -128,47 +153,47 @@ def query_answering_node(state: AgentState) -> AgentState:
     
     if csv_file and os.path.exists(csv_file):
         try:
-            # Load knowledge base
-            kb = CSVKnowledgeBase(csv_file)
+            # Load knowledge base (shared across sessions, reloaded when the file changes)
+            kb = get_knowledge_base(csv_file)
             
-            # Check for specific queries
-            query_lower = last_user_message.lower()
+            # Compound constraints ("Beardo trimmers under 1500 rated above 4") are answered with one filter pass;
+            # "cheapest" / "top rated" / "reviews" order or narrow that pass rather than being searched as text
+            parsed_query = kb.parse_query(last_user_message)
             
             # Handle different query types
-            if any(word in query_lower for word in ['best value', 'cheap', 'affordable', 'budget', 'value for money', 'cheapest']):
+            if parsed_query.has_filters or (parsed_query.has_intent and parsed_query.terms):
+                products = kb.filter_products(parsed_query, top_k=5)
+                query_type = f"products with {parsed_query.describe()}"
+            
+            elif parsed_query.sort == "price":
                 products = kb.get_best_value_products(top_n=5)
                 query_type = "best value products (sorted by price)"
             
-            elif any(word in query_lower for word in ['top rated', 'best rated', 'highest rated', 'best review']):
+            elif parsed_query.sort == "rating":
                 products = kb.get_top_rated_products(top_n=5)
                 query_type = "top-rated products"
             
-            elif any(word in query_lower for word in ['review', 'reviews', 'customer feedback', 'what people say']):
+            elif parsed_query.with_reviews:
                 products = kb.get_products_with_reviews()[:5]
                 query_type = "products with customer reviews"
             
             else:
                 # Search for relevant products
-                products = kb.search_products(last_user_message)
+                if settings.search_mode == "semantic":
+                    products = kb.semantic_search(last_user_message)
+                else:
+                    products = kb.search_products(last_user_message)
                 query_type = "matching products"
             
             if products:
-                # Format product data - include new fields
+                # Product blocks are rendered once per catalog; the prompt just joins them (top 5)
                 product_data = "\n\n".join([
-                    f"Product {i+1}:\n"
-                    f"Name: {p.get('name', 'N/A')}\n"
-                    f"Brand: {p.get('brand', 'N/A')}\n"
-                    f"Price: {p.get('price', 'N/A')}\n"
-                    f"Rating: {p.get('rating', 'N/A')} ({p.get('review_count', 'N/A')} reviews)\n"
-                    f"Description: {p.get('description', 'N/A')[:150]}...\n"
-                    f"Breadcrumbs: {p.get('breadcrumbs', 'N/A')}\n"
-                    f"Link: {p.get('link', 'N/A')}\n"
-                    f"Customer Reviews: {p.get('reviews', 'No reviews')[:200]}..."
-                    for i, p in enumerate(products[:5])  # Limit to top 5
+                    f"Product {i+1}:\n{snippet}"
+                    for i, snippet in enumerate(kb.prompt_snippets(products[:5]))
                 ])
                 
                 prompt = (
-                    f"{CHATBOT_SYSTEM_PROMPT.format(knowledge_base_status=f'{len(products)} products available')}"
+                    f"{CHATBOT_SYSTEM_PROMPT.format(knowledge_base_status=f'{len(products)} products available{scraping_note}')}"
                     f"{conversation_context}\n\n"
                     f"Here are the {query_type}:\n\n{product_data}\n\n"
                     f"Current User Question: {last_user_message}\n\n"
@@ -178,7 +203,7 @@ def query_answering_node(state: AgentState) -> AgentState:
             else:
                 summary = kb.get_product_summary()
                 prompt = (
-                    f"{CHATBOT_SYSTEM_PROMPT.format(knowledge_base_status=summary)}"
+                    f"{CHATBOT_SYSTEM_PROMPT.format(knowledge_base_status=summary + scraping_note)}"
                     f"{conversation_context}\n\n"
                     f"Current User Question: {last_user_message}"
                 )
@@ -39,3 +39,15 @@ User Question: {question}
 
 Provide a detailed, helpful answer based on the product data above. If the data doesn't contain 
 relevant information, politely mention that and offer to help with other products."""
+
+# Per-product block of the product-answer prompt. Snippets are rendered once per
+# catalog and cached under this version, so bump it whenever the template changes.
+PRODUCT_SNIPPET_VERSION = 1
+PRODUCT_SNIPPET_TEMPLATE = """Name: {name}
+Brand: {brand}
+Price: {price}
+Rating: {rating} ({review_count} reviews)
+Description: {description}...
+Breadcrumbs: {breadcrumbs}
+Link: {link}
+Customer Reviews: {reviews}..."""
@@ -11,5 +11,6 @@ class AgentState(TypedDict):
     csv_file: Optional[str]
     url_to_scrape: Optional[str]
     scraping_complete: bool
+    scrape_job_id: Optional[str]
     requires_human_escalation: bool
     knowledge_base_ready: bool
@@ -3,6 +3,7 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from langchain_core.messages import HumanMessage
 import uvicorn
+import os
 
 from app.models.schemas import ChatRequest, ChatResponse
 from app.graph.graph import create_graph
@@ -10,6 +11,8 @@ from app.graph.state import AgentState
 from app.utils.session import generate_session_id, generate_user_id
 from app.database.postgres import PostgresManager
 from app.database.redis_client import RedisClient
+from app.utils.catalog_cache import get_knowledge_base
+from app.tools.scrape_jobs import scrape_jobs
 from app.config import get_settings
 
 settings = get_settings()
@@ -34,6 +37,7 @@ async def startup_event():
     print("🚀 Starting Personal Care Chatbot API...")
     print(f"📊 PostgreSQL: {settings.postgres_host}:{settings.postgres_port}")
     print(f"🔴 Redis: {settings.redis_host}:{settings.redis_port}")
+    scrape_jobs.start()
 
 @app.get("/")
 def read_root():
@@ -43,7 +47,9 @@ def read_root():
         "endpoints": {
             "chat": "/chat",
             "health": "/health",
-            "history": "/history/{session_id}"
+            "history": "/history/{session_id}",
+            "scrape_job": "/scrape/{job_id}",
+            "facets": "/catalog/{session_id}/facets"
         }
     }
 
@@ -91,6 +97,7 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
             "csv_file": csv_file,
             "url_to_scrape": None,
             "scraping_complete": False,
+            "scrape_job_id": None,
             "requires_human_escalation": False,
             "knowledge_base_ready": bool(csv_file)
         }
@@ -103,12 +110,14 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
         last_message = result["messages"][-1].content
         requires_human = result.get("requires_human_escalation", False)
         
-        # Save checkpoint
+        # Save checkpoint; a catalog unchanged by this turn is passed as None so one
+        # that a scrape job completed meanwhile is not overwritten
+        result_csv = result.get("csv_file")
         db.save_checkpoint(
             session_id,
             user_id,
             result,
-            result.get("csv_file")
+            result_csv if result_csv != csv_file else None
         )
         
         # Publish to Redis (background)
@@ -128,7 +137,8 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
             session_id=session_id,
             user_id=user_id,
             requires_human=requires_human,
-            contact_info=settings.support_contact_number if requires_human else None
+            contact_info=settings.support_contact_number if requires_human else None,
+            job_id=result.get("scrape_job_id")
         )
     
     except Exception as e:
@@ -143,6 +153,27 @@ async def get_history(session_id: str, limit: int = 50):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/scrape/{job_id}")
+async def get_scrape_job(job_id: str):
+    """Get a scrape job's status and progress: pages done, products extracted and ETA"""
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown scrape job")
+    return job
+
+@app.get("/catalog/{session_id}/facets")
+async def get_catalog_facets(session_id: str):
+    """Get brand, category, price, rating and review facets for a session's catalog"""
+    csv_file = db.get_csv_file_for_session(session_id)
+    if not csv_file or not os.path.exists(csv_file):
+        raise HTTPException(status_code=404, detail="No product catalog for this session")
+    
+    kb = get_knowledge_base(csv_file)
+    if kb.facets is None:
+        raise HTTPException(status_code=500, detail="Product catalog could not be loaded")
+    
+    return {"session_id": session_id, "facets": kb.facets.as_dict}
+
 if __name__ == "__main__":
     uvicorn.run(
         "app.main:app",
@@ -13,6 +13,7 @@ class ChatResponse(BaseModel):
     user_id: str
     requires_human: bool = False
     contact_info: Optional[str] = None
+    job_id: Optional[str] = None
 
 class ScraperInput(BaseModel):
     url: str
@@ -0,0 +1,186 @@
+"""
+Plain-HTTP page fetching for the scraper's fast path.
+
+Standard library only (no Selenium import), so it can be exercised against a
+local fixture server.
+"""
+import gzip
+import http.client
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+HTTP_TIMEOUT = 10.0            # seconds per request
+HTTP_MAX_IDLE_PER_HOST = 4     # keep-alive connections kept per host
+HTTP_MAX_REDIRECTS = 5
+MAX_BODY_BYTES = 8 * 1024 * 1024
+
+# Status codes and page markers of anti-bot interstitials; such pages go to the browser instead
+BOT_WALL_STATUSES = {403, 429, 503}
+BOT_WALL_PATTERN = re.compile(
+    r"captcha|cf-challenge|cf_chl_|challenge-platform|px-captcha|_incapsula_|distil_r_captcha"
+    r"|access denied|are you a robot|robot check|unusual traffic|pardon our interruption"
+    r"|enable javascript and cookies to continue",
+    re.I,
+)
+BOT_WALL_MAX_BYTES = 20_000    # interstitials are small; full product pages merely mentioning "captcha" are not walls
+
+CHARSET_PATTERN = re.compile(r"charset=([\w-]+)", re.I)
+
+
+class HttpResponse:
+    __slots__ = ("url", "status", "headers", "body", "elapsed", "wire_bytes")
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, elapsed: float, wire_bytes: int = 0):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+        self.wire_bytes = wire_bytes    # body bytes as transferred (before content decoding)
+
+    @property
+    def text(self) -> str:
+        m = CHARSET_PATTERN.search(self.headers.get("content-type", ""))
+        try:
+            return self.body.decode(m.group(1) if m else "utf-8", errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+
+def _decode_body(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return body
+
+
+class HttpClient:
+    """
+    Thread-safe HTTP/1.1 client with a keep-alive connection pool per host.
+    Connections are returned to their host's pool after a fully read response
+    and reused by the next request to that host; a reused connection the server
+    has already closed is retried once on a fresh one.
+    """
+
+    def __init__(self, user_agent: str, timeout: float = HTTP_TIMEOUT, max_idle_per_host: int = HTTP_MAX_IDLE_PER_HOST):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+
+    def _connect(self, scheme: str, netloc: str) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                self.reused += 1
+                return idle.pop(), True
+            self.opened += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(netloc, timeout=self.timeout), False
+
+    def _checkin(self, scheme: str, netloc: str, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request(self, url: str, extra_headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported URL scheme: {url}")
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        }
+        headers.update(extra_headers or {})
+        for attempt in range(2):
+            conn, reused = self._connect(parts.scheme, parts.netloc)
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read(MAX_BODY_BYTES + 1)
+            except (http.client.RemoteDisconnected, ConnectionError, http.client.BadStatusLine):
+                conn.close()
+                # Keep-alive connections can be dropped by the server between requests
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.requests += 1
+            if len(body) > MAX_BODY_BYTES or resp.will_close:
+                conn.close()
+            else:
+                self._checkin(parts.scheme, parts.netloc, conn)
+            resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            wire_bytes = len(body)
+            body = _decode_body(body[:MAX_BODY_BYTES], resp_headers.get("content-encoding", ""))
+            return HttpResponse(url, resp.status, resp_headers, body, elapsed, wire_bytes)
+        raise ConnectionError(f"connection to {parts.netloc} closed")
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, max_redirects: int = HTTP_MAX_REDIRECTS) -> HttpResponse:
+        """
+        GET url, following redirects (elapsed and wire_bytes cover every hop).
+        headers are added to every request, e.g. validators for a conditional GET.
+        """
+        elapsed = wire_bytes = 0
+        for _ in range(max_redirects + 1):
+            resp = self._request(url, headers)
+            elapsed += resp.elapsed
+            wire_bytes += resp.wire_bytes
+            location = resp.headers.get("location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            resp.elapsed, resp.wire_bytes = elapsed, wire_bytes
+            return resp
+        raise ValueError(f"too many redirects: {url}")
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "opened": self.opened,
+                "reused": self.reused,
+                "idle": sum(len(c) for c in self._idle.values()),
+            }
+
+
+def looks_like_bot_wall(status: int, html: str) -> bool:
+    """True for anti-bot interstitials and block pages"""
+    if status in BOT_WALL_STATUSES:
+        return True
+    return len(html) < BOT_WALL_MAX_BYTES and bool(BOT_WALL_PATTERN.search(html))
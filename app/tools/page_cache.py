@@ -0,0 +1,226 @@
+"""
+On-disk cache of fetched product and listing pages.
+
+Entries are keyed by canonical URL and point at content-addressed,
+gzip-compressed HTML blobs, so pages with identical markup are stored once.
+Each entry keeps its fetch time, TTL, the path that served it and the HTTP
+validators (ETag / Last-Modified) for conditional re-fetches.
+
+In "replay" mode the cache is the only source: entries are served regardless
+of age and a miss never falls through to the network, which makes scraper
+runs deterministic and runnable offline.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from app.utils.urls import canonical_url
+
+PAGE_CACHE_TTL_SECONDS = 15 * 60
+PAGE_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60   # entries older than this are pruned
+PAGE_CACHE_PRUNE_INTERVAL = 60 * 60             # seconds between automatic prunes in one process
+PAGE_CACHE_MODES = ("off", "normal", "replay")
+GZIP_LEVEL = 6
+
+
+class CachedPage:
+    __slots__ = ("url", "blob", "fetched_at", "ttl", "served_by", "etag", "last_modified", "_cache")
+
+    def __init__(self, record: Dict, cache: "PageCache"):
+        self.url = record["url"]
+        self.blob = record["blob"]
+        self.fetched_at = record["fetched_at"]
+        self.ttl = record["ttl"]
+        self.served_by = record.get("served_by", "")
+        self.etag = record.get("etag")
+        self.last_modified = record.get("last_modified")
+        self._cache = cache
+
+    @property
+    def fresh(self) -> bool:
+        # A lowered cache TTL also applies to entries stored under the old one
+        return time.time() - self.fetched_at <= min(self.ttl, self._cache.ttl_seconds)
+
+    @property
+    def html(self) -> str:
+        return self._cache.read_blob(self.blob)
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for re-fetching this page"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    Page cache under root: entries/<url hash>.json and blobs/<sha256>.html.gz.
+    Files are written atomically, so several workers and processes can share it.
+    """
+
+    def __init__(self, root: str, ttl_seconds: int = PAGE_CACHE_TTL_SECONDS, mode: str = "normal"):
+        if mode not in PAGE_CACHE_MODES:
+            raise ValueError(f"page cache mode must be one of {PAGE_CACHE_MODES}, got {mode!r}")
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.mode = mode
+        self.entry_dir = os.path.join(root, "entries")
+        self.blob_dir = os.path.join(root, "blobs")
+        os.makedirs(self.entry_dir, exist_ok=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.writes = 0
+        self.revalidated = 0
+        self._last_prune = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _entry_path(self, url: str) -> str:
+        key = hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.entry_dir, f"{key}.json")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.html.gz")
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def read_blob(self, digest: str) -> str:
+        with open(self._blob_path(digest), "rb") as f:
+            return gzip.decompress(f.read()).decode("utf-8")
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        """Cached entry for url, fresh or not (None when absent or unreadable)"""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._entry_path(url), encoding="utf-8") as f:
+                page = CachedPage(json.load(f), self)
+        except (OSError, ValueError, KeyError):
+            self._count("misses")
+            return None
+        if not os.path.exists(self._blob_path(page.blob)):
+            self._count("misses")
+            return None
+        self._count("hits" if page.fresh or self.replay else "stale")
+        return page
+
+    def get(self, url: str) -> Optional[str]:
+        """HTML of url if it may be served from the cache (fresh, or any age in replay mode)"""
+        page = self.lookup(url)
+        if page is None or not (page.fresh or self.replay):
+            return None
+        return page.html
+
+    def put(self, url: str, html: str, served_by: str, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, ttl: Optional[int] = None):
+        """Store the HTML of url; identical HTML shares one blob"""
+        if not self.enabled or self.replay:
+            return
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self._blob_path(digest)
+        try:
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                self._write_atomic(blob_path, gzip.compress(data, compresslevel=GZIP_LEVEL))
+            record = {
+                "url": canonical_url(url),
+                "blob": digest,
+                "fetched_at": time.time(),
+                "ttl": self.ttl_seconds if ttl is None else ttl,
+                "served_by": served_by,
+                "etag": etag,
+                "last_modified": last_modified,
+            }
+            self._write_atomic(self._entry_path(url), json.dumps(record).encode("utf-8"))
+            self._count("writes")
+        except OSError as e:
+            print(f"Error writing page cache entry for {url}: {e}")
+
+    def touch(self, url: str, page: CachedPage):
+        """Mark a stale entry fresh again after the server answered 304 Not Modified"""
+        if self.replay:
+            return
+        record = {
+            "url": page.url, "blob": page.blob, "fetched_at": time.time(), "ttl": page.ttl,
+            "served_by": page.served_by, "etag": page.etag, "last_modified": page.last_modified,
+        }
+        try:
+            self._write_atomic(self._entry_path(url), json.dumps(record).encode("utf-8"))
+            self._count("revalidated")
+        except OSError as e:
+            print(f"Error refreshing page cache entry for {url}: {e}")
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Delete entries fetched more than max_age_seconds ago and blobs no entry references"""
+        now = time.time()
+        removed = 0
+        referenced = set()
+        for name in os.listdir(self.entry_dir):
+            path = os.path.join(self.entry_dir, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    record = json.load(f)
+                if now - record["fetched_at"] > max_age_seconds:
+                    os.remove(path)
+                    removed += 1
+                else:
+                    referenced.add(record["blob"])
+            except (OSError, ValueError, KeyError):
+                continue
+        for shard in os.listdir(self.blob_dir):
+            shard_dir = os.path.join(self.blob_dir, shard)
+            for name in os.listdir(shard_dir):
+                if name.split(".", 1)[0] not in referenced:
+                    try:
+                        os.remove(os.path.join(shard_dir, name))
+                    except OSError:
+                        pass
+        return removed
+
+    def prune_if_due(self, max_age_seconds: float = PAGE_CACHE_MAX_AGE_SECONDS) -> int:
+        """prune() at most once per PAGE_CACHE_PRUNE_INTERVAL; a replay cache is never pruned"""
+        if not self.enabled or self.replay:
+            return 0
+        with self._lock:
+            now = time.time()
+            if now - self._last_prune < PAGE_CACHE_PRUNE_INTERVAL:
+                return 0
+            self._last_prune = now
+        return self.prune(max_age_seconds)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "hits": self.hits,
+                "stale": self.stale,
+                "misses": self.misses,
+                "writes": self.writes,
+                "revalidated": self.revalidated,
+            }
@@ -0,0 +1,554 @@
+"""
+Single-pass product page (PDP) extraction.
+
+The page is parsed once with lxml and walked once. That walk records every
+candidate a field can come from: JSON-LD blocks, meta tags, itemprops, the
+first element matching each fallback selector, rating-like attributes and
+the document text. Field priorities are resolved afterwards, so a fallback
+costs nothing unless the preferred source is missing.
+
+Depends on lxml only (no Selenium or BeautifulSoup), so it can be benchmarked
+and exercised on saved fixture pages.
+"""
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from lxml import etree, html as lxml_html
+
+MAX_REVIEWS = 5
+MAX_DOM_IMAGES = 6
+
+# ------- JSON-LD helpers -------
+def parse_jsonld_texts(texts: List[str]) -> List[dict]:
+    """Parse the contents of ld+json script tags; @graph containers are flattened"""
+    blocks = []
+    for text in texts:
+        text = (text or "").strip()
+        if not text:
+            continue
+        # JSON-LD sometimes contains multiple JSON objects one after another; try safe parsing
+        try:
+            parsed = json.loads(text)
+            if isinstance(parsed, list):
+                blocks.extend(parsed)
+            else:
+                blocks.append(parsed)
+        except Exception:
+            # attempt to split multiple JSON objects (rare) or fix trailing commas
+            # try to find all {...} objects using regex (fallback)
+            objs = re.findall(r'\{.*?\}\s*(?=\{|\s*$)', text, flags=re.DOTALL)
+            for o in objs:
+                try:
+                    parsed = json.loads(o)
+                    blocks.append(parsed)
+                except Exception:
+                    continue
+    for blk in list(blocks):
+        if isinstance(blk, dict) and isinstance(blk.get("@graph"), list):
+            blocks.extend(blk["@graph"])
+    return blocks
+
+def find_jsonld_of_type(blocks: List[dict], typ: str) -> Optional[dict]:
+    for blk in blocks:
+        if not isinstance(blk, dict):
+            continue
+        t = blk.get("@type") or blk.get("type")
+        if isinstance(t, list):
+            if any(typ.lower() in (x or "").lower() for x in t):
+                return blk
+        elif isinstance(t, str):
+            if typ.lower() in t.lower():
+                return blk
+    return None
+
+# ------- cleaning & parsing helpers -------
+CTA_PATTERNS = [
+    re.compile(r"(?i)please enter pin"), re.compile(r"(?i)add to bag"), re.compile(r"(?i)buy "),
+    re.compile(r"(?i)style id"), re.compile(r"(?i)please check"), re.compile(r"(?i)check delivery")
+]
+RATING_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(?:/|out of|stars?|star|/5)\s*(?:5)?', re.I)
+TEXT_RATING_PATTERN = re.compile(r'(\d(?:\.\d)?)\s*(?:/|out of)\s*5')
+BY_BRAND_PATTERN = re.compile(r'by\s+([A-Za-z0-9 &\.-]{2,50})$', re.I)
+
+def clean_description_text(text: str) -> str:
+    if not text:
+        return ""
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    good = []
+    for ln in lines:
+        low = ln.lower()
+        if len(ln) < 15:
+            # skip very short lines (usually CTA/UI)
+            continue
+        if any(p.search(ln) for p in CTA_PATTERNS):
+            continue
+        # remove repeated 'Please enter PIN code' style lines
+        if "pin" in low and ("delivery" in low or "pincode" in low or "pin code" in low):
+            continue
+        good.append(ln)
+    if not good:
+        # fallback: return the longest original non-CTA line
+        candidates = [ln for ln in lines if not any(p.search(ln) for p in CTA_PATTERNS)]
+        if candidates:
+            return max(candidates, key=len)
+        return ""
+    # return the longest meaningful paragraph
+    return max(good, key=len)
+
+def parse_rating_string(s: str) -> Optional[float]:
+    if not s:
+        return None
+    # handle patterns like "4.5 out of 5", "4/5", "4.5 stars", "4.5/5"
+    m = RATING_PATTERN.search(s)
+    if m:
+        try:
+            return float(m.group(1))
+        except ValueError:
+            return None
+    # handle ★★★★★ patterns: count stars
+    if '★' in s:
+        return float(s.count('★'))
+    return None
+
+# ------- JSON-LD extractors -------
+def extract_brand_from_jsonld(json_ld: Optional[dict]) -> str:
+    if not json_ld:
+        return ""
+    # product.brand could be string or dict
+    brand = json_ld.get("brand") or json_ld.get("manufacturer") or json_ld.get("maker") or ""
+    if isinstance(brand, dict):
+        return brand.get("name") or brand.get("@id") or ""
+    if isinstance(brand, str):
+        return brand
+    return ""
+
+def extract_breadcrumbs_from_jsonld(blocks: List[dict]) -> str:
+    # Look for BreadcrumbList schema
+    bl = find_jsonld_of_type(blocks, "BreadcrumbList")
+    if not bl:
+        return ""
+    items = bl.get("itemListElement") or bl.get("itemList") or []
+    names = []
+    for it in items:
+        if not isinstance(it, dict):
+            continue
+        if "name" in it:
+            names.append(it["name"])
+        else:
+            # some formats: item: { "@id": "...", "name": "..." }
+            item = it.get("item") or it.get("itemListElement")
+            if isinstance(item, dict) and item.get("name"):
+                names.append(item.get("name"))
+    return "/".join([n.strip() for n in names if isinstance(n, str) and n])
+
+def extract_reviews_from_jsonld(json_ld_prod: Optional[dict], max_reviews=MAX_REVIEWS):
+    if not json_ld_prod:
+        return [], None, None
+    reviews_raw = json_ld_prod.get("review") or json_ld_prod.get("reviews") or []
+    if isinstance(reviews_raw, dict):
+        reviews_raw = [reviews_raw]
+    collected = []
+    for r in reviews_raw[:max_reviews]:
+        author = ""
+        rating = ""
+        body = ""
+        if isinstance(r, dict):
+            author = r.get("author", "")
+            if isinstance(author, dict):
+                author = author.get("name") or author.get("@id") or ""
+            # rating
+            rr = r.get("reviewRating") or r.get("rating")
+            if isinstance(rr, dict):
+                rating = rr.get("ratingValue") or rr.get("bestRating") or ""
+            elif rr:
+                rating = str(rr)
+            body = r.get("reviewBody") or r.get("description") or r.get("name") or ""
+        else:
+            body = str(r)
+        rv = parse_rating_string(str(rating))
+        rating_val = f"{rv}/5" if rv is not None else ""
+        collected.append(f"{str(author or '').strip()}|{rating_val}|{str(body or '').strip()}")
+    # aggregateRating
+    agg = json_ld_prod.get("aggregateRating") or {}
+    if not isinstance(agg, dict):
+        agg = {}
+    agg_rating = agg.get("ratingValue") or agg.get("rating")
+    agg_count = agg.get("reviewCount") or agg.get("ratingCount")
+    if agg_rating:
+        try:
+            agg_rating_formatted = f"{float(agg_rating)}/5"
+        except (TypeError, ValueError):
+            agg_rating_formatted = str(agg_rating)
+    else:
+        agg_rating_formatted = None
+    return collected, agg_rating_formatted, agg_count
+
+# ------- DOM candidates -------
+# Fallback selectors, in the priority order of the BeautifulSoup cascade this engine replaced
+BRAND_CLASSES = ("brand", "product-brand", "brand-name", "manufacturer", "product-manufacturer")
+PRICE_CLASSES = {"price", "product-price", "selling-price", "a-price"}
+DESCRIPTION_SELECTORS = ("div.pdp-description", "div.product-description", "#description", ".pdp-product-more", ".productDescription")
+BREADCRUMB_SELECTORS = ("nav[aria-label*='breadcrumb']", "nav.breadcrumb", ".breadcrumbs", ".breadcrumb", "ul.breadcrumbs", "ol.breadcrumb")
+REVIEW_CARD_CLASSES = ("review", "reviewCard", "user-review", "comment", "product-review", "rvw")
+REVIEW_RATING_CLASSES = {"rating", "stars", "ratingValue"}
+REVIEW_AUTHOR_CLASSES = {"author", "user-name", "review-author"}
+RATING_ATTRS = ("aria-label", "title", "alt")
+# (property, name) of the meta tags read -> candidate key; og:title/og:description may use either attribute
+META_KEYS = {
+    ("og:title", None): "title", (None, "og:title"): "title",
+    ("og:description", None): "description", (None, "description"): "description",
+    ("og:image", None): "image",
+    (None, "brand"): "brand", ("product:brand", None): "product:brand",
+}
+NON_TEXT_TAGS = {"script", "style", "template"}
+
+def _strings(el):
+    """Text nodes under el in document order, without script/style contents"""
+    if el.tag not in NON_TEXT_TAGS and el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+def _text(el) -> str:
+    """Whitespace-joined stripped text of el (BeautifulSoup's get_text(" ", strip=True))"""
+    return " ".join(s.strip() for s in _strings(el) if s.strip())
+
+def _value(el) -> str:
+    """content of a meta tag, text of anything else"""
+    return (el.get("content") or "") if el.tag == "meta" else _text(el)
+
+def _classes(el) -> Tuple[str, ...]:
+    cls = el.get("class")
+    return tuple(cls.split()) if cls else ()
+
+def _description_keys(tag: str, classes: Tuple[str, ...], el_id: Optional[str]) -> List[str]:
+    keys = []
+    if tag == "div" and "pdp-description" in classes:
+        keys.append("div.pdp-description")
+    if tag == "div" and "product-description" in classes:
+        keys.append("div.product-description")
+    if el_id == "description":
+        keys.append("#description")
+    if "pdp-product-more" in classes:
+        keys.append(".pdp-product-more")
+    if "productDescription" in classes:
+        keys.append(".productDescription")
+    return keys
+
+def _breadcrumb_keys(tag: str, classes: Tuple[str, ...], el) -> List[str]:
+    keys = []
+    if tag == "nav" and "breadcrumb" in (el.get("aria-label") or ""):
+        keys.append("nav[aria-label*='breadcrumb']")
+    if tag == "nav" and "breadcrumb" in classes:
+        keys.append("nav.breadcrumb")
+    if "breadcrumbs" in classes:
+        keys.append(".breadcrumbs")
+        if tag == "ul":
+            keys.append("ul.breadcrumbs")
+    if "breadcrumb" in classes:
+        keys.append(".breadcrumb")
+        if tag == "ol":
+            keys.append("ol.breadcrumb")
+    return keys
+
+
+class _Candidates:
+    """Everything the single walk collects; resolved into fields by extract_product"""
+
+    def __init__(self):
+        self.jsonld: List[str] = []
+        self.meta: Dict[str, str] = {}          # first content per META_KEYS key
+        self.h1 = None
+        self.title = None                       # first "h1, h1.title, .pdp-title"
+        self.itemprop: Dict[str, object] = {}   # first element per itemprop (brand, description)
+        self.brand_class: Dict[str, object] = {}
+        self.price = None
+        self.description: Dict[str, object] = {}
+        self.breadcrumb: Dict[str, object] = {}
+        self.review_cards: Dict[str, list] = {}
+        self.images: List[str] = []
+        self.attr_rating: Optional[float] = None
+        self.text: List[str] = []
+
+
+def _collect(root) -> _Candidates:
+    c = _Candidates()
+    skip_text = 0
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment")):
+        if event == "comment":
+            if el.tail and not skip_text:
+                c.text.append(el.tail)
+            continue
+        tag = el.tag
+        if not isinstance(tag, str):
+            continue
+        if event == "end":
+            if tag in NON_TEXT_TAGS:
+                skip_text -= 1
+            if el.tail and not skip_text:
+                c.text.append(el.tail)
+            continue
+
+        if tag in NON_TEXT_TAGS:
+            skip_text += 1
+            if tag == "script" and (el.get("type") or "").strip().lower() == "application/ld+json":
+                c.jsonld.append(el.text or "")
+            continue
+        if el.text and not skip_text:
+            c.text.append(el.text)
+
+        attrib = el.attrib
+        if not attrib and tag != "h1":
+            continue
+        classes = _classes(el)
+
+        if tag == "meta":
+            key = META_KEYS.get((attrib.get("property"), attrib.get("name")))
+            if key is None:
+                key = META_KEYS.get((attrib.get("property"), None)) or META_KEYS.get((None, attrib.get("name")))
+            if key and key not in c.meta:
+                c.meta[key] = attrib.get("content") or ""
+        elif tag == "h1":
+            if c.h1 is None:
+                c.h1 = el
+            if c.title is None:
+                c.title = el
+        elif tag == "img":
+            src = attrib.get("src") or attrib.get("data-src") or attrib.get("data-lazy-src")
+            if src and len(c.images) < MAX_DOM_IMAGES:
+                c.images.append(src)
+        if c.title is None and "pdp-title" in classes:
+            c.title = el
+
+        itemprop = attrib.get("itemprop")
+        if itemprop:
+            if itemprop == "price" and c.price is None:
+                c.price = el
+            elif itemprop in ("brand", "description") and itemprop not in c.itemprop:
+                c.itemprop[itemprop] = el
+        if c.price is None and PRICE_CLASSES.intersection(classes):
+            c.price = el
+
+        if classes:
+            for cls in BRAND_CLASSES:
+                if cls in classes and cls not in c.brand_class:
+                    c.brand_class[cls] = el
+            for cls in REVIEW_CARD_CLASSES:
+                if cls in classes:
+                    c.review_cards.setdefault(cls, []).append(el)
+            for key in _breadcrumb_keys(tag, classes, el):
+                c.breadcrumb.setdefault(key, el)
+        elif tag == "nav":
+            for key in _breadcrumb_keys(tag, classes, el):
+                c.breadcrumb.setdefault(key, el)
+        if classes or "id" in attrib:
+            for key in _description_keys(tag, classes, attrib.get("id")):
+                c.description.setdefault(key, el)
+
+        if c.attr_rating is None:
+            for attr in RATING_ATTRS:
+                v = attrib.get(attr)
+                if v:
+                    rv = parse_rating_string(v)
+                    if rv is not None:
+                        c.attr_rating = rv
+                        break
+    return c
+
+# ------- field resolution -------
+def _brand(c: _Candidates, product_json: Optional[dict]) -> str:
+    brand = extract_brand_from_jsonld(product_json)
+    if brand:
+        return brand
+    el = c.itemprop.get("brand")
+    if el is not None and _value(el):
+        return _value(el)
+    for cls in BRAND_CLASSES:
+        el = c.brand_class.get(cls)
+        if el is not None and _value(el):
+            return _value(el)
+    for key in ("brand", "product:brand"):
+        if c.meta.get(key):
+            return c.meta[key]
+    # heuristic: look for 'by <Brand>' near title
+    if c.title is not None:
+        m = BY_BRAND_PATTERN.search(_text(c.title))
+        if m:
+            return m.group(1).strip()
+    return ""
+
+def _price(c: _Candidates, product_json: Optional[dict]) -> Tuple[object, str]:
+    price, currency = "", ""
+    if product_json:
+        offers = product_json.get("offers") or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        if isinstance(offers, dict) and offers:
+            spec = offers.get("priceSpecification") or {}
+            if isinstance(spec, list):
+                spec = spec[0] if spec else {}
+            price = offers.get("price") or (spec.get("price") if isinstance(spec, dict) else "") or price
+            currency = offers.get("priceCurrency") or currency
+    if not price and c.price is not None:
+        price = c.price.get("content") or _text(c.price)
+    return price, currency
+
+def _description(c: _Candidates, product_json: Optional[dict]) -> str:
+    desc = product_json.get("description") or "" if product_json else ""
+    if not desc:
+        desc = c.meta.get("description", "")
+    if not desc and "description" in c.itemprop:
+        el = c.itemprop["description"]
+        desc = _text(el) or el.get("content") or ""
+    if not desc:
+        # common PDP blocks
+        for key in DESCRIPTION_SELECTORS:
+            el = c.description.get(key)
+            if el is not None and _text(el):
+                desc = _text(el)
+                break
+    return clean_description_text(desc if isinstance(desc, str) else str(desc))
+
+def _images(c: _Candidates, product_json: Optional[dict], base_url: str) -> str:
+    imgs = []
+    if product_json:
+        imgs_json = product_json.get("image") or product_json.get("images") or product_json.get("thumbnailUrl")
+        for img in imgs_json if isinstance(imgs_json, list) else [imgs_json]:
+            if isinstance(img, dict):
+                img = img.get("url") or img.get("contentUrl")
+            if isinstance(img, str) and img:
+                imgs.append(img)
+    if not imgs and c.meta.get("image"):
+        imgs.append(c.meta["image"])
+    if not imgs:
+        imgs = [urljoin(base_url, src) for src in c.images]
+    return ", ".join(imgs)
+
+def _breadcrumbs(c: _Candidates, blocks: List[dict], name: str) -> str:
+    bc = extract_breadcrumbs_from_jsonld(blocks)
+    if not bc:
+        for key in BREADCRUMB_SELECTORS:
+            el = c.breadcrumb.get(key)
+            if el is None:
+                continue
+            texts = [t for t in (_text(d) for d in el.iterdescendants("a", "li", "span")) if t]
+            if texts:
+                # remove product/title-like last token if it's same as name
+                if name and texts[-1].strip() == name.strip():
+                    texts = texts[:-1]
+                bc = "/".join(texts)
+                break
+    # final clean: remove lines that look like CTA or description
+    parts = [p.strip() for p in bc.split("/") if p.strip() and len(p.strip()) < 80 and not any(pat.search(p) for pat in CTA_PATTERNS)]
+    return "/".join(parts)
+
+def _dom_reviews(c: _Candidates, max_reviews: int) -> List[str]:
+    collected = []
+    for cls in REVIEW_CARD_CLASSES:
+        for el in c.review_cards.get(cls, ()):
+            text = _text(el)
+            if not text or len(text) < 30:
+                continue
+            # try find a rating inside el
+            rating_text = ""
+            for attr in RATING_ATTRS:
+                rv = parse_rating_string(el.get(attr) or "")
+                if rv:
+                    rating_text = f"{rv}/5"
+                    break
+            inner = author_el = None
+            for d in el.iterdescendants():
+                if not isinstance(d.tag, str):
+                    continue
+                d_classes = _classes(d)
+                if inner is None and ("aria-label" in d.attrib or REVIEW_RATING_CLASSES.intersection(d_classes)):
+                    inner = d
+                if author_el is None and REVIEW_AUTHOR_CLASSES.intersection(d_classes):
+                    author_el = d
+            author = _text(author_el) if author_el is not None else ""
+            if inner is not None and not rating_text:
+                rv = parse_rating_string(inner.get("aria-label") or inner.get("title") or _text(inner))
+                if rv:
+                    rating_text = f"{rv}/5"
+            collected.append(f"{author}|{rating_text}|{text}")
+            if len(collected) >= max_reviews:
+                break
+        if collected:
+            break
+    return collected
+
+def _ratings(c: _Candidates, product_json: Optional[dict], blocks: List[dict], max_reviews: int):
+    reviews, agg_rating, agg_count = extract_reviews_from_jsonld(product_json, max_reviews=max_reviews)
+    # some sites embed aggregateRating as a separate block
+    if not agg_rating:
+        agg = find_jsonld_of_type(blocks, "AggregateRating")
+        if agg:
+            rv = agg.get("ratingValue") or agg.get("rating")
+            agg_rating = f"{rv}/5" if rv else None
+            agg_count = agg.get("reviewCount") or agg.get("ratingCount")
+    # DOM fallback: rating-like attribute ("4.5 out of 5 stars"), then document text ("4.3/5")
+    if not agg_rating and c.attr_rating is not None:
+        agg_rating, agg_count = f"{c.attr_rating}/5", None
+    if not agg_rating:
+        m = TEXT_RATING_PATTERN.search(" ".join(s.strip() for s in c.text if s.strip()))
+        if m:
+            agg_rating, agg_count = f"{float(m.group(1))}/5", None
+    if not reviews:
+        reviews = _dom_reviews(c, max_reviews)
+    return reviews, agg_rating, agg_count
+
+def parse_html(page):
+    """lxml root of an HTML document (str or bytes), or None if it cannot be parsed"""
+    if not page:
+        return None
+    try:
+        return lxml_html.document_fromstring(page)
+    except ValueError:
+        # str documents with an XML encoding declaration must be parsed from bytes
+        return lxml_html.document_fromstring(page.encode("utf-8") if isinstance(page, str) else page)
+    except etree.ParserError:
+        return None
+
+def extract_product(page, base_url: str, max_reviews: int = MAX_REVIEWS) -> Dict:
+    """Extract product fields from a PDP's HTML (or an already parsed lxml root)"""
+    out = {
+        "name": "",
+        "brand": "",
+        "price": "",
+        "currency": "",
+        "description": "",
+        "images": "",
+        "breadcrumbs": "",
+        "rating": "",
+        "review_count": "",
+        "reviews": ""
+    }
+    root = page if isinstance(page, etree._Element) else parse_html(page)
+    if root is None:
+        return out
+
+    c = _collect(root)
+    blocks = parse_jsonld_texts(c.jsonld)
+    product_json = find_jsonld_of_type(blocks, "Product")
+
+    out["name"] = (product_json.get("name") if product_json else "") or c.meta.get("title") \
+        or (_text(c.h1) if c.h1 is not None else "")
+    out["brand"] = _brand(c, product_json)
+    out["price"], out["currency"] = _price(c, product_json)
+    out["description"] = _description(c, product_json)
+    out["images"] = _images(c, product_json, base_url)
+    out["breadcrumbs"] = _breadcrumbs(c, blocks, out["name"] if isinstance(out["name"], str) else "")
+    reviews, rating, count = _ratings(c, product_json, blocks, max_reviews)
+    out["reviews"] = " || ".join(reviews)
+    out["rating"] = rating or ""
+    out["review_count"] = count or ""
+    # final whitespace cleanup
+    for k, v in out.items():
+        if isinstance(v, str):
+            out[k] = " ".join(v.split())
+    return out
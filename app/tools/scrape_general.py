@@ -1,32 +1,96 @@
-import sys
+import os
+import re
 import time
 import csv
-import json
-import re
-from typing import List, Dict, Optional
+import atexit
+import shutil
+import socket
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 from urllib.parse import urlparse, urljoin
 
 from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import WebDriverException
 from bs4 import BeautifulSoup
+from http_fetch import HttpClient, looks_like_bot_wall
+from pdp_extract import extract_product
+from page_cache import PageCache
+from app.utils.catalog_stream import CatalogStream
+from app.utils.urls import canonical_url
 
 # ---------- CONFIG ----------
 USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
               "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 HEADLESS = False               # change to True after testing if not blocked
-DELAY_BETWEEN_PAGE = 1.0       # polite delay
+DELAY_BETWEEN_PAGE = 1.0       # polite delay between page loads on one domain
+DOMAIN_MAX_CONCURRENCY = 2     # max pages loading at once on one domain
+PDP_WORKERS = 4                # product pages fetched concurrently per scrape
 MAX_PRODUCTS = None            # None or integer
+CRAWL_MAX_PAGES = 10           # listing pages (and infinite-scroll loads) crawled per scrape
+INFINITE_SCROLL = True         # scroll listings without pagination links for more cards
+SCROLL_TIMEOUT = 3.0           # seconds to wait for a scroll to append cards
+STREAM_CHECKPOINT_ROWS = 10    # rows appended to the output CSV between checkpoints readers can see
+STREAM_CHECKPOINT_SECONDS = 5.0
 MAX_REVIEWS_PER_PRODUCT = 5
+FIELDNAMES = ["name", "brand", "price", "link", "image", "description", "breadcrumbs", "rating", "review_count", "reviews"]
+BROWSER_POOL_SIZE = 4          # max live browsers per process
+DRIVER_MAX_PAGES = 50          # recycle a browser after this many pages
+BROWSER_IDLE_SECONDS = 300     # quit browsers idle for longer than this
+HTTP_FAST_PATH = True          # try a plain HTTP fetch before rendering a page in Chromium
+READY_TIMEOUT = 6.0            # max seconds to wait for product content after a page loads
+READY_POLL_INTERVAL = 0.1      # seconds between readiness checks
+READY_MISS_LIMIT = 3           # consecutive timeouts after which a domain gets the short timeout
+READY_MISS_TIMEOUT = 1.5       # timeout for domains whose pages never match the readiness markers
+LEAN_PROFILE = True            # block images, media, fonts, stylesheets and trackers (only the HTML is extracted)
+PAGE_LOAD_STRATEGY = "eager"   # return from driver.get at DOMContentLoaded; readiness polling does the rest
 # ----------------------------
 
-def init_driver(headless=HEADLESS):
-    """Initialize and return Selenium WebDriver"""
-    import os
-    
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# Requests blocked in lean mode (Chrome DevTools Network.setBlockedURLs wildcard patterns)
+BLOCKED_URL_PATTERNS = [
+    # images, fonts, media and stylesheets
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.css*",
+    # analytics, ads and session recording
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*adservice.google.*", "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*clarity.ms*",
+    "*criteo.com*", "*criteo.net*", "*taboola.com*", "*outbrain.com*", "*scorecardresearch.com*",
+    "*amazon-adsystem.com*", "*nr-data.net*", "*newrelic.com*", "*segment.io*", "*mixpanel.com*",
+    "*branch.io*", "*moengage.com*", "*clevertap*", "*webengage.com*",
+]
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+}
+LEAN_ARGS = [
+    "--blink-settings=imagesEnabled=false", "--disable-extensions", "--disable-background-networking",
+    "--disable-sync", "--disable-default-apps", "--no-first-run", "--mute-audio",
+    "--disable-features=Translate,MediaRouter,OptimizationHints", "--autoplay-policy=user-gesture-required",
+]
+
+def init_driver(headless=HEADLESS, debug_port: Optional[int] = None, profile_dir: Optional[str] = None,
+                lean: bool = LEAN_PROFILE):
+    """
+    Initialize and return Selenium WebDriver (own debugging port and profile, so browsers can run side by side).
+    lean=True blocks heavy resources and trackers, so a page load fetches little more than its HTML and scripts.
+    """
     options = webdriver.ChromeOptions()
     options.add_argument(f"user-agent={USER_AGENT}")
+    options.page_load_strategy = PAGE_LOAD_STRATEGY
+    if lean:
+        options.add_experimental_option("prefs", LEAN_PREFS)
+        for arg in LEAN_ARGS:
+            options.add_argument(arg)
     
     # Essential Docker flags
     options.add_argument("--no-sandbox")
@@ -34,7 +98,9 @@ def init_driver(headless=HEADLESS):
     options.add_argument("--disable-gpu")
     options.add_argument("--disable-software-rasterizer")
     options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--remote-debugging-port=9222")
+    options.add_argument(f"--remote-debugging-port={debug_port or _free_port()}")
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={profile_dir}")
     options.add_argument("--window-size=1920,1080")
     
     # Headless mode (always use in Docker)
@@ -51,427 +117,333 @@ def init_driver(headless=HEADLESS):
     try:
         driver = webdriver.Chrome(options=options)
         print("✅ Chrome driver initialized successfully")
-        return driver
     except Exception as e:
         print(f"❌ Failed to initialize Chrome driver: {e}")
         raise
+    if lean:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"⚠️ Resource blocking unavailable: {e}")
+    return driver
 
-def get_soup_from_driver(driver, url, wait_seconds=1.0):
-    driver.get(url)
-    time.sleep(wait_seconds)
-    return BeautifulSoup(driver.page_source, "html.parser")
-
-# ------- JSON-LD helpers -------
-def parse_jsonld_blocks(soup) -> List[dict]:
-    blocks = []
-    for tag in soup.select("script[type='application/ld+json']"):
-        text = tag.string or tag.get_text() or ""
-        text = text.strip()
-        if not text:
-            continue
-        # JSON-LD sometimes contains multiple JSON objects one after another; try safe parsing
+class _PooledDriver:
+    __slots__ = ("driver", "profile_dir", "pages", "last_used", "broken")
+
+    def __init__(self, driver, profile_dir: str):
+        self.driver = driver
+        self.profile_dir = profile_dir
+        self.pages = 0
+        self.last_used = time.monotonic()
+        self.broken = False
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm Chromium drivers shared by every scrape in the process.
+    A lease covers one page: the driver is handed back afterwards and recycled
+    after max_pages pages or as soon as it raises a WebDriverException. Each
+    driver gets its own profile directory and debugging port.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages: int = DRIVER_MAX_PAGES,
+                 idle_seconds: float = BROWSER_IDLE_SECONDS, headless: bool = HEADLESS):
+        self.size = size
+        self.max_pages = max_pages
+        self.idle_seconds = idle_seconds
+        self.headless = headless
+        self._idle: List[_PooledDriver] = []   # most recently used last
+        self._live = 0
+        self._cond = threading.Condition()
+        self._waits = deque(maxlen=1000)
+        self.leases = 0
+        self.started = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def _start(self) -> _PooledDriver:
+        profile_dir = tempfile.mkdtemp(prefix="scraper-profile-")
         try:
-            parsed = json.loads(text)
-            if isinstance(parsed, list):
-                blocks.extend(parsed)
-            else:
-                blocks.append(parsed)
+            driver = init_driver(self.headless, debug_port=_free_port(), profile_dir=profile_dir)
         except Exception:
-            # attempt to split multiple JSON objects (rare) or fix trailing commas
-            # try to find all {...} objects using regex (fallback)
-            objs = re.findall(r'\{.*?\}\s*(?=\{|\s*$)', text, flags=re.DOTALL)
-            for o in objs:
-                try:
-                    parsed = json.loads(o)
-                    blocks.append(parsed)
-                except Exception:
-                    continue
-    return blocks
-
-def find_jsonld_of_type(blocks: List[dict], typ: str) -> Optional[dict]:
-    for blk in blocks:
-        if not isinstance(blk, dict):
-            continue
-        t = blk.get("@type") or blk.get("type")
-        if isinstance(t, list):
-            if any(typ.lower() in (x or "").lower() for x in t):
-                return blk
-        elif isinstance(t, str):
-            if typ.lower() in t.lower():
-                return blk
-    return None
-
-# ------- cleaning & parsing helpers -------
-CTA_PATTERNS = [
-    re.compile(r"(?i)please enter pin"), re.compile(r"(?i)add to bag"), re.compile(r"(?i)buy "),
-    re.compile(r"(?i)style id"), re.compile(r"(?i)please check"), re.compile(r"(?i)check delivery")
-]
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self.started += 1
+        return _PooledDriver(driver, profile_dir)
 
-def clean_description_text(text: str) -> str:
-    if not text:
-        return ""
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    good = []
-    for ln in lines:
-        low = ln.lower()
-        if len(ln) < 15:
-            # skip very short lines (usually CTA/UI)
-            continue
-        if any(p.search(ln) for p in CTA_PATTERNS):
-            continue
-        # remove repeated 'Please enter PIN code' style lines
-        if "pin" in low and ("delivery" in low or "pincode" in low or "pin code" in low):
-            continue
-        good.append(ln)
-    if not good:
-        # fallback: return the longest original non-CTA line
-        candidates = [ln for ln in lines if not any(p.search(ln) for p in CTA_PATTERNS)]
-        if candidates:
-            return max(candidates, key=len)
-        return ""
-    # return the longest meaningful paragraph
-    return max(good, key=len)
-
-def parse_rating_string(s: str) -> Optional[float]:
-    if not s:
-        return None
-    # handle patterns like "4.5 out of 5", "4/5", "4.5 stars", "4.5/5"
-    m = re.search(r'(\d+(?:\.\d+)?)\s*(?:/|out of|stars?|star|/5)\s*(?:5)?', s, flags=re.I)
-    if m:
+    @staticmethod
+    def _quit(slot: _PooledDriver):
         try:
-            return float(m.group(1))
-        except:
-            return None
-    # handle ★★★★★ patterns: count stars
-    if '★' in s:
-        count = s.count('★')
-        # if use full stars maybe 5 scale; return count (may be 4 etc.)
+            slot.driver.quit()
+        except Exception as e:
+            print("  Driver quit failed:", e)
+        shutil.rmtree(slot.profile_dir, ignore_errors=True)
+
+    def _acquire(self) -> _PooledDriver:
+        stale = []
+        with self._cond:
+            now = time.monotonic()
+            while len(self._idle) > 1 and now - self._idle[0].last_used > self.idle_seconds:
+                stale.append(self._idle.pop(0))
+                self._live -= 1
+            while not self._idle and self._live >= self.size:
+                self._cond.wait()
+            slot = self._idle.pop() if self._idle else None
+            if slot is None:
+                self._live += 1
+        for old in stale:
+            self._quit(old)
+        if slot is not None:
+            return slot
         try:
-            return float(count)
-        except:
-            return None
-    return None
-
-# ------- extractors -------
-def extract_brand_from_jsonld(json_ld: Optional[dict]) -> str:
-    if not json_ld:
-        return ""
-    # product.brand could be string or dict
-    brand = json_ld.get("brand") or json_ld.get("manufacturer") or json_ld.get("maker") or ""
-    if isinstance(brand, dict):
-        return brand.get("name") or brand.get("@id") or ""
-    if isinstance(brand, str):
-        return brand
-    return ""
-
-def extract_breadcrumbs_from_jsonld(blocks: List[dict]) -> str:
-    # Look for BreadcrumbList schema
-    bl = find_jsonld_of_type(blocks, "BreadcrumbList")
-    if bl:
-        items = bl.get("itemListElement") or bl.get("itemList") or []
-        names = []
-        for it in items:
-            # item may be dict or nested
-            if isinstance(it, dict):
-                if "name" in it:
-                    names.append(it["name"])
+            return self._start()
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, slot: _PooledDriver):
+        slot.pages += 1
+        slot.last_used = time.monotonic()
+        if slot.broken or slot.pages >= self.max_pages:
+            # Quit before freeing the slot so the pool never exceeds its size
+            self._quit(slot)
+            with self._cond:
+                self._live -= 1
+                if slot.broken:
+                    self.crashed += 1
                 else:
-                    # some formats: item: { "@id": "...", "name": "..." }
-                    item = it.get("item") or it.get("itemListElement")
-                    if isinstance(item, dict) and item.get("name"):
-                        names.append(item.get("name"))
-                    else:
-                        # try extract nested 'item'->'name'
-                        try:
-                            nm = it.get("item", {}).get("name")
-                            if nm:
-                                names.append(nm)
-                        except:
-                            pass
-        return "/".join([n.strip() for n in names if n])
-    return ""
-
-def extract_reviews_from_jsonld(json_ld_prod: Optional[dict], max_reviews=MAX_REVIEWS_PER_PRODUCT):
-    if not json_ld_prod:
-        return [], None, None
-    reviews_raw = json_ld_prod.get("review") or json_ld_prod.get("reviews") or []
-    if isinstance(reviews_raw, dict):
-        reviews_raw = [reviews_raw]
-    collected = []
-    for r in reviews_raw[:max_reviews]:
-        author = ""
-        rating = ""
-        body = ""
-        if isinstance(r, dict):
-            author = r.get("author", "")
-            if isinstance(author, dict):
-                author = author.get("name") or author.get("@id") or ""
-            # rating
-            rr = r.get("reviewRating") or r.get("rating")
-            if isinstance(rr, dict):
-                rating = rr.get("ratingValue") or rr.get("bestRating") or ""
-            elif rr:
-                rating = str(rr)
-            body = r.get("reviewBody") or r.get("description") or r.get("name") or ""
-        else:
-            body = str(r)
-        rating_val = ""
+                    self.recycled += 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a warm driver for one page"""
+        start = time.perf_counter()
+        slot = self._acquire()
+        with self._cond:
+            self.leases += 1
+            self._waits.append(time.perf_counter() - start)
         try:
-            rv = parse_rating_string(str(rating))
-            if rv is not None:
-                rating_val = f"{rv}/5"
-        except:
-            rating_val = str(rating)
-        entry = f"{(author or '').strip()}|{rating_val}|{(body or '').strip()}"
-        collected.append(entry)
-    # aggregateRating
-    agg = json_ld_prod.get("aggregateRating") or {}
-    agg_rating = agg.get("ratingValue") or agg.get("rating")
-    agg_count = agg.get("reviewCount") or agg.get("reviewCount") or agg.get("ratingCount")
-    if agg_rating:
+            yield slot.driver
+        except WebDriverException:
+            slot.broken = True
+            raise
+        finally:
+            self._release(slot)
+
+    def close(self):
+        """Quit every idle driver (drivers still leased are quit when they come back)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self.max_pages = 0
+        for slot in idle:
+            self._quit(slot)
+
+    def stats(self) -> Dict:
+        """Pool counters and lease wait times (ms), including cold starts"""
+        with self._cond:
+            waits = sorted(w * 1000 for w in self._waits)
+            return {
+                "size": self.size,
+                "live": self._live,
+                "idle": len(self._idle),
+                "leases": self.leases,
+                "started": self.started,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+                "wait_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[int(len(waits) * 0.95)], 1) if waits else 0.0,
+                "wait_ms_max": round(waits[-1], 1) if waits else 0.0,
+            }
+
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
+
+
+class DomainLimiter:
+    """
+    Per-domain politeness shared by all scrapes in the process: at most
+    max_concurrent pages of a domain in flight, and page loads on a domain
+    started at least min_interval seconds apart.
+    """
+
+    def __init__(self, min_interval: float = DELAY_BETWEEN_PAGE, max_concurrent: int = DOMAIN_MAX_CONCURRENCY):
+        self.min_interval = min_interval
+        self.max_concurrent = max_concurrent
+        self._in_flight: Dict[str, int] = {}
+        self._next_start: Dict[str, float] = {}
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, url: str):
+        """Wait until a page of url's domain may start loading, and hold a slot while it loads"""
+        domain = urlparse(url).netloc.lower()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                busy = self._in_flight.get(domain, 0) >= self.max_concurrent
+                delay = self._next_start.get(domain, 0.0) - now
+                if not busy and delay <= 0:
+                    break
+                self._cond.wait(timeout=None if busy else delay)
+            self._in_flight[domain] = self._in_flight.get(domain, 0) + 1
+            self._next_start[domain] = now + self.min_interval
         try:
-            agg_rating = float(agg_rating)
-            agg_rating_formatted = f"{agg_rating}/5"
-        except:
-            agg_rating_formatted = str(agg_rating)
-    else:
-        agg_rating_formatted = None
-    return collected, agg_rating_formatted, agg_count
-
-# DOM fallback extractors
-def extract_brand_from_dom(soup: BeautifulSoup) -> str:
-    # Common selectors
-    selectors = [
-        "[itemprop='brand']",
-        ".brand", ".product-brand", ".brand-name", ".manufacturer", ".product-manufacturer",
-        "meta[name='brand']", "meta[property='product:brand']"
-    ]
-    for sel in selectors:
-        el = soup.select_one(sel)
-        if el:
-            if el.name == "meta":
-                val = el.get("content") or ""
+            yield
+        finally:
+            with self._cond:
+                self._in_flight[domain] -= 1
+                self._cond.notify_all()
+
+    def pace(self, url: str):
+        """Wait out min_interval before another load of url's domain by a caller that already holds a slot"""
+        domain = urlparse(url).netloc.lower()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                delay = self._next_start.get(domain, 0.0) - now
+                if delay <= 0:
+                    break
+                self._cond.wait(timeout=delay)
+            self._next_start[domain] = now + self.min_interval
+
+
+domain_limiter = DomainLimiter()
+
+http_client = HttpClient(USER_AGENT)
+atexit.register(http_client.close)
+
+LISTING_CARD_SELECTORS = [
+    "a.product-base", "li.product-base", "a.product-card", ".product", ".s-result-item", ".search-result-item",
+    ".product-grid-item", ".grid-item", ".search-result", ".productTile", ".productListItem"
+]
+PDP_READY_SELECTORS = "[itemprop='price'], [itemprop='offers'], .pdp-price, .product-price, .selling-price, .a-price"
+
+# True once the DOM is parsed and shows product data: Product JSON-LD, a PDP price element or a listing's cards
+READY_SCRIPT = """
+if (document.readyState === 'loading') return false;
+for (const s of document.querySelectorAll("script[type='application/ld+json']")) {
+    if (s.textContent.indexOf('"Product"') !== -1) return true;
+}
+if (document.querySelector(arguments[0])) return true;
+for (const sel of arguments[1]) {
+    if (document.querySelectorAll(sel).length >= 4) return true;
+}
+return false;
+"""
+
+# Bytes the page transferred: the document plus every resource that was not blocked. Cross-origin
+# resources without Timing-Allow-Origin report 0, so this is a lower bound on third-party-heavy pages.
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+return {bytes: bytes, resources: resources.length};
+"""
+
+
+class PageWaitStats:
+    """
+    Readiness waits learned per domain across scrapes. The first readiness check is
+    delayed by the domain's fastest recent wait, and domains whose pages keep timing
+    out (they never show the markers) get a short timeout instead of the full one.
+    """
+
+    def __init__(self, history: int = 200):
+        self.history = history
+        self._waits: Dict[str, deque] = {}
+        self._misses: Dict[str, int] = {}
+        self._timeouts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def first_poll(self, domain: str) -> float:
+        with self._lock:
+            waits = self._waits.get(domain)
+            return min(waits) if waits else 0.0
+
+    def timeout(self, domain: str) -> float:
+        with self._lock:
+            missed = self._misses.get(domain, 0) >= READY_MISS_LIMIT
+        return READY_MISS_TIMEOUT if missed else READY_TIMEOUT
+
+    def record(self, domain: str, seconds: float, ready: bool):
+        with self._lock:
+            if ready:
+                self._waits.setdefault(domain, deque(maxlen=self.history)).append(seconds)
+                self._misses[domain] = 0
             else:
-                val = el.get_text(strip=True)
-            if val:
-                return val
-    # heuristic: look for 'by <Brand>' near title
-    title = soup.select_one("h1, h1.title, .pdp-title")
-    if title:
-        text = title.get_text(" ", strip=True)
-        m = re.search(r'by\s+([A-Za-z0-9 &\.-]{2,50})$', text, flags=re.I)
-        if m:
-            return m.group(1).strip()
-    return ""
-
-def extract_aggregate_rating_from_dom(soup: BeautifulSoup):
-    # look for aria-labels like "4.5 out of 5 stars" in elements near rating
-    els = soup.select("[aria-label], [title], [alt]")
-    for el in els:
-        for attr in ("aria-label", "title", "alt"):
-            v = el.get(attr)
-            if not v:
-                continue
-            rv = parse_rating_string(v)
-            if rv is not None:
-                return f"{rv}/5", None
-    # text patterns e.g. "4.3/5"
-    txt = soup.get_text(" ", strip=True)
-    m = re.search(r'(\d(?:\.\d)?)\s*(?:/|out of)\s*5', txt)
-    if m:
-        try:
-            return f"{float(m.group(1))}/5", None
-        except:
-            return m.group(1), None
-    return None, None
-
-def extract_reviews_from_dom(soup: BeautifulSoup, max_reviews=MAX_REVIEWS_PER_PRODUCT):
-    collected = []
-    # try review cards
-    card_selectors = [".review", ".reviewCard", ".user-review", ".comment", ".product-review", ".rvw"]
-    for sel in card_selectors:
-        for el in soup.select(sel):
-            text = el.get_text(" ", strip=True)
-            if not text or len(text) < 30:
-                continue
-            # try find a rating inside el
-            rating_text = ""
-            for attr in ("aria-label", "title", "alt"):
-                v = el.get(attr)
-                if v:
-                    rv = parse_rating_string(v)
-                    if rv:
-                        rating_text = f"{rv}/5"
-                        break
-            # try find small rating element inside
-            inner = el.select_one("[aria-label], .rating, .stars, .ratingValue")
-            if inner and not rating_text:
-                v = inner.get("aria-label") or inner.get("title") or inner.get_text(" ", strip=True)
-                rv = parse_rating_string(v)
-                if rv:
-                    rating_text = f"{rv}/5"
-            # attempt author
-            author = ""
-            auth_sel = el.select_one(".author, .user-name, .review-author")
-            if auth_sel:
-                author = auth_sel.get_text(" ", strip=True)
-            entry = f"{author}|{rating_text}|{text}"
-            collected.append(entry)
-            if len(collected) >= max_reviews:
-                break
-        if collected:
+                self._misses[domain] = self._misses.get(domain, 0) + 1
+                self._timeouts[domain] = self._timeouts.get(domain, 0) + 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-domain ready pages, wait percentiles (ms) and timeouts"""
+        with self._lock:
+            out = {}
+            for domain in set(self._waits) | set(self._timeouts):
+                waits = sorted(w * 1000 for w in self._waits.get(domain, ()))
+                out[domain] = {
+                    "ready": len(waits),
+                    "timeouts": self._timeouts.get(domain, 0),
+                    "wait_ms_p50": round(waits[len(waits) // 2], 1) if waits else 0.0,
+                    "wait_ms_p95": round(waits[int(len(waits) * 0.95)], 1) if waits else 0.0,
+                }
+            return out
+
+
+page_waits = PageWaitStats()
+
+def load_html(driver, url, waits: PageWaitStats = page_waits) -> Tuple[str, Dict]:
+    """
+    Navigate to url and poll until the page shows product data or the domain's
+    timeout passes. Returns the rendered HTML and the page's metrics: readiness
+    wait after navigation, total load time (ms), bytes transferred and resource count.
+    """
+    domain = urlparse(url).netloc.lower()
+    timeout = waits.timeout(domain)
+    load_start = time.perf_counter()
+    driver.get(url)
+    start = time.perf_counter()
+    time.sleep(min(waits.first_poll(domain), timeout))
+    while True:
+        ready = bool(driver.execute_script(READY_SCRIPT, PDP_READY_SELECTORS, LISTING_CARD_SELECTORS))
+        waited = time.perf_counter() - start
+        if ready or waited >= timeout:
             break
-    return collected
-
-# ------- main PDP extraction combining all strategies -------
-def extract_product_from_pdp_robust(soup: BeautifulSoup, base_url: str) -> Dict:
-    out = {
-        "name": "",
-        "brand": "",
-        "price": "",
-        "currency": "",
-        "description": "",
-        "images": "",
-        "breadcrumbs": "",
-        "rating": "",
-        "review_count": "",
-        "reviews": ""
+        time.sleep(min(READY_POLL_INTERVAL, timeout - waited))
+    waits.record(domain, waited, ready)
+    page = {
+        "served_by": "browser",
+        "wait_ms": round(waited * 1000, 1),
+        "load_ms": round((time.perf_counter() - load_start) * 1000, 1),
     }
+    metrics = driver.execute_script(PAGE_METRICS_SCRIPT)
+    if isinstance(metrics, dict):
+        page["bytes"] = int(metrics.get("bytes") or 0)
+        page["resources"] = int(metrics.get("resources") or 0)
+    return driver.page_source, page
 
-    json_blocks = parse_jsonld_blocks(soup)
-    product_json = find_jsonld_of_type(json_blocks, "Product")
-    # 1) name
-    if product_json:
-        out["name"] = product_json.get("name") or out["name"]
-    if not out["name"]:
-        og = soup.select_one("meta[property='og:title'], meta[name='og:title']")
-        if og:
-            out["name"] = og.get("content") or ""
-    if not out["name"]:
-        h1 = soup.select_one("h1")
-        if h1:
-            out["name"] = h1.get_text(" ", strip=True)
-
-    # 2) brand
-    out["brand"] = extract_brand_from_jsonld(product_json) or extract_brand_from_dom(soup) or ""
-
-    # 3) price & currency
-    if product_json:
-        offers = product_json.get("offers") or {}
-        if isinstance(offers, list):
-            offers = offers[0] if offers else {}
-        if offers:
-            out["price"] = offers.get("price") or offers.get("priceSpecification", {}).get("price") or out["price"]
-            out["currency"] = offers.get("priceCurrency") or out["currency"]
-    if not out["price"]:
-        # fallback selectors
-        price_sel = soup.select_one("[itemprop='price'], .price, .product-price, .selling-price, .a-price")
-        if price_sel:
-            out["price"] = price_sel.get("content") or price_sel.get_text(" ", strip=True)
-
-    # 4) description (clean)
-    desc = ""
-    if product_json:
-        desc = product_json.get("description") or ""
-    if not desc:
-        ogd = soup.select_one("meta[property='og:description'], meta[name='description']")
-        if ogd:
-            desc = ogd.get("content") or ""
-    if not desc:
-        ip = soup.select_one("[itemprop='description']")
-        if ip:
-            desc = ip.get_text(" ", strip=True) or ip.get("content") or ""
-    if not desc:
-        # common PDP blocks
-        for sel in ["div.pdp-description", "div.product-description", "#description", ".pdp-product-more", ".productDescription"]:
-            el = soup.select_one(sel)
-            if el and el.get_text(strip=True):
-                desc = el.get_text(" ", strip=True)
-                break
-    out["description"] = clean_description_text(desc)
-
-    # 5) images
-    imgs = []
-    if product_json:
-        imgs_json = product_json.get("image") or product_json.get("images") or product_json.get("thumbnailUrl")
-        if isinstance(imgs_json, list):
-            imgs.extend(imgs_json)
-        elif isinstance(imgs_json, str):
-            imgs.append(imgs_json)
-    if not imgs:
-        og_img = soup.select_one("meta[property='og:image']")
-        if og_img:
-            imgs.append(og_img.get("content"))
-    if not imgs:
-        for img in soup.select("img"):
-            src = img.get("src") or img.get("data-src") or img.get("data-lazy-src")
-            if src and len(imgs) < 6:
-                imgs.append(urljoin(base_url, src))
-    out["images"] = ", ".join(imgs)
-
-    # 6) breadcrumbs: JSON-LD breadcrumblist first
-    bc = extract_breadcrumbs_from_jsonld(json_blocks)
-    if not bc:
-        # dom fallbacks
-        for sel in ["nav[aria-label*='breadcrumb']", "nav.breadcrumb", ".breadcrumbs", ".breadcrumb", "ul.breadcrumbs", "ol.breadcrumb"]:
-            el = soup.select_one(sel)
-            if el:
-                texts = [a.get_text(" ", strip=True) for a in el.select("a, li, span") if a.get_text(strip=True)]
-                if texts:
-                    # remove product/title-like last token if it's same as name
-                    if texts and out["name"] and texts[-1].strip() == out["name"].strip():
-                        texts = texts[:-1]
-                    bc = "/".join([t for t in texts if t])
-                    break
-    # final clean: remove lines that look like CTA or description
-    if bc:
-        bc_parts = [p.strip() for p in bc.split("/") if p.strip() and len(p.strip()) < 80 and not any(pat.search(p) for pat in CTA_PATTERNS)]
-        out["breadcrumbs"] = "/".join(bc_parts)
-    else:
-        out["breadcrumbs"] = ""
-
-    # 7) reviews & ratings
-    reviews_list = []
-    agg_rating = None
-    agg_count = None
-    if product_json:
-        reviews_list, agg_rating, agg_count = extract_reviews_from_jsonld(product_json, max_reviews=MAX_REVIEWS_PER_PRODUCT)
-    # if not found, try aggregate rating from JSON-LD blocks (some sites embed aggregateRating separate)
-    if not agg_rating:
-        agg = find_jsonld_of_type(json_blocks, "AggregateRating")
-        if agg:
-            rv = agg.get("ratingValue") or agg.get("rating")
-            cnt = agg.get("reviewCount") or agg.get("ratingCount")
-            agg_rating = f"{rv}/5" if rv else None
-            agg_count = cnt
-    # DOM fallback for ratings
-    if not agg_rating:
-        dom_rating, dom_count = extract_aggregate_rating_from_dom(soup)
-        if dom_rating:
-            agg_rating = dom_rating
-            agg_count = dom_count
-    # DOM fallback for reviews (if JSON-LD absent)
-    if not reviews_list:
-        reviews_list = extract_reviews_from_dom(soup, max_reviews=MAX_REVIEWS_PER_PRODUCT)
-
-    out["reviews"] = " || ".join(reviews_list)
-    out["rating"] = agg_rating or ""
-    out["review_count"] = agg_count or ""
-    # final whitespace cleanup
-    for k, v in out.items():
-        if isinstance(v, str):
-            out[k] = " ".join(v.split())
-    return out
+# ------- PDP extraction (single-pass lxml engine in pdp_extract.py) -------
+def extract_product_from_pdp_robust(page, base_url: str) -> Dict:
+    """Extract product fields from a PDP's HTML; a BeautifulSoup of the page is accepted too"""
+    if isinstance(page, BeautifulSoup):
+        page = str(page)
+    return extract_product(page, base_url, max_reviews=MAX_REVIEWS_PER_PRODUCT)
 
 # ------- listing detection and card parsing -------
 def find_product_cards_on_listing(soup, base_url) -> List[Dict]:
-    card_selectors = [
-        "a.product-base", "li.product-base", "a.product-card", ".product", ".s-result-item", ".search-result-item",
-        ".product-grid-item", ".grid-item", ".search-result", ".productTile", ".productListItem"
-    ]
     seen = set()
     results = []
-    for sel in card_selectors:
+    for sel in LISTING_CARD_SELECTORS:
         nodes = soup.select(sel)
         if not nodes:
             continue
@@ -513,82 +485,494 @@ def find_product_cards_on_listing(soup, base_url) -> List[Dict]:
             break
     return results
 
-# ------- main scrape function -------
-def scrape(url: str, output_csv: str):
-    driver = init_driver()
+PAGINATION_SELECTORS = [
+    "link[rel~='next']", "a[rel~='next']", "a[aria-label*='next' i]", "a.next", ".next a",
+    ".pagination a", ".pager a", "nav[aria-label*='pagination' i] a", "[class*='pagination'] a",
+]
+NEXT_LINK_TEXT = re.compile(r"^(next( page)?|more results|›|»|>)$", re.I)
+
+def find_listing_page_links(soup, page_url: str) -> List[str]:
+    """Further pages of the listing at page_url on the same domain: next-page links first, then pagination controls"""
+    domain = urlparse(page_url).netloc.lower()
+    anchors = [a for a in soup.find_all("a", href=True) if NEXT_LINK_TEXT.match(a.get_text(" ", strip=True))]
+    links = []
+    for el in soup.select(", ".join(PAGINATION_SELECTORS[:5])) + anchors + soup.select(", ".join(PAGINATION_SELECTORS[5:])):
+        href = (el.get("href") or "").strip()
+        if not href or href.startswith(("#", "javascript:")):
+            continue
+        link = urljoin(page_url, href).split("#")[0]
+        if urlparse(link).netloc.lower() == domain and link != page_url and link not in links:
+            links.append(link)
+    return links
+
+def parse_listing(html: str, base_url: str, page_url: str) -> Tuple[List[Dict], List[str]]:
+    """Cards and further-page links of one listing page, from a single parse"""
+    soup = BeautifulSoup(html, "html.parser")
+    return find_product_cards_on_listing(soup, base_url), find_listing_page_links(soup, page_url)
+
+# ------- concurrent PDP extraction -------
+def merge_pdp_into_row(row: Dict, pdp_data: Dict) -> Dict:
+    """Fill a listing-card row with the fields extracted from its product page"""
+    row.update({
+        "name": row["name"] or pdp_data.get("name", ""),
+        "brand": pdp_data.get("brand", ""),
+        "price": row["price"] or pdp_data.get("price", ""),
+        "description": pdp_data.get("description", ""),
+        "breadcrumbs": pdp_data.get("breadcrumbs", ""),
+        "rating": pdp_data.get("rating", ""),
+        "review_count": pdp_data.get("review_count", ""),
+        "reviews": pdp_data.get("reviews", ""),
+        "image": row["image"] or pdp_data.get("images", "")
+    })
+    return row
+
+def has_product_data(pdp_data: Dict) -> bool:
+    """True when extraction found enough to build a catalog row without rendering the page"""
+    return bool(pdp_data.get("name") and pdp_data.get("price"))
+
+def get_static_page(url: str, client: HttpClient, headers: Optional[Dict[str, str]] = None) -> Optional[Tuple[str, Dict]]:
+    """
+    Server-rendered HTML of url and its page metrics (status, bytes on the wire, load
+    time, validators), or None if it could not be fetched or is a bot wall.
+    A 304 answer to a conditional request (headers) comes back with empty HTML.
+    """
     try:
-        base = "{uri.scheme}://{uri.netloc}/".format(uri=urlparse(url))
-        print("Loading:", url)
-        soup = get_soup_from_driver(driver, url, wait_seconds=1.2)
-
-        listing_cards = find_product_cards_on_listing(soup, base)
-        rows = []
-        if listing_cards and len(listing_cards) >= 4:
-            print(f"Detected listing page with {len(listing_cards)} cards (first page).")
-            count = 0
-            for card in listing_cards:
-                if MAX_PRODUCTS and count >= MAX_PRODUCTS:
-                    break
-                row = {
-                    "name": card.get("name", ""),
-                    "brand": "",
-                    "price": card.get("price", ""),
-                    "link": card.get("link", ""),
-                    "image": card.get("image", ""),
-                    "description": "",
-                    "breadcrumbs": "",
-                    "rating": "",
-                    "review_count": "",
-                    "reviews": ""
-                }
-                print(f" Visiting PDP: {row['link']}")
-                try:
-                    pdp_soup = get_soup_from_driver(driver, row["link"], wait_seconds=1.0)
-                    pdp_data = extract_product_from_pdp_robust(pdp_soup, base)
-                    # merge with listing info
-                    row.update({
-                        "name": row["name"] or pdp_data.get("name", ""),
-                        "brand": pdp_data.get("brand", ""),
-                        "price": row["price"] or pdp_data.get("price", ""),
-                        "description": pdp_data.get("description", ""),
-                        "breadcrumbs": pdp_data.get("breadcrumbs", ""),
-                        "rating": pdp_data.get("rating", ""),
-                        "review_count": pdp_data.get("review_count", ""),
-                        "reviews": pdp_data.get("reviews", ""),
-                        "image": row["image"] or pdp_data.get("images", "")
-                    })
-                except Exception as e:
-                    print("  PDP visit failed:", e)
-                rows.append(row)
-                count += 1
-                time.sleep(DELAY_BETWEEN_PAGE)
-        else:
-            print("Detected PDP (direct extraction).")
-            pdp_data = extract_product_from_pdp_robust(soup, base)
-            rows.append({
-                "name": pdp_data.get("name", ""),
-                "brand": pdp_data.get("brand", ""),
-                "price": pdp_data.get("price", ""),
-                "link": url,
-                "image": pdp_data.get("images", ""),
-                "description": pdp_data.get("description", ""),
-                "breadcrumbs": pdp_data.get("breadcrumbs", ""),
-                "rating": pdp_data.get("rating", ""),
-                "review_count": pdp_data.get("review_count", ""),
-                "reviews": pdp_data.get("reviews", "")
-            })
-
-        # write CSV
-        fieldnames = ["name", "brand", "price", "link", "image", "description", "breadcrumbs", "rating", "review_count", "reviews"]
-        with open(output_csv, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for r in rows:
-                writer.writerow(r)
-
-        print("Saved", len(rows), "items to", output_csv)
-    finally:
-        driver.quit()
+        resp = client.get(url, headers=headers)
+    except Exception as e:
+        print("  HTTP fetch failed:", e)
+        return None
+    html = resp.text
+    if looks_like_bot_wall(resp.status, html):
+        print(f"  Bot wall on HTTP fetch (status {resp.status}): {url}")
+        return None
+    return html, {
+        "served_by": "http",
+        "status": resp.status,
+        "load_ms": round(resp.elapsed * 1000, 1),
+        "bytes": resp.wire_bytes,
+        "etag": resp.headers.get("etag"),
+        "last_modified": resp.headers.get("last-modified"),
+    }
+
+def get_page(url: str, pool: "BrowserPool", parse: Callable[[str], object], usable: Callable[[object], bool],
+             limiter: DomainLimiter = domain_limiter, client: Optional[HttpClient] = None,
+             cache: Optional[PageCache] = None) -> Tuple[Optional[object], Dict]:
+    """
+    Load url by the cheapest path that works and return (parse(html), page metrics):
+    a fresh page-cache entry; then a plain HTTP fetch (conditional when a stale cached
+    copy has validators) whose parse() result is usable(); then Chromium.
+    page["served_by"] is "cache", "revalidated", "http", "browser", "miss" or "failed".
+    In replay mode only the cache is consulted and a miss returns (None, ...).
+    """
+    start = time.perf_counter()
+    cached = cache.lookup(url) if cache is not None else None
+    if cached is not None and (cached.fresh or cache.replay):
+        parsed = parse(cached.html)
+        return parsed, {"served_by": "cache", "load_ms": round((time.perf_counter() - start) * 1000, 1), "bytes": 0}
+    if cache is not None and cache.replay:
+        print("  Not in page cache (replay mode):", url)
+        return None, {"served_by": "miss"}
+
+    if client is not None:
+        with limiter.slot(url):
+            static = get_static_page(url, client, cached.validators() if cached is not None else None)
+        if static is not None:
+            html, page = static
+            etag, last_modified = page.pop("etag"), page.pop("last_modified")
+            if page.pop("status") == 304 and cached is not None:
+                cache.touch(url, cached)
+                page["served_by"] = "revalidated"
+                return parse(cached.html), page
+            parsed = parse(html)
+            if usable(parsed):
+                if cache is not None:
+                    cache.put(url, html, "http", etag=etag, last_modified=last_modified)
+                return parsed, page
+
+    try:
+        with limiter.slot(url), pool.lease() as driver:
+            html, page = load_html(driver, url)
+    except Exception as e:
+        print("  Page load failed:", e)
+        return None, {"served_by": "failed"}
+    if cache is not None:
+        cache.put(url, html, "browser")
+    # Parsed after handing the driver back so the next page can start loading
+    return parse(html), page
+
+def fetch_pdp(link: str, base: str, pool: "BrowserPool", limiter: DomainLimiter = domain_limiter,
+              client: Optional[HttpClient] = None, cache: Optional[PageCache] = None) -> Tuple[Optional[Dict], Dict]:
+    """
+    Extract one product page via get_page; the HTTP fast path counts as usable when
+    it yields a product name and price. Returns (pdp_data, page).
+    """
+    try:
+        return get_page(link, pool, lambda html: extract_product_from_pdp_robust(html, base), has_product_data,
+                        limiter, client, cache)
+    except Exception as e:
+        print("  PDP visit failed:", e)
+        return None, {"served_by": "failed"}
+
+# ------- listing crawl (pagination and infinite scroll) -------
+class ListingFrontier:
+    """
+    Listing pages still to crawl: first in, first out, deduplicated by canonical URL and
+    limited to the start page's domain. Every page taken (the start page included)
+    counts against max_pages, and so does every infinite-scroll load.
+    """
+
+    def __init__(self, start_url: str, max_pages: int = CRAWL_MAX_PAGES):
+        self.domain = urlparse(start_url).netloc.lower()
+        self.max_pages = max_pages
+        self.queue: deque = deque()
+        self.seen = {canonical_url(start_url)}
+        self.taken = 1
+
+    def extend(self, urls: Iterable[str]) -> int:
+        """Queue the urls not seen before; returns how many were added"""
+        added = 0
+        for url in urls:
+            key = canonical_url(url)
+            if key in self.seen or urlparse(url).netloc.lower() != self.domain:
+                continue
+            self.seen.add(key)
+            self.queue.append(url)
+            added += 1
+        return added
+
+    def take(self) -> bool:
+        """Spend one page of the budget; False once it is used up"""
+        if self.taken >= self.max_pages:
+            return False
+        self.taken += 1
+        return True
+
+    def pop(self) -> Optional[str]:
+        """Next listing page to crawl, or None when the queue or the budget is exhausted"""
+        if not self.queue or not self.take():
+            return None
+        return self.queue.popleft()
+
+# Clicks a visible "load more" button if the listing has one, then scrolls to the bottom
+SCROLL_SCRIPT = """
+for (const b of document.querySelectorAll("button, [role='button']")) {
+    if (/^\\s*(load|show|view|see) more/i.test(b.textContent) && b.offsetParent !== null) { b.click(); break; }
+}
+window.scrollTo(0, document.body.scrollHeight);
+"""
+CARD_COUNT_SCRIPT = """
+let n = 0;
+for (const sel of arguments[0]) n = Math.max(n, document.querySelectorAll(sel).length);
+return n;
+"""
+
+def scroll_listing(url: str, base: str, pool: "BrowserPool", frontier: ListingFrontier, pages: Dict[str, Dict],
+                   limiter: DomainLimiter = domain_limiter) -> Iterator[List[Dict]]:
+    """
+    Render the listing at url and keep scrolling it while it appends cards, yielding
+    the cards on the page after the first render and after every load. Each load
+    spends one page of the frontier's budget; a scroll that adds no card within
+    SCROLL_TIMEOUT ends the crawl. A domain slot and then a driver are held until the
+    generator is closed: the same order as get_page, so PDP loads holding slots while
+    they wait for a driver can't deadlock with the scroll.
+    """
+    try:
+        with limiter.slot(url), pool.lease() as driver:
+            html, page = load_html(driver, url)
+            pages[f"{url}#scroll-0"] = {**page, "served_by": "scroll"}
+            yield find_product_cards_on_listing(BeautifulSoup(html, "html.parser"), base)
+            loads = 0
+            while frontier.take():
+                loads += 1
+                limiter.pace(url)
+                start = time.perf_counter()
+                before = driver.execute_script(CARD_COUNT_SCRIPT, LISTING_CARD_SELECTORS)
+                driver.execute_script(SCROLL_SCRIPT)
+                while True:
+                    grown = driver.execute_script(CARD_COUNT_SCRIPT, LISTING_CARD_SELECTORS) > before
+                    waited = time.perf_counter() - start
+                    if grown or waited >= SCROLL_TIMEOUT:
+                        break
+                    time.sleep(READY_POLL_INTERVAL)
+                pages[f"{url}#scroll-{loads}"] = {"served_by": "scroll", "load_ms": round(waited * 1000, 1)}
+                if not grown:
+                    print(f"  No more cards after {loads - 1} scroll loads")
+                    return
+                yield find_product_cards_on_listing(BeautifulSoup(driver.page_source, "html.parser"), base)
+    except Exception as e:
+        print("  Infinite scroll failed:", e)
+
+def crawl_listing(url: str, base: str, first: Tuple[List[Dict], List[str]], pool: "BrowserPool", pages: Dict[str, Dict],
+                  max_pages: int = CRAWL_MAX_PAGES, infinite_scroll: bool = INFINITE_SCROLL,
+                  limiter: DomainLimiter = domain_limiter, client: Optional[HttpClient] = None,
+                  cache: Optional[PageCache] = None) -> Iterator[List[Dict]]:
+    """
+    Yield a listing's cards page by page, starting with first (the entry page's cards and
+    page links). Pagination links go into a ListingFrontier and each page is loaded via
+    get_page only when the consumer asks for more, so stopping early (product budget)
+    stops the crawl. A listing without pagination links is scrolled instead (see
+    scroll_listing), except in replay mode. Page metrics are recorded into pages.
+    """
+    frontier = ListingFrontier(url, max_pages)
+    cards, links = first
+    yield cards
+    frontier.extend(links)
+    while True:
+        page_url = frontier.pop()
+        if page_url is None:
+            break
+        print(" Listing page:", page_url)
+        parsed, pages[page_url] = get_page(page_url, pool, lambda html, u=page_url: parse_listing(html, base, u),
+                                           lambda parsed: bool(parsed[0]), limiter, client, cache)
+        if parsed is None:
+            continue
+        cards, links = parsed
+        yield cards
+        frontier.extend(links)
+    if infinite_scroll and frontier.taken == 1 < max_pages and not (cache is not None and cache.replay):
+        yield from scroll_listing(url, base, pool, frontier, pages, limiter)
+
+# ------- CSV output -------
+def row_key(row: Dict) -> str:
+    """Upsert key of a scraped row: its canonical link (brand|name if no link), as in the catalog store"""
+    return canonical_url(row.get("link") or "") or f"{row.get('brand', '')}|{row.get('name', '')}".lower()
+
+def write_rows(output_csv: str, rows: List[Dict], merge: bool = False):
+    """
+    Write rows to output_csv. With merge=True, rows are upserted by product link
+    into the rows already in the file (non-empty new values win) instead of replacing it.
+    """
+    fieldnames = list(FIELDNAMES)
+    merged: Dict[str, Dict] = {}
+    if merge and os.path.exists(output_csv):
+        with open(output_csv, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            fieldnames = list(dict.fromkeys((reader.fieldnames or []) + FIELDNAMES))
+            for r in reader:
+                merged[row_key(r)] = r
+    for r in rows:
+        key = row_key(r)
+        merged[key] = {**merged.get(key, {}), **{k: v for k, v in r.items() if v}}
+
+    # Write next to the target and swap it in, so readers never see a half-written file
+    tmp = f"{output_csv}.tmp-{os.getpid()}"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(merged.values())
+    os.replace(tmp, output_csv)
+    return len(merged)
+
+# ------- run summary -------
+def _spread(values: List[float]) -> Dict:
+    values = sorted(values)
+    return {
+        "pages": len(values),
+        "p50": values[len(values) // 2] if values else 0.0,
+        "p95": values[int(len(values) * 0.95)] if values else 0.0,
+        "max": values[-1] if values else 0.0,
+        "total": round(sum(values), 1),
+    }
+
+def summarize_pages(pages: Dict[str, Dict]) -> Dict:
+    """
+    Roll per-page metrics up into the scrape summary: which path served each page,
+    readiness waits of browser pages, and bytes / load time per path.
+    """
+    served_by = {link: page["served_by"] for link, page in pages.items()}
+    paths = {path: list(served_by.values()).count(path) for path in sorted(set(served_by.values()))}
+    transfer = {}
+    for path in paths:
+        measured = [page for page in pages.values() if page["served_by"] == path and "load_ms" in page]
+        if not measured:
+            continue
+        total_bytes = sum(page.get("bytes", 0) for page in measured)
+        transfer[path] = {
+            "bytes_total": total_bytes,
+            "kb_per_page": round(total_bytes / len(measured) / 1024, 1),
+            "load_ms": _spread([page["load_ms"] for page in measured]),
+        }
+    return {
+        "served_by": served_by,
+        "paths": paths,
+        "pages": pages,
+        "wait_ms": _spread([page["wait_ms"] for page in pages.values() if "wait_ms" in page]),
+        "transfer": transfer,
+    }
+
+class ScrapeProgress:
+    """Thread-safe progress counters of one scrape; callback(counts) runs after every change"""
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None):
+        self.callback = callback
+        self.counts = {"listing_pages": 0, "pdp_pages": 0, "products_found": 0, "products_extracted": 0}
+        self._lock = threading.Lock()
+
+    def add(self, **deltas: int):
+        with self._lock:
+            for key, value in deltas.items():
+                self.counts[key] += value
+            counts = dict(self.counts)
+        if self.callback is not None:
+            try:
+                self.callback(counts)
+            except Exception as e:
+                print(f"Error reporting scrape progress: {e}")
+
+# ------- main scrape function -------
+def scrape(url: str, output_csv: str, product_lookup: Optional[Callable[[str], Optional[Dict]]] = None, merge: bool = False,
+           pool: Optional[BrowserPool] = None, workers: int = PDP_WORKERS, http_fast_path: bool = HTTP_FAST_PATH,
+           cache: Optional[PageCache] = None, max_pages: int = CRAWL_MAX_PAGES, max_products: Optional[int] = MAX_PRODUCTS,
+           infinite_scroll: bool = INFINITE_SCROLL, progress: Optional[Callable[[Dict], None]] = None,
+           limiter: Optional[DomainLimiter] = None) -> Dict:
+    """
+    Scrape a listing page or PDP into output_csv and return a summary of the run.
+    product_lookup(link) may return an already-known product row; those PDPs are not visited again.
+    merge=True upserts the scraped rows into an existing output_csv instead of overwriting it.
+    Pages are loaded with drivers leased from pool (the process-wide browser_pool by default);
+    product pages of a listing are fetched by `workers` concurrent workers, rows keep listing order.
+    Listings are crawled across pagination links (or by infinite scroll) up to max_pages
+    pages and max_products products; cards are handed to the PDP workers as each page
+    arrives, and the crawl stops as soon as the product budget is reached.
+    With http_fast_path, each page is first fetched over plain HTTP and only rendered in
+    Chromium when the static HTML has no usable data; summary["served_by"] maps page -> path.
+    Browser pages wait until they show product data (see load_html); summary["pages"] has
+    each page's metrics (wait, load time, bytes) and summarize_pages rolls them up.
+    With a page cache, fresh cached pages are served without any network access;
+    a cache in replay mode never touches the network at all.
+    Unless merging, listing rows are appended to output_csv as they are extracted and
+    checkpointed every STREAM_CHECKPOINT_ROWS rows (see app.utils.catalog_stream), so the
+    catalog can be opened while the scrape runs; the final file is written in listing order.
+    progress(counts) is called with the ScrapeProgress counters whenever a page or product completes.
+    Page loads on a domain go through limiter (the process-wide domain_limiter by default);
+    workers overlap the waits but never exceed its per-domain rate and concurrency.
+    """
+    pool = pool or browser_pool
+    limiter = limiter or domain_limiter
+    client = http_client if http_fast_path else None
+    base = "{uri.scheme}://{uri.netloc}/".format(uri=urlparse(url))
+    pages: Dict[str, Dict] = {}
+    print("Loading:", url)
+
+    def parse_entry(page_html: str):
+        return page_html, parse_listing(page_html, base, url)
+
+    def usable_entry(parsed) -> bool:
+        # A static entry page is usable if it is a listing or a PDP with product data
+        page_html, (cards, _) = parsed
+        return len(cards) >= 4 or has_product_data(extract_product_from_pdp_robust(page_html, base))
+
+    def visit(row: Dict) -> Dict:
+        print(f" Visiting PDP: {row['link']}")
+        pdp_data, page = fetch_pdp(row["link"], base, pool, limiter, client, cache)
+        if pdp_data:
+            merge_pdp_into_row(row, pdp_data)
+        if stream is not None:
+            stream.write(row)
+        tracker.add(pdp_pages=1, products_extracted=1)
+        return page
+
+    parsed, pages[url] = get_page(url, pool, parse_entry, usable_entry, limiter, client, cache)
+    if parsed is None:
+        raise RuntimeError(f"Could not load {url} ({pages[url]['served_by']})")
+    html, listing = parsed
+    listing_cards = listing[0]
+    rows = []
+    listing_pages = 0
+    stream = None
+    tracker = ScrapeProgress(progress)
+    if listing_cards and len(listing_cards) >= 4:
+        print(f"Detected listing page with {len(listing_cards)} cards (first page).")
+        seen = set()
+        visits = []
+        start = time.perf_counter()
+        crawl = crawl_listing(url, base, listing, pool, pages, max_pages, infinite_scroll, limiter, client, cache)
+        # Rows are appended to output_csv as they complete, so the catalog can be opened while the crawl runs
+        stream = None if merge else CatalogStream(output_csv, FIELDNAMES, STREAM_CHECKPOINT_ROWS, STREAM_CHECKPOINT_SECONDS)
+        try:
+            # PDPs start as soon as their listing page is parsed; rows are collected in listing order
+            with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="pdp") as executor, closing(crawl):
+                for cards in crawl:
+                    listing_pages += 1
+                    found, known_rows = len(rows), 0
+                    for card in cards:
+                        if max_products and len(rows) >= max_products:
+                            break
+                        key = canonical_url(card.get("link", ""))
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        row = {
+                            "name": card.get("name", ""),
+                            "brand": "",
+                            "price": card.get("price", ""),
+                            "link": card.get("link", ""),
+                            "image": card.get("image", ""),
+                            "description": "",
+                            "breadcrumbs": "",
+                            "rating": "",
+                            "review_count": "",
+                            "reviews": ""
+                        }
+                        known = product_lookup(row["link"]) if product_lookup else None
+                        if known:
+                            print(f" Known product, skipping PDP: {row['link']}")
+                            row.update({k: v for k, v in known.items() if k in row and v})
+                            if stream is not None:
+                                stream.write(row)
+                            known_rows += 1
+                        else:
+                            visits.append((row, executor.submit(visit, row)))
+                        rows.append(row)
+                    tracker.add(listing_pages=1, products_found=len(rows) - found, products_extracted=known_rows)
+                    if max_products and len(rows) >= max_products:
+                        print(f"Reached the budget of {max_products} products")
+                        break
+                for row, future in visits:
+                    pages[row["link"]] = future.result()
+        except BaseException:
+            if stream is not None:
+                # Whatever was extracted stays readable as a partial catalog
+                stream.close(finished=False)
+            raise
+        print(f"Crawled {listing_pages} listing pages, visited {len(visits)} PDPs with {workers} workers "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        print("Detected PDP (direct extraction).")
+        pdp_data = extract_product_from_pdp_robust(html, base)
+        rows.append({
+            "name": pdp_data.get("name", ""),
+            "brand": pdp_data.get("brand", ""),
+            "price": pdp_data.get("price", ""),
+            "link": url,
+            "image": pdp_data.get("images", ""),
+            "description": pdp_data.get("description", ""),
+            "breadcrumbs": pdp_data.get("breadcrumbs", ""),
+            "rating": pdp_data.get("rating", ""),
+            "review_count": pdp_data.get("review_count", ""),
+            "reviews": pdp_data.get("reviews", "")
+        })
+        tracker.add(pdp_pages=1, products_found=1, products_extracted=1)
+
+    # write CSV
+    if stream is not None:
+        # Drop the progress marker first, so no reader applies the partial length to the final file
+        stream.close()
+    total = write_rows(output_csv, rows, merge=merge)
+
+    print("Saved", len(rows), "items to", output_csv, f"({total} in catalog)" if merge else "")
+    summary = summarize_pages(pages)
+    print("Pages served by:", summary["paths"])
+    print("Readiness wait per browser page (ms):", summary["wait_ms"])
+    for path, transfer in summary["transfer"].items():
+        print(f"Transfer ({path}):", transfer)
+    print("Browser pool:", pool.stats())
+    if client is not None:
+        print("HTTP client:", client.stats())
+    if cache is not None:
+        print("Page cache:", cache.stats())
+    summary.update(rows=len(rows), catalog_rows=total, listing_pages=listing_pages)
+    return summary
 
 # # CLI
 # if __name__ == "__main__":
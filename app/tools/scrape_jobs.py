@@ -0,0 +1,301 @@
+"""
+Background scrape jobs.
+
+The chat request submits a scrape as a job and returns at once. Worker threads
+run the scraper, record its progress (pages done, products extracted, ETA) and,
+when a job completes, point the session's checkpoint at the new catalog.
+
+With SCRAPE_QUEUE_BACKEND=redis, jobs and their status live in Redis, so every
+API process can report on any job and separate worker processes
+(``python -m app.tools.scrape_jobs``) can run them. With
+SCRAPE_QUEUE_BACKEND=local, or when Redis is unreachable, an in-process queue
+stands in.
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.database.postgres import PostgresManager
+from app.database.redis_client import RedisClient
+from app.tools.scraper_tool import scrape_catalog
+from app.utils.catalog_cache import get_knowledge_base, session_catalog
+from app.utils.catalog_store import catalog_store
+from app.utils.session import get_csv_filename
+
+settings = get_settings()
+
+db = PostgresManager()
+redis_client = RedisClient()
+
+ACTIVE_STATUSES = ("queued", "running")
+PROGRESS_SAVE_INTERVAL = 1.0   # seconds between status writes while a job runs
+HEARTBEAT_INTERVAL = 5 * PROGRESS_SAVE_INTERVAL   # a running job is saved at least this often, progress or not
+STALE_AFTER = 30 * PROGRESS_SAVE_INTERVAL         # a running job not saved for this long has lost its worker
+DEQUEUE_TIMEOUT = 5            # seconds a worker blocks waiting for a job
+
+
+class LocalJobBackend:
+    """In-process job store and queue, for single-process runs without Redis"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._session_jobs: Dict[str, str] = {}
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict):
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+            self._session_jobs[job["session_id"]] = job["job_id"]
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def session_job_id(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            return self._session_jobs.get(session_id)
+
+    def push(self, job_id: str):
+        self._queue.put(job_id)
+
+    def pop(self, timeout: int) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RedisJobBackend:
+    """Job store and queue shared by every process through Redis"""
+
+    def __init__(self, client: RedisClient, ttl_seconds: int):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+
+    def save(self, job: Dict):
+        self.client.set_job_data(job["job_id"], job, self.ttl_seconds)
+        self.client.set_session_job(job["session_id"], job["job_id"], self.ttl_seconds)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        return self.client.get_job_data(job_id)
+
+    def session_job_id(self, session_id: str) -> Optional[str]:
+        return self.client.get_session_job(session_id)
+
+    def push(self, job_id: str):
+        self.client.enqueue_job(job_id)
+
+    def pop(self, timeout: int) -> Optional[str]:
+        return self.client.dequeue_job(timeout)
+
+
+class ScrapeJobQueue:
+    """
+    Scrape jobs submitted by chat sessions and the worker threads that run them.
+    A session has at most one active job per URL; resubmitting returns the active one.
+    Every save stamps the job's updated_at, and a running job whose worker has not
+    saved it for STALE_AFTER seconds is reported as failed, so it can be resubmitted.
+    """
+
+    def __init__(self, backend: str = settings.scrape_queue_backend, workers: int = settings.scrape_workers,
+                 ttl_seconds: int = settings.scrape_job_ttl_seconds):
+        self.backend_name = backend
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._backend = None
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        # Chosen on first use so importing this module never waits on Redis
+        with self._lock:
+            if self._backend is None:
+                if self.backend_name == "redis" and redis_client.ping():
+                    self._backend = RedisJobBackend(redis_client, self.ttl_seconds)
+                else:
+                    if self.backend_name == "redis":
+                        print("Redis unreachable; scrape jobs use the in-process queue")
+                    self._backend = LocalJobBackend()
+            return self._backend
+
+    def start(self):
+        """Start the worker threads of this process (once)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(max(1, self.workers)):
+                thread = threading.Thread(target=self._work, name=f"scrape-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, url: str, session_id: str, user_id: str, previous_csv: Optional[str] = None) -> Dict:
+        """Queue a scrape of url for a session and return the job"""
+        active = self.session_job(session_id)
+        if active and active["status"] in ACTIVE_STATUSES and active["url"] == url:
+            return active
+        job = {
+            "job_id": f"job_{uuid.uuid4().hex[:12]}",
+            "url": url,
+            "session_id": session_id,
+            "user_id": user_id,
+            "previous_csv": previous_csv,
+            "status": "queued",
+            "submitted_at": time.time(),
+            "updated_at": None,
+            "started_at": None,
+            "finished_at": None,
+            "progress": {},
+            "partial_csv": None,
+            "csv_file": None,
+            "products": None,
+            "message": None,
+            "error": None,
+        }
+        self._save(job)
+        self.backend.push(job["job_id"])
+        self.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job status with elapsed time and, while it runs, an ETA in seconds"""
+        job = self.backend.load(job_id)
+        if job is None:
+            return None
+        last_update = job.get("updated_at") or job.get("started_at")
+        if job["status"] == "running" and last_update and time.time() - last_update > STALE_AFTER:
+            # Reported, not stored: a save here would make this the session's latest job again
+            job.update(status="failed", finished_at=last_update,
+                       error=f"Scrape worker stopped responding (no update for {round(time.time() - last_update)}s)")
+        progress = job.get("progress") or {}
+        started, finished = job.get("started_at"), job.get("finished_at")
+        job["pages_done"] = progress.get("listing_pages", 0) + progress.get("pdp_pages", 0)
+        job["elapsed_seconds"] = round((finished or time.time()) - started, 1) if started else 0.0
+        job["eta_seconds"] = None
+        done, found = progress.get("products_extracted", 0), progress.get("products_found", 0)
+        if job["status"] == "running" and done:
+            # Products still to extract at the rate seen so far; grows while the crawl finds more
+            job["eta_seconds"] = round(job["elapsed_seconds"] / done * max(0, found - done), 1)
+        return job
+
+    def session_job(self, session_id: str) -> Optional[Dict]:
+        """Latest job of a session"""
+        job_id = self.backend.session_job_id(session_id)
+        return self.get(job_id) if job_id else None
+
+    def partial_catalog(self, session_id: str) -> Optional[str]:
+        """CSV of the session's running job, readable up to its last checkpoint"""
+        job = self.session_job(session_id)
+        if not job or job["status"] != "running" or not job.get("partial_csv"):
+            return None
+        return job["partial_csv"] if os.path.exists(job["partial_csv"]) else None
+
+    def _save(self, job: Dict):
+        job["updated_at"] = time.time()
+        self.backend.save(job)
+
+    def _work(self):
+        while True:
+            try:
+                job_id = self.backend.pop(DEQUEUE_TIMEOUT)
+            except Exception as e:
+                print(f"Error reading scrape job queue: {e}")
+                time.sleep(DEQUEUE_TIMEOUT)
+                continue
+            if job_id:
+                self._run(job_id)
+
+    def _run(self, job_id: str):
+        job = self.backend.load(job_id)
+        if not job or job["status"] != "queued":
+            return
+        filename = get_csv_filename(job["session_id"], job["user_id"])
+        job.update(
+            status="running",
+            started_at=time.time(),
+            partial_csv=os.path.abspath(os.path.join(settings.data_dir, filename)),
+        )
+        self._save(job)
+        last_save = [0.0]
+        progress_lock = threading.Lock()
+        stopped = threading.Event()
+
+        def on_progress(counts: Dict):
+            # Called from the scraper's worker threads
+            with progress_lock:
+                job["progress"] = counts
+                if time.monotonic() - last_save[0] >= PROGRESS_SAVE_INTERVAL:
+                    last_save[0] = time.monotonic()
+                    self._save(job)
+
+        def heartbeat():
+            # Slow page loads can go a while without progress; keep the job from looking abandoned
+            while not stopped.wait(HEARTBEAT_INTERVAL):
+                with progress_lock:
+                    if time.monotonic() - last_save[0] < HEARTBEAT_INTERVAL:
+                        continue
+                    last_save[0] = time.monotonic()
+                    try:
+                        self._save(job)
+                    except Exception as e:
+                        print(f"Error saving scrape job heartbeat: {e}")
+
+        threading.Thread(target=heartbeat, name=f"{job_id}-heartbeat", daemon=True).start()
+        try:
+            message, csv_path, error = scrape_catalog(job["url"], filename, progress=on_progress)
+            if csv_path is None:
+                raise RuntimeError(message.strip())
+            if error is None:
+                # The scraper moved the rows into the shared store; use the deduplicated catalog
+                csv_path = catalog_store.catalog_for_source(job["url"]) or csv_path
+            csv_path = session_catalog(job["previous_csv"], csv_path)
+            products = get_knowledge_base(csv_path).get_product_count()
+            db.save_checkpoint(
+                job["session_id"],
+                job["user_id"],
+                {"csv_file": csv_path, "scraping_complete": True},
+                csv_path
+            )
+            if error is None:
+                reply = f"✅ Finished scraping {job['url']}: {products} products are ready. Ask me anything about them!"
+            else:
+                # A failed scrape still hands the session the products it extracted before stopping
+                reply = (f"⚠️ Scraping {job['url']} stopped early ({error}), but {products} products "
+                         f"were extracted before that. Ask me anything about them!")
+            db.save_message(job["session_id"], job["user_id"], "assistant", reply, csv_path)
+            job.update(status="completed" if error is None else "failed", csv_file=csv_path, products=products,
+                       message=reply, error=error)
+        except Exception as e:
+            print(f"Error running scrape job {job_id}: {e}")
+            job.update(status="failed", error=str(e))
+        finally:
+            stopped.set()
+            with progress_lock:
+                job["finished_at"] = time.time()
+                self._save(job)
+
+        try:
+            redis_client.publish("scraping_events", {
+                "session_id": job["session_id"],
+                "job_id": job_id,
+                "status": job["status"],
+                "csv_file": job["csv_file"]
+            })
+        except Exception as e:
+            print(f"Error publishing scrape job event: {e}")
+
+
+scrape_jobs = ScrapeJobQueue()
+
+if __name__ == "__main__":
+    # Standalone worker process for the Redis-backed queue
+    print(f"Scrape job worker: {scrape_jobs.workers} thread(s), {scrape_jobs.backend_name} queue")
+    scrape_jobs.start()
+    while True:
+        time.sleep(3600)
@@ -1,6 +1,9 @@
 import os
+from typing import Callable, Dict, Optional, Tuple
 from langchain.tools import tool
-from app.utils.csv_handler import CSVKnowledgeBase
+from app.utils.catalog_cache import catalog_cache, get_knowledge_base
+from app.utils.catalog_store import catalog_store
+from app.utils.catalog_stream import progress_path
 from app.config import get_settings
 
 settings = get_settings()
@@ -8,28 +11,64 @@ settings = get_settings()
 # Import your scraper
 import sys
 sys.path.append(os.path.dirname(__file__))
-from scrape_general import scrape
+from scrape_general import DomainLimiter, scrape
+from page_cache import PageCache
 
-@tool
-def scrape_website_tool(url: str, output_filename: str) -> str:
+# Rendered pages shared by all sessions; a URL fetched recently is not navigated again
+page_cache = PageCache(
+    os.path.join(settings.data_dir, "page_cache"),
+    ttl_seconds=settings.page_cache_ttl_seconds,
+    mode=settings.page_cache_mode
+)
+
+# Politeness limits shared by every scrape in this process
+domain_limiter = DomainLimiter(
+    min_interval=settings.scrape_domain_delay_seconds,
+    max_concurrent=settings.scrape_domain_concurrency
+)
+
+def prune_page_cache():
+    """Drop page-cache entries older than PAGE_CACHE_MAX_AGE_SECONDS (at most hourly)"""
+    try:
+        removed = page_cache.prune_if_due(settings.page_cache_max_age_seconds)
+        if removed:
+            print(f"Pruned {removed} page cache entries")
+    except OSError as e:
+        print(f"Error pruning page cache: {e}")
+
+def ingest_partial_catalog(url: str, csv_path: str) -> Optional[str]:
+    """Move the rows a failed scrape had already flushed into the shared store; returns that catalog's path"""
+    if not os.path.exists(csv_path):
+        return None
+    try:
+        shared_path = catalog_store.ingest_csv(url, csv_path, complete=False)
+        if shared_path:
+            for path in (csv_path, progress_path(csv_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+        return shared_path
+    except Exception as e:
+        print(f"Error saving partial catalog: {e}")
+        return None
+
+def scrape_catalog(url: str, output_filename: str,
+                   progress: Optional[Callable[[Dict], None]] = None) -> Tuple[str, Optional[str], Optional[str]]:
     """
-    Scrapes product data from an e-commerce website and saves to CSV.
-    Enhanced version with reviews, ratings, and better extraction.
-    
-    Args:
-        url: The URL of the website to scrape (listing page or single product)
-        output_filename: The output CSV filename (just filename, not full path)
+    Scrape url into the shared product store.
+    The CSV under data_dir/output_filename can be opened while the scrape runs;
+    progress(counts) receives the scraper's progress counters.
     
     Returns:
-        A message indicating success or failure
+        (message, catalog CSV path, error). error is None on success; when the scrape
+        fails the path is the catalog of the rows extracted before it stopped, or None
     """
+    # Full path for CSV
+    csv_path = os.path.join(settings.data_dir, output_filename)
     try:
         # Ensure data directory exists
         os.makedirs(settings.data_dir, exist_ok=True)
         
-        # Full path for CSV
-        csv_path = os.path.join(settings.data_dir, output_filename)
-        
+
         # Ensure output directory exists in the CSV path
         output_dir = os.path.dirname(csv_path)
         if output_dir:
@@ -44,12 +83,27 @@ def scrape_website_tool(url: str, output_filename: str) -> str:
         print(f"📄 Full path: {os.path.abspath(csv_path)}")
         print(f"{'='*70}\n")
         
-        # Run the scraper with full path
-        scrape(url, csv_path)
+        # Run the scraper with full path; PDPs already in the shared store are not re-visited
+        scrape(url, csv_path, product_lookup=catalog_store.get_product, cache=page_cache,
+               progress=progress, limiter=domain_limiter)
+        prune_page_cache()
         
         # Verify CSV was created
         if os.path.exists(csv_path):
-            kb = CSVKnowledgeBase(csv_path)
+            # Move the rows into the shared store; the session uses the deduplicated catalog
+            shared_path = catalog_store.ingest_csv(url, csv_path)
+            if shared_path:
+                os.remove(csv_path)
+                csv_path = shared_path
+            else:
+                # The session file was rewritten; drop any cached copy so readers reload it
+                catalog_cache.invalidate(csv_path)
+            
+            kb = get_knowledge_base(csv_path)
+            
+            # Columnar sidecar lets other workers memory-map the catalog instead of re-parsing it
+            kb.save_sidecar()
+            kb.save_semantic_index()
             product_count = kb.get_product_count()
             file_size = os.path.getsize(csv_path) / 1024  # KB
             
@@ -64,11 +118,11 @@ def scrape_website_tool(url: str, output_filename: str) -> str:
                 f"{'='*70}\n"
             )
             print(success_msg)
-            return success_msg
+            return success_msg, csv_path, None
         else:
             error_msg = f"❌ ERROR: CSV file was not created at {csv_path}"
             print(error_msg)
-            return error_msg
+            return error_msg, None, error_msg
     
     except Exception as e:
         import traceback
@@ -81,4 +135,20 @@ def scrape_website_tool(url: str, output_filename: str) -> str:
             f"{'='*70}\n"
         )
         print(error_msg)
-        return error_msg
+        # Rows flushed before the failure stay usable instead of being discarded with the job
+        return error_msg, ingest_partial_catalog(url, csv_path), str(e)
+
+@tool
+def scrape_website_tool(url: str, output_filename: str) -> str:
+    """
+    Scrapes product data from an e-commerce website and saves to CSV.
+    Enhanced version with reviews, ratings, and better extraction.
+    
+    Args:
+        url: The URL of the website to scrape (listing page or single product)
+        output_filename: The output CSV filename (just filename, not full path)
+    
+    Returns:
+        A message indicating success or failure
+    """
+    return scrape_catalog(url, output_filename)[0]
@@ -0,0 +1,196 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+from app.config import get_settings
+from app.utils.catalog_store import PRODUCT_FIELDS, catalog_store
+from app.utils.catalog_stream import read_progress
+from app.utils.parsing import product_field
+
+if TYPE_CHECKING:
+    from app.utils.csv_handler import CSVKnowledgeBase
+    from app.utils.lite_kb import LiteKnowledgeBase
+    KnowledgeBase = Union[CSVKnowledgeBase, LiteKnowledgeBase]
+
+settings = get_settings()
+
+def knowledge_base_class():
+    """Knowledge-base backend selected by settings.kb_backend ("pandas" or "lite")"""
+    # Imported on demand so the lite backend never loads pandas
+    if settings.kb_backend == "lite":
+        from app.utils.lite_kb import LiteKnowledgeBase
+        return LiteKnowledgeBase
+    from app.utils.csv_handler import CSVKnowledgeBase
+    return CSVKnowledgeBase
+
+
+class CatalogCache:
+    """
+    Process-wide, thread-safe LRU cache of loaded knowledge bases.
+    Entries are keyed on (path, mtime, size) so a rewritten CSV is never
+    served stale; eviction happens on entry count or total memory budget.
+    """
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], KnowledgeBase, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        progress = read_progress(path)
+        if progress is not None:
+            # Rows appended after the last checkpoint are not read, so only a new checkpoint reloads a partial catalog
+            return (0, progress["bytes"])
+        return (st.st_mtime_ns, st.st_size)
+    
+    def get(self, csv_path: str) -> "KnowledgeBase":
+        """Return a loaded knowledge base for csv_path, loading it on a miss"""
+        path = os.path.abspath(csv_path)
+        signature = self._signature(path)
+        
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and signature is not None and entry[0] == signature:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            if entry is not None:
+                self._drop(path)
+        
+        # Load outside the lock so slow reads don't serialize other sessions
+        kb = knowledge_base_class()(csv_path)
+        if signature is None or kb.facets is None:
+            return kb
+        
+        size = kb.memory_bytes()
+        with self._lock:
+            if path in self._entries:
+                self._drop(path)
+            self._entries[path] = (signature, kb, size)
+            self._bytes += size
+            self._evict()
+        return kb
+    
+    def put(self, csv_path: str, kb: "KnowledgeBase"):
+        """Cache a knowledge base that was derived in memory for the current version of csv_path"""
+        path = os.path.abspath(csv_path)
+        signature = self._signature(path)
+        if signature is None or kb.facets is None:
+            return
+        size = kb.memory_bytes()
+        with self._lock:
+            self._drop(path)
+            self._entries[path] = (signature, kb, size)
+            self._bytes += size
+            self._evict()
+    
+    def invalidate(self, csv_path: str):
+        """Drop the cached catalog for csv_path (e.g. after a re-scrape)"""
+        with self._lock:
+            self._drop(os.path.abspath(csv_path))
+    
+    def clear(self):
+        """Drop every cached catalog"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict:
+        """Cache counters for monitoring"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+    
+    def _drop(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+    
+    def _evict(self):
+        # Always keep the most recently inserted entry, even if it alone exceeds the budget
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            path, _ = next(iter(self._entries.items()))
+            self._drop(path)
+            self.evictions += 1
+
+
+catalog_cache = CatalogCache(
+    max_entries=settings.catalog_cache_max_entries,
+    max_bytes=settings.catalog_cache_max_bytes
+)
+
+def get_knowledge_base(csv_path: str) -> "KnowledgeBase":
+    """Get a shared knowledge base for csv_path from the process-wide cache"""
+    return catalog_cache.get(csv_path)
+
+def merge_catalogs(base_csv: str, addition_csv: str) -> str:
+    """
+    Merge the products of addition_csv into a session's existing catalog base_csv
+    and return the merged shared catalog. Unless that catalog already exists, its
+    knowledge base is derived from the cached base by upserting only the addition's rows.
+    If the merge fails, base_csv is returned unchanged.
+    """
+    base = get_knowledge_base(base_csv)
+    addition = get_knowledge_base(addition_csv)
+    if not base.get_product_count():
+        return addition_csv
+    if not addition.get_product_count():
+        return base_csv
+    
+    try:
+        base_ids = base.product_ids()
+        if os.path.dirname(os.path.abspath(base_csv)) != os.path.abspath(catalog_store.catalog_dir):
+            # Per-session CSV from before the shared store: move its rows into the store first
+            catalog_store.put_products(
+                {key: product_field(row, key, '') for key in PRODUCT_FIELDS}
+                for row in base.get_all_products()
+            )
+        addition_ids = addition.product_ids()
+        merged_ids = list(dict.fromkeys(base_ids + addition_ids))
+        
+        merged_csv = catalog_store.catalog_file(merged_ids)
+        if os.path.exists(merged_csv):
+            return merged_csv
+        # Appends the new products to a copy of the base file when no base row changed
+        merged_csv = catalog_store.extend_catalog(base_csv, base_ids, addition_ids)
+        
+        merged = base.copy(merged_csv)
+        updated, added = merged.upsert_rows(catalog_store.get_products(addition_ids))
+        catalog_cache.put(merged_csv, merged)
+        merged.save_sidecar()
+        merged.save_semantic_index()
+        print(f"Merged catalog: {added} new, {updated} updated, {merged.get_product_count()} products")
+        return merged_csv
+    except Exception as e:
+        # Keep the session on the catalog it already had rather than dropping those products
+        print(f"Error merging catalogs: {e}")
+        return base_csv
+
+def session_catalog(previous_csv: Optional[str], csv_path: str) -> str:
+    """
+    Catalog a session uses after scraping csv_path: merged into its earlier catalog
+    previous_csv when CATALOG_MERGE_SESSIONS is on, otherwise csv_path itself.
+    """
+    if settings.catalog_merge_sessions and previous_csv and previous_csv != csv_path and os.path.exists(previous_csv):
+        return merge_catalogs(previous_csv, csv_path)
+    return csv_path
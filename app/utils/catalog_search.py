@@ -0,0 +1,198 @@
+import sys
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import get_settings
+from app.utils.catalog_store import csv_signature
+from app.utils.prompt_snippets import PRECOMPUTE_MAX_ROWS, SnippetCache
+from app.utils.query_parser import PARSER_WORDS, ProductQuery, parse_query
+from app.utils.text_index import INT_BYTES, STOPWORDS, TOKEN_PATTERN, normalize_token, tokenize
+
+settings = get_settings()
+
+# Breadcrumb tokens on at least this share of rows ("Home") don't narrow anything and are not categories
+COMMON_CATEGORY_SHARE = 0.9
+
+# Fields each product's semantic vector is built from
+SEMANTIC_FIELDS = ('name', 'brand', 'breadcrumbs', 'description')
+
+# A correction must be this many times as frequent as any rival at the same edit distance
+CORRECTION_MIN_LEAD = 2
+
+
+class CatalogSearchMixin:
+    """
+    Text search shared by the knowledge-base backends.
+    A backend provides csv_path, index, trigrams, _columns (row-addressable columns by name),
+    _brand_codes, _brand_lookup, _category_rows/_common_category_rows, _facet_counts,
+    _semantic/_semantic_lock, snippets, get_product_count(), get_all_products() and _results(positions).
+    """
+
+    def _render_snippets(self):
+        """Render the prompt snippet of every product once the catalog is loaded"""
+        self.snippets = SnippetCache()
+        if self.get_product_count() <= PRECOMPUTE_MAX_ROWS:
+            self.snippets.fill(enumerate(self.get_all_products()))
+
+    def _index_memory(self) -> Dict[str, int]:
+        """Approximate resident bytes of the structures built over the columns, by structure"""
+        def rows_bytes(rows) -> int:
+            # numpy arrays report their buffer; array('i') includes it; frozensets hold boxed row ids
+            if hasattr(rows, 'nbytes'):
+                return int(rows.nbytes)
+            return sys.getsizeof(rows) + (INT_BYTES * len(rows) if isinstance(rows, frozenset) else 0)
+
+        filters = rows_bytes(self._brand_codes) + sys.getsizeof(self._brand_lookup)
+        for groups in (self._category_rows, self._common_category_rows):
+            filters += sys.getsizeof(groups) + sum(rows_bytes(rows) for rows in groups.values())
+        return {
+            "index": self.index.memory_bytes(),
+            "trigrams": self.trigrams.memory_bytes(),
+            "snippets": self.snippets.memory_bytes(),
+            "semantic": self._semantic.memory_bytes() if self._semantic is not None else 0,
+            "filters": filters,
+            "facets": self._facet_counts.memory_bytes(),
+        }
+
+    def prompt_snippets(self, products: Sequence) -> List[str]:
+        """Cached prompt snippets for a result view of this catalog, in result order"""
+        return [
+            self.snippets.get(pos, lambda pos=pos: self._results([pos])[0])
+            for pos in getattr(products, 'positions', ())
+        ]
+
+    @staticmethod
+    def _trigram_words(values: Dict) -> Iterable[str]:
+        # Typo tolerance is limited to name and brand words (kept in their surface form)
+        for field in ('name', 'brand'):
+            if isinstance(values.get(field), str):
+                for word in TOKEN_PATTERN.findall(values[field].lower()):
+                    if word not in STOPWORDS and not word.isdigit():
+                        yield word
+
+    def _index_row(self, row_id: int, values: Dict, old_values: Optional[Dict] = None):
+        """Index a row; old_values are the replaced row's values when it is re-indexed"""
+        self.index.add(row_id, {f: v for f, v in values.items() if isinstance(v, str)})
+        if old_values is not None:
+            for word in self._trigram_words(old_values):
+                self.trigrams.remove(word)
+        for word in self._trigram_words(values):
+            self.trigrams.add(word)
+
+    @staticmethod
+    def _category_changes(changes: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> Dict[str, Tuple[List[int], List[int]]]:
+        """Rows leaving and joining each breadcrumb token, from (row, old path, new path) triples"""
+        delta: Dict[str, Tuple[List[int], List[int]]] = {}
+        for pos, old, new in changes:
+            old_tokens = set(tokenize(old)) if isinstance(old, str) else set()
+            new_tokens = set(tokenize(new)) if isinstance(new, str) else set()
+            for token in old_tokens - new_tokens:
+                delta.setdefault(token, ([], []))[0].append(pos)
+            for token in new_tokens - old_tokens:
+                delta.setdefault(token, ([], []))[1].append(pos)
+        return delta
+
+    def _correct_word(self, word: str) -> str:
+        """Closest name/brand word for a word the catalog has never seen, else the word itself"""
+        if len(word) < 4 or word.isdigit() or word in STOPWORDS or word in PARSER_WORDS:
+            return word
+        if normalize_token(word) in self.index.postings:
+            return word
+        candidates = self.trigrams.candidates(word)
+        if not candidates:
+            return word
+        best, distance, frequency = candidates[0]
+        # Only an unambiguous winner replaces the word
+        for _, other_distance, other_frequency in candidates[1:]:
+            if other_distance == distance and other_frequency * CORRECTION_MIN_LEAD > frequency:
+                return word
+        return best
+
+    def correct_tokens(self, tokens: List[str]) -> List[str]:
+        """Replace query tokens unknown to the catalog with their closest name/brand word"""
+        return [normalize_token(self._correct_word(token)) for token in tokens]
+
+    def correct_query(self, text: str) -> str:
+        """Rewrite misspelled words in a question ("bearddo" -> "beardo") before parsing it"""
+        return TOKEN_PATTERN.sub(lambda m: self._correct_word(m.group(0)), text.lower())
+
+    def parse_query(self, text: str) -> ProductQuery:
+        """Parse a question into price, rating, brand and category constraints for this catalog"""
+        brands = {name: display for name, (display, _) in self._brand_lookup.items()}
+        return parse_query(self.correct_query(text), brands, set(self._category_rows))
+
+    def search_products(self, query: str, top_k: int = 10) -> Sequence:
+        """Search products by ranking query tokens against name, brand, description, breadcrumbs and reviews (BM25), correcting typos first"""
+        if not self.get_product_count():
+            return []
+
+        try:
+            tokens = self.correct_tokens(tokenize(query))
+            ranked = self.index.score_tokens(tokens, top_k=top_k)
+            return self._results([row_id for row_id, _ in ranked])
+
+        except Exception as e:
+            print(f"Error searching products: {e}")
+            # If search fails, return all products as fallback
+            return self.get_all_products()
+
+    def semantic_search(self, query: str, top_k: int = 10) -> Sequence:
+        """Rank products by cosine similarity of hashed n-gram vectors (offline, CPU-only)"""
+        if not self.get_product_count():
+            return []
+
+        try:
+            ranked = self._semantic_index().search(query, top_k=top_k)
+            return self._results([row_id for row_id, _ in ranked])
+        except Exception as e:
+            print(f"Error in semantic search: {e}")
+            return self.search_products(query, top_k=top_k)
+
+    def _semantic_index(self):
+        """Load the persisted vector index for this catalog version, building it on first use"""
+        if self._semantic is not None:
+            return self._semantic
+
+        # numpy is only needed once a catalog is searched semantically
+        from app.utils.semantic_index import SemanticIndex
+
+        with self._semantic_lock:
+            if self._semantic is None:
+                signature = csv_signature(self.csv_path)
+                index = SemanticIndex.load(self.csv_path, signature, settings.semantic_dim) if signature else None
+                if index is None or len(index) != self.get_product_count():
+                    index = SemanticIndex(settings.semantic_dim)
+                    index.build(self._semantic_texts())
+                    if signature:
+                        index.save(self.csv_path, signature)
+                self._semantic = index
+        return self._semantic
+
+    def save_semantic_index(self):
+        """
+        With SEARCH_MODE=semantic, build the vector index now and persist it next to the CSV,
+        so no chat request pays for the build. Called at ingest, next to save_sidecar().
+        """
+        if settings.search_mode != "semantic" or not self.get_product_count():
+            return
+        from app.utils.semantic_index import SemanticIndex
+
+        try:
+            index = self._semantic_index()
+            # An index updated in place by upserts is not on disk yet
+            signature = csv_signature(self.csv_path)
+            if signature and SemanticIndex.load(self.csv_path, signature, settings.semantic_dim) is None:
+                index.save(self.csv_path, signature)
+        except Exception as e:
+            print(f"Error building semantic index: {e}")
+
+    def _semantic_texts(self, positions: Optional[Iterable[int]] = None) -> Iterable[str]:
+        """Text each product is vectorized from, for all rows or the given positions"""
+        columns = [self._columns[f] for f in SEMANTIC_FIELDS if f in self._columns]
+        if positions is None:
+            positions = range(self.get_product_count())
+        for pos in positions:
+            yield " ".join(
+                value.replace('/', ' ') for value in (column[int(pos)] for column in columns)
+                if isinstance(value, str)
+            )
@@ -0,0 +1,270 @@
+import csv
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends and compaction are only coordinated within the process
+    fcntl = None
+
+from app.config import get_settings
+from app.utils.catalog_stream import open_catalog
+from app.utils.urls import canonical_url
+
+settings = get_settings()
+
+# A table file is rewritten with only its latest records once superseded lines make up
+# more than this share of it (and it has at least COMPACT_MIN_LINES lines)
+COMPACT_SUPERSEDED_SHARE = 0.5
+COMPACT_MIN_LINES = 1000
+
+PRODUCT_FIELDS = ["name", "brand", "price", "link", "image", "description", "breadcrumbs", "rating", "review_count", "reviews"]
+CATALOG_FIELDS = ["product_id"] + PRODUCT_FIELDS
+
+def csv_signature(csv_path: str) -> Optional[list]:
+    """(mtime_ns, size) of csv_path, used to detect stale derived files"""
+    try:
+        st = os.stat(csv_path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def product_id_for(row: Dict) -> str:
+    """Stable product ID: hash of the canonical product link (name/brand if there is no link)"""
+    key = canonical_url(row.get("link") or "") or f"{row.get('brand', '')}|{row.get('name', '')}".lower()
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+class _JsonlTable:
+    """
+    Append-only JSON-lines file materialized as a dict (last write wins).
+    Other processes append to the same file; each reader only parses the
+    bytes appended since its last refresh. When most lines are superseded
+    the file is compacted: rewritten with the latest record per key and
+    swapped in atomically, which readers notice by its new inode.
+    """
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self.rows: Dict[str, Dict] = {}
+        self._offset = 0
+        self._lines = 0
+        self._inode = None
+
+    def refresh(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        size = st.st_size
+        if (st.st_ino, st.st_dev) != self._inode or size < self._offset:
+            # First read, or the file was compacted, truncated or replaced; start over
+            self.rows.clear()
+            self._offset = 0
+            self._lines = 0
+            self._inode = (st.st_ino, st.st_dev)
+        if size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        # Only consume complete lines; a concurrent writer may be mid-line
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self.rows[record[self.key]] = record
+            self._lines += 1
+        self._offset += end
+
+    @contextmanager
+    def _file_lock(self):
+        # Serializes appends with compaction across processes, so no append lands in a replaced file
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, records: Iterable[Dict]):
+        payload = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        if not payload:
+            return
+        with self._file_lock():
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(payload)
+            self.refresh()
+            if self._lines >= COMPACT_MIN_LINES and self._lines - len(self.rows) > COMPACT_SUPERSEDED_SHARE * self._lines:
+                self._compact()
+
+    def _compact(self):
+        """Rewrite the file with only the latest record per key; called under _file_lock"""
+        tmp = f"{self.path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in self.rows.values())
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error compacting {self.path}: {e}")
+            return
+        self.refresh()
+
+
+class CatalogStore:
+    """
+    Cross-session product store deduplicated by canonical product link.
+    Products are stored once in products.jsonl; sources.jsonl records which
+    product IDs each scraped URL produced. Sessions reference a catalog CSV
+    built from a set of product IDs and their scrape times, so sessions with the
+    same products share one file (and one cached CSVKnowledgeBase), and a
+    re-scrape that changes products gets a file of its own.
+    """
+
+    def __init__(self, root: str, ttl_seconds: int = 24 * 3600):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        # Directories are created on first write, not when the module is imported
+        self.catalog_dir = os.path.join(root, "catalogs")
+        self._products = _JsonlTable(os.path.join(root, "products.jsonl"), "product_id")
+        self._sources = _JsonlTable(os.path.join(root, "sources.jsonl"), "url")
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, record: Optional[Dict]) -> bool:
+        return bool(record) and time.time() - record.get("scraped_at", 0) <= self.ttl_seconds
+
+    def get_product(self, link: str, fresh_only: bool = True) -> Optional[Dict]:
+        """Look up a stored product by its (non-canonical) link"""
+        with self._lock:
+            self._products.refresh()
+            record = self._products.rows.get(product_id_for({"link": link}))
+        if record is None or (fresh_only and not self._is_fresh(record)):
+            return None
+        return {field: record.get(field, "") for field in CATALOG_FIELDS}
+
+    def get_products(self, product_ids: Iterable[str]) -> List[Dict]:
+        with self._lock:
+            self._products.refresh()
+            rows = self._products.rows
+            return [
+                {field: rows[pid].get(field, "") for field in CATALOG_FIELDS}
+                for pid in product_ids if pid in rows
+            ]
+
+    def put_products(self, rows: Iterable[Dict]) -> List[str]:
+        """Upsert scraped rows; returns their product IDs in input order"""
+        now = time.time()
+        records, ids = [], []
+        for row in rows:
+            pid = product_id_for(row)
+            record = {field: row.get(field, "") or "" for field in PRODUCT_FIELDS}
+            record.update({"product_id": pid, "scraped_at": now})
+            records.append(record)
+            ids.append(pid)
+        with self._lock:
+            self._products.append(records)
+        return ids
+
+    def get_source(self, url: str) -> Optional[List[str]]:
+        """Product IDs a fresh earlier scrape of url produced, or None"""
+        with self._lock:
+            self._sources.refresh()
+            record = self._sources.rows.get(canonical_url(url))
+        if not self._is_fresh(record):
+            return None
+        return record["product_ids"]
+
+    def record_source(self, url: str, product_ids: List[str]):
+        with self._lock:
+            self._sources.append([{"url": canonical_url(url), "product_ids": product_ids, "scraped_at": time.time()}])
+
+    def catalog_file(self, product_ids: List[str]) -> str:
+        """
+        Path of the shared catalog CSV for a set of product IDs (it may not be written
+        yet). The name covers each product's scraped_at, so a re-scrape that changes
+        rows gets a new file instead of the stale one.
+        """
+        with self._lock:
+            self._products.refresh()
+            rows = self._products.rows
+            key = "\n".join(
+                f"{pid}:{rows[pid].get('scraped_at', '') if pid in rows else ''}"
+                for pid in sorted(set(product_ids))
+            )
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.catalog_dir, f"{digest}.csv")
+
+    def catalog_path(self, product_ids: List[str]) -> str:
+        """Shared catalog CSV for the current rows of a set of product IDs, written once per version"""
+        path = self.catalog_file(product_ids)
+        if not os.path.exists(path):
+            os.makedirs(self.catalog_dir, exist_ok=True)
+            tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=CATALOG_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.get_products(dict.fromkeys(product_ids)))
+            os.replace(tmp, path)
+        return path
+
+    def extend_catalog(self, base_csv: str, base_ids: List[str], product_ids: List[str]) -> str:
+        """
+        Shared catalog CSV for base_ids followed by product_ids. When base_csv is the
+        current catalog of base_ids, its bytes are copied as-is and only the products
+        it lacks are serialized and appended; otherwise the catalog is written in full.
+        """
+        merged_ids = list(dict.fromkeys(base_ids + product_ids))
+        path = self.catalog_file(merged_ids)
+        if os.path.exists(path):
+            return path
+        if os.path.abspath(base_csv) != os.path.abspath(self.catalog_file(base_ids)) or not os.path.exists(base_csv):
+            return self.catalog_path(merged_ids)
+        known = set(base_ids)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.copyfile(base_csv, tmp)
+        with open(tmp, "a", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CATALOG_FIELDS)
+            writer.writerows(self.get_products(pid for pid in merged_ids if pid not in known))
+        os.replace(tmp, path)
+        return path
+
+    def catalog_for_source(self, url: str) -> Optional[str]:
+        """Shared catalog for a URL that was already scraped, without re-scraping"""
+        product_ids = self.get_source(url)
+        if not product_ids:
+            return None
+        return self.catalog_path(product_ids)
+
+    def ingest_csv(self, url: str, csv_path: str, complete: bool = True) -> Optional[str]:
+        """
+        Move a freshly scraped CSV into the store; returns the shared catalog path.
+        A partial CSV (complete=False, e.g. from a failed scrape) contributes its committed
+        rows but is not recorded as the URL's catalog, so the URL is scraped again next time.
+        """
+        with open_catalog(csv_path) as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            return None
+        product_ids = self.put_products(rows)
+        if complete:
+            self.record_source(url, product_ids)
+        return self.catalog_path(product_ids)
+
+
+catalog_store = CatalogStore(
+    os.path.join(settings.data_dir, "store"),
+    ttl_seconds=settings.catalog_store_ttl_seconds
+)
@@ -0,0 +1,145 @@
+"""
+Catalog CSVs that are still being written.
+
+A scrape appends each product row to its CSV as soon as the row is extracted.
+Every few rows the file is flushed to disk and the byte length of its complete
+rows is committed atomically to ``<csv>.progress.json``; the marker is removed
+once the file is final. Readers of a CSV that has a marker parse only the
+committed bytes, so they never see a half-written row, and a scrape that
+crashes leaves a usable catalog of everything up to its last checkpoint.
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+PROGRESS_SUFFIX = ".progress.json"
+CHECKPOINT_ROWS = 10
+CHECKPOINT_SECONDS = 5.0
+
+def progress_path(csv_path: str) -> str:
+    """Marker holding the committed length of a catalog that is being written"""
+    return csv_path + PROGRESS_SUFFIX
+
+def read_progress(csv_path: str) -> Optional[Dict]:
+    """Checkpoint of a catalog that is still being written, or None for a finished one"""
+    try:
+        with open(progress_path(csv_path), encoding="utf-8") as f:
+            progress = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return progress if isinstance(progress.get("bytes"), int) else None
+
+def open_catalog(csv_path: str) -> TextIO:
+    """
+    Open a catalog CSV for reading: the file itself once it is finished, otherwise
+    its committed rows as an in-memory text buffer.
+    """
+    # Open before reading the marker: the marker is removed before a finished file replaces this one
+    f = open(csv_path, "rb")
+    with f:
+        progress = read_progress(csv_path)
+        if progress is not None:
+            return io.StringIO(f.read(progress["bytes"]).decode("utf-8", errors="replace"), newline="")
+    return open(csv_path, newline="", encoding="utf-8")
+
+
+class CatalogStream:
+    """
+    Append-only writer for a catalog CSV that readers may open while it grows.
+    write() is thread-safe; a checkpoint happens every checkpoint_rows rows or
+    checkpoint_seconds seconds, whichever comes first, and on close().
+    """
+
+    def __init__(self, csv_path: str, fieldnames: List[str], checkpoint_rows: int = CHECKPOINT_ROWS,
+                 checkpoint_seconds: float = CHECKPOINT_SECONDS):
+        self.csv_path = csv_path
+        self.fieldnames = fieldnames
+        self.checkpoint_rows = checkpoint_rows
+        self.checkpoint_seconds = checkpoint_seconds
+        self.rows = 0
+        self.committed_rows = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._last_checkpoint = time.monotonic()
+        # The header is swapped in atomically so a reader never sees a torn one
+        header = self._encode(None)
+        tmp = f"{csv_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            f.write(header)
+        os.replace(tmp, csv_path)
+        self._file = open(csv_path, "ab")
+        self._bytes = len(header)
+        self._commit()
+
+    def _encode(self, row: Optional[Dict]) -> bytes:
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=self.fieldnames, restval="", extrasaction="ignore")
+        if row is None:
+            writer.writeheader()
+        else:
+            writer.writerow(row)
+        return buf.getvalue().encode("utf-8")
+
+    def _commit(self):
+        progress = {
+            "bytes": self._bytes,
+            "rows": self.rows,
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+        }
+        path = progress_path(self.csv_path)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(progress, f)
+        os.replace(tmp, path)
+        self.committed_rows = self.rows
+        self._last_checkpoint = time.monotonic()
+
+    def write(self, row: Dict):
+        """Append one row; commits a checkpoint when one is due"""
+        data = self._encode(row)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(data)
+            self._bytes += len(data)
+            self.rows += 1
+            if (self.rows - self.committed_rows >= self.checkpoint_rows
+                    or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds):
+                self._checkpoint()
+
+    def _checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._commit()
+
+    def checkpoint(self):
+        """Make every row written so far visible to readers"""
+        with self._lock:
+            if self._file is not None and self.rows != self.committed_rows:
+                self._checkpoint()
+
+    def close(self, finished: bool = True):
+        """
+        Flush the file. With finished=True the marker is removed and the file is read
+        as a normal catalog; otherwise it is left committed as a partial catalog.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            self._checkpoint()
+            self._file.close()
+            self._file = None
+            if finished:
+                try:
+                    os.remove(progress_path(self.csv_path))
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"rows": self.rows, "committed_rows": self.committed_rows, "bytes": self._bytes}
@@ -0,0 +1,220 @@
+"""
+Binary columnar sidecar for scraped catalogs.
+
+Next to ``products.csv`` we write a ``products.csv.cols/`` directory holding one
+``.npy`` file per numeric column, codes plus a category list per categorical
+column, and a UTF-8 blob plus int64 byte offsets per string column. Everything
+is opened with ``mmap_mode='r'`` and used in place: a string is decoded only
+when its row is read, so several workers reading the same catalog share its
+pages through the OS page cache. A manifest records the CSV's (mtime, size) so
+a sidecar is ignored as soon as the CSV it was built from changes.
+"""
+import json
+import mmap
+import os
+import shutil
+import sys
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.catalog_store import csv_signature
+
+SIDECAR_SUFFIX = ".cols"
+SIDECAR_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+class CategoricalColumn:
+    """Row-addressable view of a categorical column (codes + categories) without expanding it per row"""
+
+    __slots__ = ('codes', 'categories')
+
+    def __init__(self, codes: np.ndarray, categories: np.ndarray):
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "CategoricalColumn":
+        return cls(series.cat.codes.to_numpy(), series.cat.categories.to_numpy(dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, pos: int):
+        code = self.codes[pos]
+        return self.categories[code] if code >= 0 else np.nan
+
+    def tolist(self) -> list:
+        return [self.categories[c] if c >= 0 else np.nan for c in self.codes.tolist()]
+
+class StringColumn:
+    """Row-addressable strings kept as one UTF-8 blob plus byte offsets; a row is decoded when it is read"""
+
+    __slots__ = ('data', 'offsets', 'valid')
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, valid: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.valid = valid
+
+    @classmethod
+    def from_values(cls, values) -> "StringColumn":
+        """Encode a sequence of strings (missing values as NaN/None) into a private column"""
+        valid = np.asarray(pd.notna(np.asarray(values, dtype=object)), dtype=bool)
+        encoded = [str(v).encode("utf-8") if ok else b"" for v, ok in zip(values, valid.tolist())]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets, valid)
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def __getitem__(self, pos: int):
+        if not self.valid[pos]:
+            return np.nan
+        return self.data[self.offsets[pos]:self.offsets[pos + 1]].tobytes().decode("utf-8")
+
+    def tolist(self) -> list:
+        """Every row decoded; the list is the caller's and is not kept"""
+        blob = self.data.tobytes()
+        bounds = self.offsets.tolist()
+        return [
+            blob[bounds[i]:bounds[i + 1]].decode("utf-8") if ok else np.nan
+            for i, ok in enumerate(self.valid.tolist())
+        ]
+
+    def to_numpy(self) -> np.ndarray:
+        return np.array(self.tolist(), dtype=object)
+
+def present_mask(column) -> np.ndarray:
+    """Boolean mask of the rows holding a non-empty value"""
+    if isinstance(column, StringColumn):
+        return np.asarray(column.valid, dtype=bool) & (np.diff(column.offsets) > 0)
+    if isinstance(column, CategoricalColumn):
+        return np.asarray(column.codes) >= 0
+    values = np.asarray(column, dtype=object)
+    return pd.notna(values) & (values != '')
+
+def _is_mapped(values) -> bool:
+    # Views of a mapped file keep it as their (possibly indirect) base
+    while values is not None:
+        if isinstance(values, (np.memmap, mmap.mmap)):
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+def column_memory(column) -> Tuple[int, int]:
+    """(private, mapped) bytes of a column; mapped pages are shared through the OS page cache"""
+    private = mapped = 0
+    if isinstance(column, StringColumn):
+        arrays = [column.data, column.offsets, column.valid]
+    elif isinstance(column, CategoricalColumn):
+        arrays = [column.codes]
+        private += column.categories.nbytes + sum(sys.getsizeof(v) for v in column.categories.tolist())
+    else:
+        arrays = [column]
+        if column.dtype == object:
+            # Strings shared between rows are counted once
+            private += sum(sys.getsizeof(v) for v in {id(v): v for v in column.tolist()}.values())
+    for values in arrays:
+        if _is_mapped(values):
+            mapped += int(values.nbytes)
+        else:
+            private += int(values.nbytes)
+    return private, mapped
+
+def sidecar_path(csv_path: str) -> str:
+    """Directory holding the columnar sidecar for csv_path"""
+    return csv_path + SIDECAR_SUFFIX
+
+def _safe_name(column: str) -> str:
+    return "".join(c if c.isalnum() or c in "_-" else "_" for c in column)
+
+def _save_strings(directory: str, stem: str, column: StringColumn):
+    np.save(os.path.join(directory, f"{stem}.data.npy"), column.data)
+    np.save(os.path.join(directory, f"{stem}.offsets.npy"), column.offsets)
+    np.save(os.path.join(directory, f"{stem}.valid.npy"), column.valid)
+
+def write_sidecar(columns: Dict[str, object], csv_path: str) -> Optional[str]:
+    """Write a catalog's row-addressable columns as a columnar sidecar for csv_path; returns the sidecar directory"""
+    signature = csv_signature(csv_path)
+    if signature is None:
+        return None
+
+    target = sidecar_path(csv_path)
+    tmp = f"{target}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    entries = []
+    rows = 0
+    for i, (name, values) in enumerate(columns.items()):
+        stem = f"{i:02d}_{_safe_name(name)}"
+        rows = len(values)
+        if isinstance(values, CategoricalColumn):
+            np.save(os.path.join(tmp, f"{stem}.codes.npy"), values.codes)
+            _save_strings(tmp, f"{stem}.categories", StringColumn.from_values(values.categories))
+            entries.append({"name": name, "kind": "category", "stem": stem})
+        elif isinstance(values, StringColumn) or values.dtype.kind not in "biuf":
+            if not isinstance(values, StringColumn):
+                values = StringColumn.from_values(values)
+            _save_strings(tmp, stem, values)
+            entries.append({"name": name, "kind": "str", "stem": stem})
+        else:
+            if values.dtype.kind != "f":
+                values = values.astype(np.float64)
+            # Keep the in-memory float width so the mapped array is used as-is
+            np.save(os.path.join(tmp, f"{stem}.values.npy"), values)
+            entries.append({"name": name, "kind": "float", "stem": stem})
+
+    manifest = {
+        "version": SIDECAR_VERSION,
+        "rows": rows,
+        "csv_signature": signature,
+        "columns": entries,
+    }
+    # The manifest is written last: a sidecar without one is never read
+    with open(os.path.join(tmp, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+    return target
+
+def read_sidecar(csv_path: str) -> Optional[Dict[str, object]]:
+    """
+    Map the sidecar for csv_path, or None if missing or stale. Returns the columns in
+    catalog order: float arrays, CategoricalColumn (mapped codes) and StringColumn.
+    Only category lists are decoded up front.
+    """
+    target = sidecar_path(csv_path)
+    try:
+        with open(os.path.join(target, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != SIDECAR_VERSION or manifest.get("csv_signature") != csv_signature(csv_path):
+        return None
+
+    def load(name: str) -> np.ndarray:
+        return np.load(os.path.join(target, name), mmap_mode="r")
+
+    def strings(stem: str) -> StringColumn:
+        return StringColumn(load(f"{stem}.data.npy"), load(f"{stem}.offsets.npy"), load(f"{stem}.valid.npy"))
+
+    columns = {}
+    for column in manifest["columns"]:
+        stem = column["stem"]
+        if column["kind"] == "float":
+            values = load(f"{stem}.values.npy")
+        elif column["kind"] == "category":
+            categories = np.array(strings(f"{stem}.categories").tolist(), dtype=object)
+            values = CategoricalColumn(load(f"{stem}.codes.npy"), categories)
+        else:
+            values = strings(stem)
+        if len(values) != manifest["rows"]:
+            return None
+        columns[column["name"]] = values
+    return columns
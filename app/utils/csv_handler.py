@@ -1,65 +1,466 @@
+import numpy as np
 import pandas as pd
 import os
-from typing import List, Dict, Optional
+import threading
+from collections.abc import Sequence
+from dataclasses import replace
+from typing import List, Dict, Iterable, Optional, Tuple
 from app.config import get_settings
+from app.utils.catalog_search import COMMON_CATEGORY_SHARE, CatalogSearchMixin
+from app.utils.catalog_store import product_id_for
+from app.utils.catalog_stream import open_catalog, read_progress
+from app.utils.columnar import CategoricalColumn, StringColumn, column_memory, present_mask, read_sidecar, write_sidecar
+from app.utils.facets import FACET_COLUMNS, CatalogFacets, FacetCounts
+from app.utils.parsing import NUMERIC_COLUMNS, product_field
+from app.utils.prompt_snippets import SnippetCache
+from app.utils.query_parser import ProductQuery
+from app.utils.semantic_index import SemanticIndex
+from app.utils.text_index import InvertedIndex, TrigramIndex, tokenize
 
 settings = get_settings()
 
-class CSVKnowledgeBase:
+def _parse_column(series: pd.Series, parser) -> pd.Series:
+    """Apply a scalar parser once per distinct value and map back to the column"""
+    uniques = series.dropna().unique()
+    lookup = {v: parser(v) for v in uniques}
+    return series.map(lookup).astype(float)
+
+def _add_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    for derived, source, parser in NUMERIC_COLUMNS:
+        if source in df.columns:
+            df[derived] = _parse_column(df[source], parser)
+        else:
+            df[derived] = pd.Series(float('nan'), index=df.index, dtype=float)
+    return df
+
+# Text columns that repeat heavily across rows and are stored as pandas categoricals
+CATEGORICAL_COLUMNS = ('brand', 'breadcrumbs')
+# Other text columns become categorical when at most this share of values is distinct
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+class ProductResults(Sequence):
+    """
+    Lazy, ordered view over selected catalog rows.
+    Holds only row positions into the catalog's column arrays; a row becomes a
+    dict only when it is indexed or iterated, so slicing to the few products
+    that go into a prompt never materializes the rest.
+    """
+    
+    def __init__(self, columns: Dict[str, np.ndarray], positions: Iterable[int]):
+        self._columns = columns
+        self._positions = np.asarray(positions, dtype=np.int64)
+    
+    def __len__(self) -> int:
+        return len(self._positions)
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return ProductResults(self._columns, self._positions[key])
+        return self._row(int(self._positions[key]))
+    
+    def __iter__(self):
+        for pos in self._positions.tolist():
+            yield self._row(pos)
+    
+    def __repr__(self) -> str:
+        return f"ProductResults({len(self)} rows)"
+    
+    @property
+    def positions(self) -> np.ndarray:
+        """Row positions into the catalog, in result order"""
+        return self._positions
+    
+    def _row(self, pos: int) -> Dict:
+        return {name: values[pos] for name, values in self._columns.items()}
+    
+    def to_list(self) -> List[Dict]:
+        """Materialize every row in the view as a dict"""
+        return list(self)
+
+class CSVKnowledgeBase(CatalogSearchMixin):
     def __init__(self, csv_path: str):
         self.csv_path = csv_path
         self.df = None
+        self.index = InvertedIndex()
+        self.trigrams = TrigramIndex()
+        self._columns: Dict[str, np.ndarray] = {}
+        self._semantic: Optional[SemanticIndex] = None
+        self._semantic_lock = threading.Lock()
+        self._brand_codes = np.zeros(0, dtype=np.int32)
+        self._brand_lookup: Dict[str, Tuple[str, int]] = {}
+        self._category_rows: Dict[str, np.ndarray] = {}
+        self._common_category_rows: Dict[str, np.ndarray] = {}
+        self._brand_next = 0
+        self._facet_counts = FacetCounts()
+        self.facets: Optional[CatalogFacets] = None
+        self.snippets = SnippetCache()
         if os.path.exists(csv_path):
             self.load_csv()
     
     def load_csv(self):
-        """Load CSV into memory"""
+        """Load the catalog into memory, preferring the memory-mapped columnar sidecar"""
         try:
-            self.df = pd.read_csv(self.csv_path)
-            
-            # Convert all columns to string to avoid .str accessor errors
-            for col in self.df.columns:
-                self.df[col] = self.df[col].astype(str)
-            
+            columns = read_sidecar(self.csv_path) if settings.catalog_sidecar_enabled else None
+            if columns is not None:
+                # Mapped columns are used in place; only the numeric ones also back the frame
+                self._columns = columns
+                self.df = pd.DataFrame(
+                    {col: values for col, values in columns.items() if isinstance(values, np.ndarray)}, copy=False
+                )
+            else:
+                self.df = self._read_csv()
+                self._compact_dtypes()
+                self._build_columns()
+            self._semantic = None
+            self._build_index()
+            self._build_filters()
+            self._facet_counts = FacetCounts.from_columns(self._facet_columns(), len(self.df))
+            self.facets = self._facet_counts.snapshot()
+            self._render_snippets()
             return True
         except Exception as e:
             print(f"Error loading CSV: {e}")
             return False
     
-    def search_products(self, query: str) -> List[Dict]:
-        """Search products based on query - now searches in more fields"""
+    def _read_csv(self) -> pd.DataFrame:
+        """Parse the CSV text and derive the typed numeric columns"""
+        # Empty cells stay real missing values (NaN) instead of the string 'nan';
+        # a catalog still being scraped is read up to its last checkpoint
+        with open_catalog(self.csv_path) as f:
+            self.df = pd.read_csv(f, dtype=str, keep_default_na=False, na_values=['', 'nan', 'NaN', 'None'])
+        
+        # Typed numeric columns are derived once here; query methods only read them
+        return _add_numeric_columns(self.df)
+    
+    def _compact_dtypes(self):
+        """Store repetitive text as categoricals and numeric columns as float32"""
+        n = len(self.df)
+        for col in self.df.columns:
+            series = self.df[col]
+            if col.endswith('_numeric'):
+                if series.dtype != np.float32:
+                    self.df[col] = series.astype(np.float32)
+            elif not isinstance(series.dtype, pd.CategoricalDtype):
+                if col in CATEGORICAL_COLUMNS or series.nunique(dropna=True) <= CATEGORICAL_MAX_UNIQUE_RATIO * n:
+                    self.df[col] = series.astype('category')
+                else:
+                    self.df[col] = series.astype(object)
+    
+    def _build_columns(self):
+        self._columns = {
+            col: CategoricalColumn.from_series(self.df[col]) if isinstance(self.df[col].dtype, pd.CategoricalDtype) else self.df[col].to_numpy()
+            for col in self.df.columns
+        }
+    
+    def memory_usage(self) -> Dict:
+        """
+        Resident bytes of the loaded catalog: per column, per index structure and in total.
+        Columns mapped from the sidecar are reported as mapped_bytes and not counted in the
+        total, since their pages live in the OS page cache and are shared between workers.
+        """
+        if self.df is None:
+            return {"rows": 0, "total_bytes": 0, "mapped_bytes": 0, "bytes_per_row": 0, "columns": {}, "indexes": {}}
+        per_column, mapped = {}, 0
+        for col, values in self._columns.items():
+            private, shared = column_memory(values)
+            per_column[col] = private
+            mapped += shared
+        indexes = self._index_memory()
+        total = sum(per_column.values()) + sum(indexes.values())
+        return {
+            "rows": len(self.df),
+            "total_bytes": total,
+            "mapped_bytes": mapped,
+            "bytes_per_row": round(total / len(self.df), 1) if len(self.df) else 0,
+            "columns": per_column,
+            "indexes": indexes
+        }
+    
+    def save_sidecar(self) -> Optional[str]:
+        """Write the loaded catalog as a columnar sidecar next to the CSV"""
+        if self.df is None or not settings.catalog_sidecar_enabled or read_progress(self.csv_path) is not None:
+            return None
+        try:
+            return write_sidecar(self._columns, self.csv_path)
+        except Exception as e:
+            print(f"Error writing catalog sidecar: {e}")
+            return None
+    
+    def _build_index(self):
+        """Build the inverted token index over the searchable text fields"""
+        self.index = InvertedIndex()
+        self.trigrams = TrigramIndex()
+        fields = [f for f in self.index.field_weights if f in self._columns]
+        columns = [self._columns[f].tolist() for f in fields]
+        for row_id, values in enumerate(zip(*columns)):
+            self._index_row(row_id, dict(zip(fields, values)))
+    
+    def product_ids(self) -> List[str]:
+        """Shared-store product ID of every row, in row order"""
+        if self.df is None:
+            return []
+        if 'product_id' in self._columns:
+            return [str(v) for v in self._columns['product_id'].tolist()]
+        return [
+            product_id_for({key: product_field(row, key, '') for key in ('link', 'brand', 'name')})
+            for row in self.get_all_products()
+        ]
+    
+    def copy(self, csv_path: Optional[str] = None) -> "CSVKnowledgeBase":
+        """
+        Independent copy of the loaded catalog that can be upserted into without touching this one.
+        The columns are shared (upserts build new ones) and index postings are copied on write.
+        """
+        other = CSVKnowledgeBase.__new__(CSVKnowledgeBase)
+        other.__dict__.update(self.__dict__)
+        other.csv_path = csv_path or self.csv_path
+        other.index = self.index.copy()
+        other.trigrams = self.trigrams.copy()
+        other._facet_counts = self._facet_counts.copy()
+        other._semantic_lock = threading.Lock()
+        other.snippets = self.snippets.copy()
+        return other
+    
+    def upsert_rows(self, rows: Iterable[Dict]) -> Tuple[int, int]:
+        """
+        Insert or replace products keyed by product ID. Only the changed rows are parsed,
+        tokenized and counted: index postings, brand codes, category rows and facet counts
+        are updated with deltas, and columns keep their dtypes (new categories are appended).
+        Each column array is still copied once to make room for the new rows, so columns
+        mapped from the sidecar become private to this catalog.
+        Returns (updated, added).
+        """
+        if self.df is None:
+            return 0, 0
+        
+        n = len(self.df)
+        ids = self.product_ids()
+        columns = self._columns
+        if 'product_id' not in columns:
+            columns = {'product_id': np.array(ids, dtype=object), **columns}
+        position = {pid: pos for pos, pid in enumerate(ids)}
+        changed: Dict[int, Dict] = {}
+        next_pos = n
+        for row in rows:
+            pid = row.get('product_id') or product_id_for(row)
+            if pid not in position:
+                position[pid] = next_pos
+                next_pos += 1
+            changed[position[pid]] = dict(row, product_id=pid)
+        if not changed:
+            return 0, 0
+        
+        # Only the changed rows are parsed; existing rows keep their derived values
+        text_columns = [c for c in columns if not c.endswith('_numeric')]
+        frame = pd.DataFrame(list(changed.values()), columns=text_columns)
+        frame = _add_numeric_columns(frame.where(frame.notna() & frame.ne(''), np.nan))
+        positions = np.fromiter(changed, dtype=np.int64, count=len(changed))
+        updated = positions < n
+        
+        # Values the replaced rows contributed to the trigram vocabulary, filters and facets
+        delta_columns = [c for c in dict.fromkeys(('name', 'brand') + FACET_COLUMNS) if c in self._columns]
+        old_rows = {
+            pos: {c: self._columns[c][pos] for c in delta_columns}
+            for pos in positions[updated].tolist()
+        }
+        
+        data = {}
+        for col, existing in columns.items():
+            incoming = frame[col]
+            if isinstance(existing, CategoricalColumn):
+                # Extend the categories instead of re-encoding the column
+                categories = pd.Index(existing.categories)
+                new = pd.Index(incoming.dropna().unique()).difference(categories)
+                if len(new):
+                    categories = categories.append(new)
+                incoming_codes = categories.get_indexer(incoming)
+                codes = np.concatenate([np.asarray(existing.codes, dtype=np.int32), incoming_codes[~updated]])
+                codes[positions[updated]] = incoming_codes[updated]
+                data[col] = pd.Categorical.from_codes(codes, categories=categories)
+            else:
+                dtype = np.float32 if col.endswith('_numeric') else object
+                incoming = incoming.to_numpy(dtype=dtype)
+                current = existing.to_numpy() if isinstance(existing, StringColumn) else np.asarray(existing, dtype=dtype)
+                values = np.concatenate([current, incoming[~updated]])
+                values[positions[updated]] = incoming[updated]
+                data[col] = values
+        self.df = pd.DataFrame(data)
+        self._build_columns()
+        
+        fields = [f for f in self.index.field_weights if f in self._columns]
+        for row_id in positions.tolist():
+            self._index_row(row_id, {f: self._columns[f][row_id] for f in fields}, old_rows.get(row_id))
+        if self._semantic is not None:
+            texts = dict(zip(positions.tolist(), self._semantic_texts(positions)))
+            self._semantic = self._semantic.updated(texts, len(self.df))
+        self.snippets.invalidate(positions.tolist())
+        
+        new_rows = {
+            pos: {c: self._columns[c][pos] for c in delta_columns}
+            for pos in positions.tolist()
+        }
+        self._update_filters(old_rows, new_rows)
+        for pos, row in new_rows.items():
+            if pos in old_rows:
+                self._facet_counts.remove(old_rows[pos])
+            self._facet_counts.add(row)
+        self._facet_counts.count = len(self.df)
+        self.facets = self._facet_counts.snapshot()
+        return int(updated.sum()), int((~updated).sum())
+    
+    def _build_filters(self):
+        """Precompute brand codes and breadcrumb-token postings for structured filters"""
+        n = len(self.df)
+        if 'brand' in self._columns:
+            brands = pd.Series(self._columns['brand'].tolist(), dtype=object)
+            keys = brands.where(brands.notna(), '').astype(str).str.strip()
+            codes, uniques = pd.factorize(keys.str.lower())
+            self._brand_codes = codes.astype(np.int32)
+            display = dict(zip(codes.tolist(), keys.tolist()))
+            self._brand_lookup = {name: (display[code], code) for code, name in enumerate(uniques) if name}
+            self._brand_next = len(uniques)
+        else:
+            self._brand_codes = np.full(n, -1, dtype=np.int32)
+            self._brand_lookup = {}
+            self._brand_next = 0
+        
+        # Breadcrumbs are categorical: tokenize each distinct path once, then map codes to rows
+        self._category_rows = {}
+        self._common_category_rows = {}
+        crumbs = self._columns.get('breadcrumbs')
+        if isinstance(crumbs, CategoricalColumn):
+            token_codes: Dict[str, List[int]] = {}
+            for code, path in enumerate(crumbs.categories.tolist()):
+                for token in set(tokenize(path)):
+                    token_codes.setdefault(token, []).append(code)
+            for token, codes in token_codes.items():
+                rows = np.flatnonzero(np.isin(crumbs.codes, codes))
+                # Root crumbs like "Home" that cover (nearly) every row don't narrow anything
+                if len(rows) < COMMON_CATEGORY_SHARE * n:
+                    self._category_rows[token] = rows
+                else:
+                    self._common_category_rows[token] = rows
+    
+    def _update_filters(self, old_rows: Dict[int, Dict], new_rows: Dict[int, Dict]):
+        """Apply upserted rows to the brand codes and category postings built by _build_filters"""
+        n = len(self.df)
+        codes = np.concatenate([self._brand_codes, np.full(n - len(self._brand_codes), -1, dtype=np.int32)])
+        if 'brand' in self._columns:
+            lookup = dict(self._brand_lookup)
+            for pos, row in new_rows.items():
+                brand = row.get('brand')
+                display = brand.strip() if isinstance(brand, str) else ''
+                name = display.lower()
+                if not name:
+                    codes[pos] = -1
+                    continue
+                if name not in lookup:
+                    lookup[name] = (display, self._brand_next)
+                    self._brand_next += 1
+                codes[pos] = lookup[name][1]
+            self._brand_lookup = lookup
+        self._brand_codes = codes
+        
+        if not isinstance(self._columns.get('breadcrumbs'), CategoricalColumn):
+            return
+        delta = self._category_changes(
+            (pos, old_rows.get(pos, {}).get('breadcrumbs'), row.get('breadcrumbs'))
+            for pos, row in new_rows.items()
+        )
+        category_rows, common_rows = dict(self._category_rows), dict(self._common_category_rows)
+        empty = np.zeros(0, dtype=np.int64)
+        for token, (removed, added) in delta.items():
+            rows = category_rows.pop(token, None)
+            if rows is None:
+                rows = common_rows.pop(token, empty)
+            if removed:
+                rows = np.setdiff1d(rows, removed, assume_unique=True)
+            if added:
+                rows = np.union1d(rows, added)
+            if len(rows):
+                category_rows[token] = rows
+        # Growth can bring a root crumb below the threshold, and a delta can push a token over it
+        for token, rows in list(common_rows.items()) + list(category_rows.items()):
+            target = category_rows if len(rows) < COMMON_CATEGORY_SHARE * n else common_rows
+            other = common_rows if target is category_rows else category_rows
+            other.pop(token, None)
+            target[token] = rows
+        self._category_rows, self._common_category_rows = category_rows, common_rows
+    
+    def filter_products(self, query: ProductQuery, top_k: int = 10) -> Sequence:
+        """Answer a compound query with one combined boolean mask over precomputed columns"""
         if self.df is None or self.df.empty:
             return []
         
         try:
-            query_lower = query.lower()
-            results = []
-            
-            # Search in name, brand, description, and reviews (new!)
-            mask = (
-                self.df['name'].str.lower().str.contains(query_lower, na=False, regex=False) |
-                self.df['brand'].str.lower().str.contains(query_lower, na=False, regex=False) |
-                self.df['description'].str.lower().str.contains(query_lower, na=False, regex=False) |
-                self.df.get('breadcrumbs', pd.Series(dtype=str)).str.lower().str.contains(query_lower, na=False, regex=False)
-            )
+            n = len(self.df)
+            mask = np.ones(n, dtype=bool)
+            prices = self._columns['price_numeric']
+            ratings = self._columns['rating_numeric']
             
-            filtered_df = self.df[mask]
+            # NaN compares False, so rows without a value drop out of bounded filters
+            if query.min_price is not None:
+                mask &= prices >= query.min_price
+            if query.max_price is not None:
+                mask &= prices <= query.max_price
+            if query.min_rating is not None:
+                mask &= ratings >= query.min_rating
+            if query.brands:
+                codes = [self._brand_lookup[b.lower()][1] for b in query.brands if b.lower() in self._brand_lookup]
+                mask &= np.isin(self._brand_codes, codes)
+            for category in query.categories:
+                in_category = np.zeros(n, dtype=bool)
+                in_category[self._category_rows.get(category, [])] = True
+                mask &= in_category
+            if query.with_reviews:
+                if 'reviews' not in self._columns:
+                    return []
+                mask &= present_mask(self._columns['reviews'])
             
-            for _, row in filtered_df.iterrows():
-                results.append(row.to_dict())
+            # Remaining free-text terms rank within the filtered rows; with a sort they only select rows
+            positions = None
+            if query.terms:
+                ranked = self.index.score_tokens(query.terms, top_k=n if query.sort else top_k, allowed=mask)
+                if ranked and not query.sort:
+                    return self._results([row_id for row_id, _ in ranked])
+                if ranked:
+                    positions = np.array([row_id for row_id, _ in ranked], dtype=np.int64)
             
-            return results
+            if positions is None:
+                positions = np.flatnonzero(mask)
+                if not len(positions) and query.categories:
+                    # The category word may only appear in names/descriptions; retry it as search text
+                    relaxed = replace(query, categories=[], terms=query.terms + query.categories)
+                    return self.filter_products(relaxed, top_k=top_k)
             
+            # Cheapest first for a price sort, otherwise best rated first; rows without the value last
+            if query.sort == 'price':
+                keys = -np.nan_to_num(prices[positions].astype(np.float64), nan=np.inf)
+            else:
+                keys = np.nan_to_num(ratings[positions], nan=-1.0)
+            if len(positions) > top_k:
+                top = np.argpartition(-keys, top_k - 1)[:top_k]
+                positions, keys = positions[top], keys[top]
+            return self._results(positions[np.argsort(-keys, kind='stable')])
         except Exception as e:
-            print(f"Error searching products: {e}")
-            # If search fails, return all products as fallback
-            return self.get_all_products()
+            print(f"Error filtering products: {e}")
+            return []
     
-    def get_all_products(self) -> List[Dict]:
+    def _results(self, positions: Iterable[int]) -> ProductResults:
+        return ProductResults(self._columns, positions)
+    
+    def _facet_columns(self) -> Dict[str, list]:
+        return {col: self._columns[col].tolist() for col in FACET_COLUMNS if col in self._columns}
+    
+    def get_all_products(self) -> Sequence:
         """Get all products"""
         if self.df is None or self.df.empty:
             return []
-        return self.df.to_dict('records')
+        return self._results(np.arange(len(self.df)))
+    
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded catalog in bytes"""
+        return self.memory_usage()["total_bytes"]
     
     def get_product_count(self) -> int:
         """Get total product count"""
@@ -70,95 +471,65 @@ class CSVKnowledgeBase:
         if self.df is None or self.df.empty:
             return "No products available."
         
-        count = len(self.df)
-        
-        # Get unique brands (filter out 'nan' strings)
-        brands = self.df['brand'].unique()
-        brands = [b for b in brands if b != 'nan' and b != 'None' and str(b).strip()]
-        
-        # Check if we have ratings
-        has_ratings = 'rating' in self.df.columns and self.df['rating'].notna().any()
-        has_reviews = 'reviews' in self.df.columns and self.df['reviews'].notna().any()
-        
-        summary = f"We have {count} products available"
-        if len(brands) > 0:
-            summary += f" from brands including: {', '.join(brands[:5])}"
-            if len(brands) > 5:
-                summary += f" and {len(brands) - 5} more"
-        
-        if has_ratings:
-            summary += ". Products include ratings and reviews."
-        
-        return summary
+        return self.facets.summary
     
-    def get_products_by_price_range(self, min_price: float = 0, max_price: float = float('inf')) -> List[Dict]:
+    def get_products_by_price_range(self, min_price: float = 0, max_price: float = float('inf')) -> Sequence:
         """Get products within a price range"""
         if self.df is None or self.df.empty:
             return []
         
         try:
-            # Extract numeric price from price column
-            self.df['price_numeric'] = self.df['price'].str.extract(r'(\d+)').astype(float)
-            
-            mask = (self.df['price_numeric'] >= min_price) & (self.df['price_numeric'] <= max_price)
-            filtered_df = self.df[mask].sort_values('price_numeric')
+            prices = self._columns['price_numeric']
+            positions = np.flatnonzero((prices >= min_price) & (prices <= max_price))
+            positions = positions[np.argsort(prices[positions], kind='stable')]
             
-            return filtered_df.to_dict('records')
+            return self._results(positions)
         except Exception as e:
             print(f"Error filtering by price: {e}")
             return []
     
-    def get_best_value_products(self, top_n: int = 10) -> List[Dict]:
+    def get_best_value_products(self, top_n: int = 10) -> Sequence:
         """Get products sorted by price (ascending) - best value"""
         if self.df is None or self.df.empty:
             return []
         
         try:
-            # Extract numeric price
-            self.df['price_numeric'] = self.df['price'].str.extract(r'(\d+)').astype(float)
+            # Partial selection of the N cheapest priced rows (O(n)); nsmallest alone pads with unpriced ones
+            cheapest = self.df['price_numeric'].dropna().nsmallest(top_n)
             
-            # Sort by price and get top N cheapest
-            sorted_df = self.df.dropna(subset=['price_numeric']).sort_values('price_numeric').head(top_n)
-            
-            return sorted_df.to_dict('records')
+            return self._results(cheapest.index)
         except Exception as e:
             print(f"Error getting best value products: {e}")
             return []
     
-    def get_top_rated_products(self, top_n: int = 10) -> List[Dict]:
+    def get_top_rated_products(self, top_n: int = 10) -> Sequence:
         """Get products sorted by rating (descending) - NEW"""
         if self.df is None or self.df.empty:
             return []
         
-        if 'rating' not in self.df.columns:
+        if 'rating' not in self._columns:
             return []
         
         try:
-            # Extract numeric rating (format: "4.5/5")
-            self.df['rating_numeric'] = self.df['rating'].str.extract(r'(\d+(?:\.\d+)?)').astype(float)
-            
-            # Sort by rating and get top N
-            sorted_df = self.df.dropna(subset=['rating_numeric']).sort_values('rating_numeric', ascending=False).head(top_n)
+            # Partial selection of the N highest rated (O(n)); nlargest alone pads with unrated rows
+            top_rated = self.df['rating_numeric'].dropna().nlargest(top_n)
             
-            return sorted_df.to_dict('records')
+            return self._results(top_rated.index)
         except Exception as e:
             print(f"Error getting top rated products: {e}")
             return []
     
-    def get_products_with_reviews(self, min_reviews: int = 1) -> List[Dict]:
+    def get_products_with_reviews(self, min_reviews: int = 1) -> Sequence:
         """Get products that have reviews - NEW"""
         if self.df is None or self.df.empty:
             return []
         
-        if 'reviews' not in self.df.columns:
+        if 'reviews' not in self._columns:
             return []
         
         try:
             # Filter products that have non-empty reviews
-            mask = (self.df['reviews'] != 'nan') & (self.df['reviews'] != '') & self.df['reviews'].notna()
-            filtered_df = self.df[mask]
-            
-            return filtered_df.to_dict('records')
+            return self._results(np.flatnonzero(present_mask(self._columns['reviews'])))
         except Exception as e:
             print(f"Error getting products with reviews: {e}")
             return []
@@ -0,0 +1,212 @@
+import bisect
+import math
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.utils.parsing import is_missing
+
+PRICE_QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+# Columns build_facets reads; either knowledge-base backend passes them as plain sequences
+FACET_COLUMNS = ("brand", "breadcrumbs", "price_numeric", "rating_numeric", "reviews", "review_count_numeric")
+
+
+@dataclass(frozen=True)
+class CatalogFacets:
+    """
+    Immutable facet snapshot of one catalog version.
+    Computed once when the catalog loads; the summary text and the
+    /catalog/{session_id}/facets endpoint both read it as-is.
+    """
+    product_count: int
+    brand_counts: Tuple[Tuple[str, int], ...]
+    category_tree: Tuple[Dict, ...]
+    price_quantiles: Tuple[Tuple[float, float], ...]
+    rating_distribution: Tuple[Tuple[int, int], ...]
+    unrated_count: int
+    mean_rating: Optional[float]
+    reviewed_count: int
+    total_review_count: int
+    summary: str
+
+    @property
+    def brands(self) -> List[str]:
+        return [brand for brand, _ in self.brand_counts]
+
+    @property
+    def review_coverage(self) -> float:
+        return self.reviewed_count / self.product_count if self.product_count else 0.0
+
+    @cached_property
+    def as_dict(self) -> Dict:
+        """JSON-ready view, built on first access and reused afterwards"""
+        return {
+            "product_count": self.product_count,
+            "brands": [{"brand": b, "count": c} for b, c in self.brand_counts],
+            "categories": list(self.category_tree),
+            "price_quantiles": {f"p{int(q * 100)}": v for q, v in self.price_quantiles},
+            "ratings": {
+                "distribution": {f"{stars}": count for stars, count in self.rating_distribution},
+                "unrated": self.unrated_count,
+                "mean": self.mean_rating,
+            },
+            "reviews": {
+                "products_with_reviews": self.reviewed_count,
+                "coverage": round(self.review_coverage, 4),
+                "total_review_count": self.total_review_count,
+            },
+            "summary": self.summary,
+        }
+
+
+def _category_tree(path_counts: Mapping[str, int]) -> Tuple[Dict, ...]:
+    """Nested {name, count, children} nodes from "A/B/C" breadcrumb path counts"""
+    root: Dict[str, Dict] = {}
+    for path, count in Counter(path_counts).most_common():
+        if count <= 0:
+            continue
+        level = root
+        for part in (p.strip() for p in str(path).split("/")):
+            if not part:
+                continue
+            node = level.setdefault(part, {"count": 0, "children": {}})
+            node["count"] += int(count)
+            level = node["children"]
+
+    def freeze(level: Dict[str, Dict]) -> Tuple[Dict, ...]:
+        ordered = sorted(level.items(), key=lambda item: (-item[1]["count"], item[0]))
+        return tuple(
+            {"name": name, "count": node["count"], "children": list(freeze(node["children"]))}
+            for name, node in ordered
+        )
+
+    return freeze(root)
+
+def _quantile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated quantile of an ascending list (numpy's default method)"""
+    position = q * (len(ordered) - 1)
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def _summary(count: int, brands: List[str], has_ratings: bool) -> str:
+    summary = f"We have {count} products available"
+    if len(brands) > 0:
+        summary += f" from brands including: {', '.join(brands[:5])}"
+        if len(brands) > 5:
+            summary += f" and {len(brands) - 5} more"
+
+    if has_ratings:
+        summary += ". Products include ratings and reviews."
+
+    return summary
+
+class FacetCounts:
+    """
+    Running aggregates behind a CatalogFacets snapshot.
+    An upsert removes the replaced rows and adds the new ones, so a new snapshot
+    costs the changed rows plus the distinct brands and paths, not a catalog scan.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.brands: Counter = Counter()
+        self.paths: Counter = Counter()
+        self.prices: List[float] = []     # ascending
+        self.stars: Counter = Counter()
+        self.rated = 0
+        self.rating_sum = 0.0
+        self.reviewed = 0
+        self.review_total = 0.0
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, Sequence], count: int) -> "FacetCounts":
+        """Aggregate whole FACET_COLUMNS at once (missing values may be None or NaN)"""
+        def present(name: str) -> List:
+            return [v for v in columns.get(name, ()) if not is_missing(v)]
+
+        counts = cls()
+        counts.count = count
+        counts.brands = Counter(present("brand"))
+        counts.paths = Counter(present("breadcrumbs"))
+        counts.prices = sorted(float(v) for v in present("price_numeric"))
+        rated = [float(v) for v in present("rating_numeric")]
+        counts.stars = Counter(min(max(math.floor(r), 0), 5) for r in rated)
+        counts.rated = len(rated)
+        counts.rating_sum = sum(rated)
+        counts.reviewed = len(present("reviews"))
+        counts.review_total = sum(float(v) for v in present("review_count_numeric"))
+        return counts
+
+    def copy(self) -> "FacetCounts":
+        other = FacetCounts.__new__(FacetCounts)
+        other.__dict__.update(self.__dict__)
+        other.brands, other.paths, other.stars = Counter(self.brands), Counter(self.paths), Counter(self.stars)
+        other.prices = list(self.prices)
+        return other
+
+    def add(self, row: Mapping, sign: int = 1):
+        """Count one row's FACET_COLUMNS values; sign=-1 takes a row back out"""
+        value = row.get("brand")
+        if not is_missing(value):
+            self.brands[value] += sign
+        value = row.get("breadcrumbs")
+        if not is_missing(value):
+            self.paths[value] += sign
+        value = row.get("price_numeric")
+        if not is_missing(value):
+            if sign > 0:
+                bisect.insort(self.prices, float(value))
+            else:
+                i = bisect.bisect_left(self.prices, float(value))
+                if i < len(self.prices) and self.prices[i] == float(value):
+                    del self.prices[i]
+        value = row.get("rating_numeric")
+        if not is_missing(value):
+            self.stars[min(max(math.floor(float(value)), 0), 5)] += sign
+            self.rated += sign
+            self.rating_sum += sign * float(value)
+        if not is_missing(row.get("reviews")):
+            self.reviewed += sign
+        value = row.get("review_count_numeric")
+        if not is_missing(value):
+            self.review_total += sign * float(value)
+
+    def remove(self, row: Mapping):
+        self.add(row, sign=-1)
+
+    def memory_bytes(self) -> int:
+        """Approximate resident bytes; brand and path keys are the catalog's own strings"""
+        return (sum(sys.getsizeof(c) for c in (self.brands, self.paths, self.stars, self.prices))
+                + sys.getsizeof(0.5) * len(self.prices))
+
+    def snapshot(self) -> CatalogFacets:
+        brand_counts = tuple(
+            (str(b), c) for b, c in self.brands.most_common()
+            if c > 0 and str(b).strip()
+        )
+        price_quantiles = tuple(
+            (q, round(_quantile(self.prices, q), 2)) for q in PRICE_QUANTILES
+        ) if self.prices else ()
+        rating_distribution = tuple((s, self.stars.get(s, 0)) for s in range(5, 0, -1))
+
+        brand_names = [b for b, _ in brand_counts]
+        return CatalogFacets(
+            product_count=self.count,
+            brand_counts=brand_counts,
+            category_tree=_category_tree(self.paths),
+            price_quantiles=price_quantiles,
+            rating_distribution=rating_distribution,
+            unrated_count=self.count - self.rated,
+            mean_rating=round(self.rating_sum / self.rated, 2) if self.rated else None,
+            reviewed_count=self.reviewed,
+            total_review_count=int(round(self.review_total)),
+            summary=_summary(self.count, brand_names, self.rated > 0),
+        )
+
+
+def build_facets(columns: Mapping[str, Sequence], count: int) -> CatalogFacets:
+    """Compute the facet snapshot from a catalog's FACET_COLUMNS (missing values may be None or NaN)"""
+    return FacetCounts.from_columns(columns, count).snapshot()
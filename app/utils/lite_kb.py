@@ -0,0 +1,453 @@
+"""
+Pandas-free knowledge base for small catalogs.
+
+Scraped catalogs are usually tens to a few thousand rows of ten string fields,
+where a DataFrame costs more in import time and per-process memory than it
+saves. LiteKnowledgeBase keeps one Python list per text column (repeated
+strings such as brands and breadcrumbs share a single object) and an
+``array('d')`` per numeric column, and answers the same queries as
+CSVKnowledgeBase with plain loops. Select it with ``KB_BACKEND=lite``.
+"""
+import csv
+import heapq
+import os
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from dataclasses import replace
+from itertools import zip_longest
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.utils.catalog_search import COMMON_CATEGORY_SHARE, CatalogSearchMixin
+from app.utils.catalog_store import product_id_for
+from app.utils.catalog_stream import open_catalog
+from app.utils.facets import FACET_COLUMNS, CatalogFacets, FacetCounts
+from app.utils.parsing import NUMERIC_COLUMNS, product_field
+from app.utils.prompt_snippets import SnippetCache
+from app.utils.query_parser import ProductQuery
+from app.utils.text_index import InvertedIndex, TrigramIndex, tokenize
+
+# Cell values read as missing, matching the pandas backend's na_values
+MISSING_VALUES = frozenset(('', 'nan', 'NaN', 'None'))
+NAN = float('nan')
+
+
+class RecordResults(Sequence):
+    """Ordered view over selected catalog rows; a row becomes a dict only when it is accessed"""
+
+    def __init__(self, columns: Dict[str, Sequence], positions: Iterable[int]):
+        self._columns = columns
+        self._positions = list(positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return RecordResults(self._columns, self._positions[key])
+        return self._row(self._positions[key])
+
+    def __iter__(self):
+        for pos in self._positions:
+            yield self._row(pos)
+
+    def __repr__(self) -> str:
+        return f"RecordResults({len(self)} rows)"
+
+    @property
+    def positions(self) -> List[int]:
+        """Row positions into the catalog, in result order"""
+        return self._positions
+
+    def _row(self, pos: int) -> Dict:
+        return {name: values[pos] for name, values in self._columns.items()}
+
+    def to_list(self) -> List[Dict]:
+        """Materialize every row in the view as a dict"""
+        return list(self)
+
+
+class LiteKnowledgeBase(CatalogSearchMixin):
+    def __init__(self, csv_path: str):
+        self.csv_path = csv_path
+        self.fields: List[str] = []
+        self._columns: Dict[str, Sequence] = {}
+        self._count = 0
+        self.index = InvertedIndex()
+        self.trigrams = TrigramIndex()
+        self._semantic = None
+        self._semantic_lock = threading.Lock()
+        self._brand_codes = array('i')
+        self._brand_lookup: Dict[str, Tuple[str, int]] = {}
+        self._category_rows: Dict[str, frozenset] = {}
+        self._common_category_rows: Dict[str, frozenset] = {}
+        self._brand_next = 0
+        self._facet_counts = FacetCounts()
+        self.facets: Optional[CatalogFacets] = None
+        self.snippets = SnippetCache()
+        if os.path.exists(csv_path):
+            self.load_csv()
+
+    def load_csv(self):
+        """Read the CSV into per-column lists and build the search structures"""
+        try:
+            # A catalog still being scraped is read up to its last checkpoint
+            with open_catalog(self.csv_path) as f:
+                reader = csv.reader(f)
+                self.fields = next(reader, [])
+                records = list(reader)
+
+            # One shared str object per distinct value keeps repetitive columns small
+            interned: Dict[str, str] = {}
+            columns = list(zip_longest(*records, fillvalue=''))
+            self._columns = {
+                name: [None if v in MISSING_VALUES else interned.setdefault(v, v) for v in values]
+                for name, values in zip(self.fields, columns or [()] * len(self.fields))
+            }
+            self._count = len(records)
+            for derived, source, parser in NUMERIC_COLUMNS:
+                self._columns[derived] = self._numeric_column(self._columns.get(source), parser)
+
+            self._semantic = None
+            self._build_index()
+            self._build_filters()
+            self._facet_counts = FacetCounts.from_columns(
+                {col: self._columns[col] for col in FACET_COLUMNS if col in self._columns}, self._count)
+            self.facets = self._facet_counts.snapshot()
+            self._render_snippets()
+            return True
+        except Exception as e:
+            print(f"Error loading CSV: {e}")
+            return False
+
+    def _numeric_column(self, values: Optional[List], parser) -> array:
+        if values is None:
+            return array('d', [NAN]) * self._count
+        # Parse each distinct value once
+        parsed: Dict[str, float] = {}
+        for v in values:
+            if v is not None and v not in parsed:
+                number = parser(v)
+                parsed[v] = NAN if number is None else number
+        return array('d', (NAN if v is None else parsed[v] for v in values))
+
+    def _build_index(self):
+        """Build the inverted token index over the searchable text fields"""
+        self.index = InvertedIndex()
+        self.trigrams = TrigramIndex()
+        fields = [f for f in self.index.field_weights if f in self._columns]
+        for row_id, values in enumerate(zip(*(self._columns[f] for f in fields))):
+            self._index_row(row_id, dict(zip(fields, values)))
+
+    def _build_filters(self):
+        """Precompute brand codes and breadcrumb-token row sets for structured filters"""
+        codes: Dict[str, int] = {}
+        self._brand_codes = array('i')
+        self._brand_lookup = {}
+        for brand in self._columns.get('brand', [None] * self._count):
+            display = brand.strip() if brand else ''
+            name = display.lower()
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(codes)
+                if name:
+                    self._brand_lookup[name] = (display, code)
+            self._brand_codes.append(code)
+        self._brand_next = len(codes)
+
+        # Tokenize each distinct breadcrumb path once
+        path_rows: Dict[str, List[int]] = {}
+        for pos, path in enumerate(self._columns.get('breadcrumbs', ())):
+            if path:
+                path_rows.setdefault(path, []).append(pos)
+        token_rows: Dict[str, List[int]] = {}
+        for path, rows in path_rows.items():
+            for token in set(tokenize(path)):
+                token_rows.setdefault(token, []).extend(rows)
+        # Root crumbs like "Home" that cover (nearly) every row don't narrow anything
+        self._category_rows, self._common_category_rows = {}, {}
+        for token, rows in token_rows.items():
+            target = self._category_rows if len(rows) < COMMON_CATEGORY_SHARE * self._count else self._common_category_rows
+            target[token] = frozenset(rows)
+
+    def _update_filters(self, old_rows: Dict[int, Dict], new_rows: Dict[int, Dict]):
+        """Apply upserted rows to the brand codes and category row sets built by _build_filters"""
+        codes = array('i', self._brand_codes)
+        codes.extend([-1] * (self._count - len(codes)))
+        lookup = dict(self._brand_lookup)
+        for pos, row in new_rows.items():
+            display = row['brand'].strip() if row.get('brand') else ''
+            name = display.lower()
+            if name and name not in lookup:
+                lookup[name] = (display, self._brand_next)
+                self._brand_next += 1
+            codes[pos] = lookup[name][1] if name else -1
+        self._brand_codes, self._brand_lookup = codes, lookup
+
+        delta = self._category_changes(
+            (pos, old_rows.get(pos, {}).get('breadcrumbs'), row.get('breadcrumbs'))
+            for pos, row in new_rows.items()
+        )
+        category_rows, common_rows = dict(self._category_rows), dict(self._common_category_rows)
+        for token, (removed, added) in delta.items():
+            rows = category_rows.pop(token, None)
+            if rows is None:
+                rows = common_rows.pop(token, frozenset())
+            rows = (rows - frozenset(removed)) | frozenset(added)
+            if rows:
+                category_rows[token] = rows
+        # Growth can bring a root crumb below the threshold, and a delta can push a token over it
+        for token, rows in list(common_rows.items()) + list(category_rows.items()):
+            target = category_rows if len(rows) < COMMON_CATEGORY_SHARE * self._count else common_rows
+            other = common_rows if target is category_rows else category_rows
+            other.pop(token, None)
+            target[token] = rows
+        self._category_rows, self._common_category_rows = category_rows, common_rows
+
+    def memory_usage(self) -> Dict:
+        """Approximate resident bytes of the loaded catalog: per column, per index structure and in total"""
+        per_column = {}
+        for name, values in self._columns.items():
+            size = sys.getsizeof(values)
+            if isinstance(values, list):
+                # Interned strings are counted once per column
+                size += sum(sys.getsizeof(v) for v in {id(v): v for v in values if v is not None}.values())
+            per_column[name] = size
+        indexes = self._index_memory()
+        total = sum(per_column.values()) + sum(indexes.values())
+        return {
+            "rows": self._count,
+            "total_bytes": total,
+            "bytes_per_row": round(total / self._count, 1) if self._count else 0,
+            "columns": per_column,
+            "indexes": indexes
+        }
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the loaded catalog in bytes"""
+        return self.memory_usage()["total_bytes"]
+
+    def save_sidecar(self) -> Optional[str]:
+        """The lite backend reads the CSV directly; there is no columnar sidecar"""
+        return None
+
+    def product_ids(self) -> List[str]:
+        """Shared-store product ID of every row, in row order"""
+        if 'product_id' in self._columns:
+            return [str(v) for v in self._columns['product_id']]
+        return [
+            product_id_for({key: product_field(row, key, '') for key in ('link', 'brand', 'name')})
+            for row in self.get_all_products()
+        ]
+
+    def copy(self, csv_path: Optional[str] = None) -> "LiteKnowledgeBase":
+        """
+        Independent copy of the loaded catalog that can be upserted into without touching this one.
+        Column lists are copied (pointers only); index postings are copied on write.
+        """
+        other = LiteKnowledgeBase.__new__(LiteKnowledgeBase)
+        other.__dict__.update(self.__dict__)
+        other.csv_path = csv_path or self.csv_path
+        other.fields = list(self.fields)
+        other._columns = {
+            name: array(values.typecode, values) if isinstance(values, array) else list(values)
+            for name, values in self._columns.items()
+        }
+        other.index = self.index.copy()
+        other.trigrams = self.trigrams.copy()
+        other._facet_counts = self._facet_counts.copy()
+        other._semantic_lock = threading.Lock()
+        other.snippets = self.snippets.copy()
+        return other
+
+    def upsert_rows(self, rows: Iterable[Dict]) -> Tuple[int, int]:
+        """
+        Insert or replace products keyed by product ID. Only the changed rows are parsed,
+        tokenized and counted: index postings, brand codes, category rows and facet counts
+        are updated with deltas. Returns (updated, added).
+        """
+        n = self._count
+        ids = self.product_ids()
+        if 'product_id' not in self._columns:
+            self.fields.insert(0, 'product_id')
+            self._columns = {'product_id': ids, **self._columns}
+        position = {pid: pos for pos, pid in enumerate(ids)}
+        changed: Dict[int, Dict] = {}
+        next_pos = n
+        for row in rows:
+            pid = row.get('product_id') or product_id_for(row)
+            if pid not in position:
+                position[pid] = next_pos
+                next_pos += 1
+            changed[position[pid]] = dict(row, product_id=pid)
+        if not changed:
+            return 0, 0
+
+        # Values the replaced rows contributed to the trigram vocabulary, filters and facets
+        delta_columns = [c for c in dict.fromkeys(('name', 'brand') + FACET_COLUMNS) if c in self._columns]
+        old_rows = {
+            pos: {c: self._columns[c][pos] for c in delta_columns}
+            for pos in changed if pos < n
+        }
+
+        for pos, row in changed.items():
+            values = {name: None if row.get(name) in MISSING_VALUES else row.get(name) for name in self.fields}
+            for derived, source, parser in NUMERIC_COLUMNS:
+                number = parser(values.get(source)) if values.get(source) is not None else None
+                values[derived] = NAN if number is None else number
+            for name, value in values.items():
+                if pos < n:
+                    self._columns[name][pos] = value
+                else:
+                    self._columns[name].append(value)
+        self._count = next_pos
+
+        fields = [f for f in self.index.field_weights if f in self._columns]
+        for pos in changed:
+            self._index_row(pos, {f: self._columns[f][pos] for f in fields}, old_rows.get(pos))
+        if self._semantic is not None:
+            texts = dict(zip(changed, self._semantic_texts(list(changed))))
+            self._semantic = self._semantic.updated(texts, self._count)
+        self.snippets.invalidate(changed)
+
+        new_rows = {pos: {c: self._columns[c][pos] for c in delta_columns} for pos in changed}
+        self._update_filters(old_rows, new_rows)
+        for pos, row in new_rows.items():
+            if pos in old_rows:
+                self._facet_counts.remove(old_rows[pos])
+            self._facet_counts.add(row)
+        self._facet_counts.count = self._count
+        self.facets = self._facet_counts.snapshot()
+        updated = len(old_rows)
+        return updated, len(changed) - updated
+
+    def filter_products(self, query: ProductQuery, top_k: int = 10) -> Sequence:
+        """Answer a compound query by narrowing the candidate rows one constraint at a time"""
+        if not self._count:
+            return []
+
+        try:
+            prices = self._columns['price_numeric']
+            ratings = self._columns['rating_numeric']
+
+            # Category row sets are the most selective, so they seed the candidates
+            candidates = None
+            for category in query.categories:
+                rows = self._category_rows.get(category, frozenset())
+                candidates = rows if candidates is None else candidates & rows
+            positions = sorted(candidates) if candidates is not None else range(self._count)
+
+            # NaN compares False, so rows without a value drop out of bounded filters
+            if query.brands:
+                codes = {self._brand_lookup[b.lower()][1] for b in query.brands if b.lower() in self._brand_lookup}
+                positions = [p for p in positions if self._brand_codes[p] in codes]
+            if query.min_price is not None:
+                positions = [p for p in positions if prices[p] >= query.min_price]
+            if query.max_price is not None:
+                positions = [p for p in positions if prices[p] <= query.max_price]
+            if query.min_rating is not None:
+                positions = [p for p in positions if ratings[p] >= query.min_rating]
+            if query.with_reviews:
+                if 'reviews' not in self._columns:
+                    return []
+                reviews = self._columns['reviews']
+                positions = [p for p in positions if reviews[p] is not None]
+            positions = list(positions)
+
+            # Remaining free-text terms rank within the filtered rows; with a sort they only select rows
+            if query.terms:
+                allowed = bytearray(self._count)
+                for p in positions:
+                    allowed[p] = 1
+                ranked = self.index.score_tokens(query.terms, top_k=self._count if query.sort else top_k, allowed=allowed)
+                if ranked and not query.sort:
+                    return self._results([row_id for row_id, _ in ranked])
+                if ranked:
+                    positions = [row_id for row_id, _ in ranked]
+
+            if not positions and query.categories:
+                # The category word may only appear in names/descriptions; retry it as search text
+                relaxed = replace(query, categories=[], terms=query.terms + query.categories)
+                return self.filter_products(relaxed, top_k=top_k)
+
+            # Cheapest first for a price sort, otherwise best rated first; rows without the value last
+            if query.sort == 'price':
+                return self._results(heapq.nsmallest(top_k, positions, key=lambda p: prices[p] if prices[p] == prices[p] else float('inf')))
+            return self._results(heapq.nlargest(top_k, positions, key=lambda p: ratings[p] if ratings[p] == ratings[p] else -1.0))
+        except Exception as e:
+            print(f"Error filtering products: {e}")
+            return []
+
+    def _results(self, positions: Iterable[int]) -> RecordResults:
+        return RecordResults(self._columns, positions)
+
+    def get_all_products(self) -> Sequence:
+        """Get all products"""
+        if not self._count:
+            return []
+        return self._results(range(self._count))
+
+    def get_product_count(self) -> int:
+        """Get total product count"""
+        return self._count
+
+    def get_product_summary(self) -> str:
+        """Get a summary of available products"""
+        if not self._count:
+            return "No products available."
+
+        return self.facets.summary
+
+    def get_products_by_price_range(self, min_price: float = 0, max_price: float = float('inf')) -> Sequence:
+        """Get products within a price range"""
+        if not self._count:
+            return []
+
+        try:
+            prices = self._columns['price_numeric']
+            positions = [p for p in range(self._count) if min_price <= prices[p] <= max_price]
+
+            return self._results(sorted(positions, key=prices.__getitem__))
+        except Exception as e:
+            print(f"Error filtering by price: {e}")
+            return []
+
+    def get_best_value_products(self, top_n: int = 10) -> Sequence:
+        """Get products sorted by price (ascending) - best value"""
+        if not self._count:
+            return []
+
+        try:
+            prices = self._columns['price_numeric']
+            priced = (p for p in range(self._count) if prices[p] == prices[p])
+
+            return self._results(heapq.nsmallest(top_n, priced, key=prices.__getitem__))
+        except Exception as e:
+            print(f"Error getting best value products: {e}")
+            return []
+
+    def get_top_rated_products(self, top_n: int = 10) -> Sequence:
+        """Get products sorted by rating (descending)"""
+        if not self._count or 'rating' not in self._columns:
+            return []
+
+        try:
+            ratings = self._columns['rating_numeric']
+            rated = (p for p in range(self._count) if ratings[p] == ratings[p])
+
+            return self._results(heapq.nlargest(top_n, rated, key=ratings.__getitem__))
+        except Exception as e:
+            print(f"Error getting top rated products: {e}")
+            return []
+
+    def get_products_with_reviews(self, min_reviews: int = 1) -> Sequence:
+        """Get products that have reviews"""
+        if not self._count or 'reviews' not in self._columns:
+            return []
+
+        try:
+            return self._results([p for p, review in enumerate(self._columns['reviews']) if review is not None])
+        except Exception as e:
+            print(f"Error getting products with reviews: {e}")
+            return []
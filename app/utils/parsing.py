@@ -0,0 +1,108 @@
+import re
+from typing import Dict, Iterator, Optional
+
+# Space-grouped thousands ("1 299", "12 345,50") or a run of digits, commas and dots.
+# A space never follows a decimal fraction, so "4.3 1234 ratings" stays two numbers.
+NUMBER_PATTERN = re.compile(r'\d{1,3}(?: \d{3})+(?:[.,]\d+)?(?![\d.,])|\d[\d,.]*')
+PLAIN_NUMBER_PATTERN = re.compile(r'\d[\d,.]*')
+# Digits grouped with a comma or dot elsewhere mean the text does not group with spaces
+SEPARATOR_PATTERN = re.compile(r'\d[.,]\d')
+COUNT_SUFFIX_PATTERN = re.compile(r'\s*(lakh|k|l|m)\b')
+COUNT_WORD_PATTERN = re.compile(r'\s*(?:ratings?|reviews?|votes?|customers?|buyers?)\b')
+# "4.3 out of 5", "4/5": the number before is a rating and the one after its scale, not counts
+SCALE_PATTERN = re.compile(r'\s*(?:out\s+of|/)\s*\d')
+DENOMINATOR_PATTERN = re.compile(r'(?:out\s+of|/)\s*$')
+COUNT_SUFFIXES = {'k': 1_000, 'l': 100_000, 'lakh': 100_000, 'm': 1_000_000}
+
+def _to_float(raw: str) -> Optional[float]:
+    raw = raw.strip().rstrip('.,').replace(' ', '')
+    if ',' in raw and '.' in raw:
+        # The right-most separator is the decimal one
+        if raw.rfind(',') > raw.rfind('.'):
+            raw = raw.replace('.', '').replace(',', '.')
+        else:
+            raw = raw.replace(',', '')
+    elif ',' in raw:
+        # "1,299" / "1,29,999" are grouping; "4,5" is a decimal comma
+        groups = raw.split(',')
+        if len(groups) == 2 and len(groups[1]) != 3:
+            raw = raw.replace(',', '.')
+        else:
+            raw = raw.replace(',', '')
+    elif raw.count('.') > 1:
+        # "1.299.000" style grouping
+        raw = raw.replace('.', '')
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+def _numbers(text: str) -> Iterator[re.Match]:
+    """
+    Number matches in text. "1 299" is one space-grouped number only when no other
+    number in the text uses , or . grouping and no count word follows it, so
+    "4 120 ratings" and "4.3 1 234" split into separate numbers.
+    """
+    lowered = text.lower()
+    for m in NUMBER_PATTERN.finditer(text):
+        if ' ' in m.group(0) and (
+            SEPARATOR_PATTERN.search(text[:m.start()] + ' ' + text[m.end():])
+            or COUNT_WORD_PATTERN.match(lowered, m.end())
+        ):
+            yield from PLAIN_NUMBER_PATTERN.finditer(text, m.start(), m.end())
+        else:
+            yield m
+
+def parse_number(text) -> Optional[float]:
+    """
+    Parse the first number in a localized string.
+    Handles "₹1,299", "Rs. 499.00", "1,29,999", "1.299,00", "1 299" and "4.3 out of 5".
+    """
+    if text is None or not isinstance(text, str):
+        return None
+    m = next(_numbers(text), None)
+    return _to_float(m.group(0)) if m else None
+
+def parse_count(text) -> Optional[float]:
+    """
+    Parse review/rating counts such as "1,234 ratings" or "1.2k reviews".
+    A fractional number without a k/l/m suffix is a rating, and so is "4 out of 5"
+    or "4/5" with its scale, so "4.3 out of 5 (1,234)" is 1234. A number followed
+    by a count word wins, so "4 120 ratings" is 120.
+    """
+    if text is None or not isinstance(text, str):
+        return None
+    lowered = text.lower()
+    integer = fraction = None
+    for m in _numbers(text):
+        value = _to_float(m.group(0))
+        if value is None or DENOMINATOR_PATTERN.search(lowered, 0, m.start()):
+            continue
+        suffix = COUNT_SUFFIX_PATTERN.match(lowered, m.end())
+        if suffix:
+            return value * COUNT_SUFFIXES[suffix.group(1)]
+        if COUNT_WORD_PATTERN.match(lowered, m.end()):
+            return value
+        if value.is_integer() and not SCALE_PATTERN.match(lowered, m.end()):
+            integer = value if integer is None else integer
+        elif fraction is None:
+            fraction = value
+    return integer if integer is not None else fraction
+
+# Typed columns derived from the raw text columns: (derived, source, parser)
+NUMERIC_COLUMNS = (
+    ('price_numeric', 'price', parse_number),
+    ('rating_numeric', 'rating', parse_number),
+    ('review_count_numeric', 'review_count', parse_count),
+)
+
+def is_missing(value) -> bool:
+    """True for None, empty strings and NaN (including numpy float NaN)"""
+    return value is None or value == '' or value != value
+
+def product_field(product: Dict, key: str, default: str = 'N/A') -> str:
+    """Display value of a product field; missing values (NaN/None/empty) become default"""
+    value = product.get(key)
+    if is_missing(value):
+        return default
+    return str(value)
@@ -0,0 +1,106 @@
+import re
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.graph.prompts import PRODUCT_SNIPPET_TEMPLATE, PRODUCT_SNIPPET_VERSION
+from app.utils.parsing import product_field
+
+DESCRIPTION_CHARS = 150
+REVIEWS_CHARS = 200
+
+# Catalogs up to this size have every snippet rendered when they load; larger ones render on first use
+PRECOMPUTE_MAX_ROWS = 5_000
+
+# Rough BPE-style count: words and individual punctuation marks
+TOKEN_ESTIMATE_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def render_product_snippet(product: Dict) -> str:
+    """Render one product's block of the product-answer prompt"""
+    return PRODUCT_SNIPPET_TEMPLATE.format(
+        name=product_field(product, 'name'),
+        brand=product_field(product, 'brand'),
+        price=product_field(product, 'price'),
+        rating=product_field(product, 'rating'),
+        review_count=product_field(product, 'review_count'),
+        description=product_field(product, 'description')[:DESCRIPTION_CHARS],
+        breadcrumbs=product_field(product, 'breadcrumbs'),
+        link=product_field(product, 'link'),
+        reviews=product_field(product, 'reviews', 'No reviews')[:REVIEWS_CHARS],
+    )
+
+def estimate_tokens(text: str) -> int:
+    """Approximate prompt tokens of text"""
+    return len(TOKEN_ESTIMATE_PATTERN.findall(text))
+
+
+class SnippetCache:
+    """
+    Rendered prompt snippets of one catalog, keyed by (row position, template version).
+    Building a prompt is then a join of cached strings, and the tokens each product
+    contributes are fixed for the lifetime of the catalog version.
+    """
+
+    def __init__(self, version: int = PRODUCT_SNIPPET_VERSION, render: Callable[[Dict], str] = render_product_snippet):
+        self.version = version
+        self.render = render
+        self._snippets: Dict[Tuple[int, int], str] = {}
+        self._tokens: Dict[Tuple[int, int], int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._snippets)
+
+    def get(self, pos: int, load: Callable[[], Dict]) -> str:
+        """Snippet for the product at pos; load() returns its row on a miss"""
+        key = (pos, self.version)
+        snippet = self._snippets.get(key)
+        if snippet is None:
+            snippet = self.render(load())
+            with self._lock:
+                self._snippets[key] = snippet
+                self._tokens[key] = estimate_tokens(snippet)
+        return snippet
+
+    def fill(self, rows: Iterable[Tuple[int, Dict]]):
+        """Render snippets for (position, row) pairs up front"""
+        for pos, row in rows:
+            self.get(pos, lambda: row)
+
+    def tokens(self, pos: int) -> Optional[int]:
+        """Estimated prompt tokens of the cached snippet at pos"""
+        return self._tokens.get((pos, self.version))
+
+    def invalidate(self, positions: Iterable[int]):
+        """Forget snippets of rows whose data changed"""
+        with self._lock:
+            for pos in positions:
+                self._snippets.pop((pos, self.version), None)
+                self._tokens.pop((pos, self.version), None)
+
+    def copy(self) -> "SnippetCache":
+        other = SnippetCache(self.version, self.render)
+        with self._lock:
+            other._snippets = dict(self._snippets)
+            other._tokens = dict(self._tokens)
+        return other
+
+    def memory_bytes(self) -> int:
+        """Approximate resident bytes of the cached snippets and their token counts"""
+        with self._lock:
+            snippets = list(self._snippets.values())
+            size = sys.getsizeof(self._snippets) + sys.getsizeof(self._tokens)
+        # Each entry also holds a (position, version) key tuple shared by both dicts
+        key_bytes = sys.getsizeof((1 << 20, 1)) + sys.getsizeof(1 << 20)
+        return size + sum(sys.getsizeof(s) for s in snippets) + key_bytes * len(snippets)
+
+    def stats(self) -> Dict:
+        """Snippet count and estimated prompt tokens per product"""
+        with self._lock:
+            counts: List[int] = list(self._tokens.values())
+        return {
+            "version": self.version,
+            "snippets": len(counts),
+            "mean_tokens": round(sum(counts) / len(counts), 1) if counts else 0,
+            "max_tokens": max(counts, default=0),
+        }
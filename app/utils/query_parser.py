@@ -0,0 +1,153 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from app.utils.text_index import STOPWORDS, TOKEN_PATTERN, normalize_token
+
+AMOUNT = r"(?:₹|rs\.?|inr)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?"
+
+PRICE_BETWEEN = re.compile(rf"(?:between|from)\s+{AMOUNT}\s*(?:and|to|-)\s*{AMOUNT}")
+PRICE_RANGE = re.compile(rf"(?:₹|rs\.?|inr)\s*(\d[\d,]*(?:\.\d+)?)\s*(k)?\s*(?:-|to)\s*{AMOUNT}")
+PRICE_MAX = re.compile(rf"(?:under|below|less than|cheaper than|upto|up to|within|max(?:imum)?|<=?)\s+{AMOUNT}")
+PRICE_MIN = re.compile(rf"(?:over|above|more than|at least|min(?:imum)?|>=?)\s+{AMOUNT}")
+
+# A standalone 0-5 rating value: never a digit of a longer number such as "200+ ml" or "4.55"
+RATING_VALUE = r"(?<![\d.,])([0-5](?:\.\d)?)(?!\.?\d)"
+RATING_ABOVE = r"(?:and above|and up|or more|or above|& up|\+)"
+RATING_MIN = [
+    re.compile(rf"\b(?:rated|rating|ratings|stars?)\s*(?:of\s*)?(?:above|over|at least|more than|>=?|of)?\s*{RATING_VALUE}\s*(?:\+|stars?\b|/\s*5\b)?"),
+    # "4 stars", "4+ star", "4 star and above", "4-star rated"; a bare "5 star grooming" is not a threshold
+    re.compile(rf"{RATING_VALUE}\s*(?:\+\s*stars?\b|-?\s*stars?\s*(?:rated\b|{RATING_ABOVE})|-?\s*stars\b|-?\s*star\s*$|rated\b)\s*{RATING_ABOVE}?"),
+    re.compile(rf"{RATING_VALUE}\s*\+\s*(?:rating|ratings|rated)\b"),
+]
+
+# Ordering intents; "best reviewed" is a rating sort, so ratings are matched before reviews
+SORT_BY_RATING = re.compile(r"\b(?:top|best|highest)[ -](?:rated|reviewed)\b|\bbest reviews?\b")
+SORT_BY_PRICE = re.compile(r"\b(?:best value|value for money|cheapest|cheaper|cheap|affordable|budget|inexpensive|lowest price[sd]?)\b")
+WITH_REVIEWS = re.compile(r"\b(?:reviews?|reviewed|customer feedback|what people say)\b")
+
+# Words consumed by the structured constraints rather than searched as text
+CONSTRAINT_WORDS = frozenset("""
+under below less than cheaper upto up within max maximum over above more least min minimum
+between rated rating ratings star stars rs inr price priced cost costing budget and or
+cheap cheapest affordable inexpensive review reviews reviewed
+""".split())
+
+# Every word the parser gives a meaning to; typo correction never rewrites these
+PARSER_WORDS = CONSTRAINT_WORDS | frozenset("""
+best top highest lowest value money customer feedback people say
+""".split())
+
+
+@dataclass
+class ProductQuery:
+    """Structured constraints extracted from a chat question"""
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_rating: Optional[float] = None
+    brands: List[str] = field(default_factory=list)
+    categories: List[str] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+    sort: Optional[str] = None          # "price" (lowest first) or "rating" (highest first)
+    with_reviews: bool = False
+
+    @property
+    def has_filters(self) -> bool:
+        return any(v is not None for v in (self.min_price, self.max_price, self.min_rating)) \
+            or bool(self.brands) or bool(self.categories)
+
+    @property
+    def has_intent(self) -> bool:
+        return self.sort is not None or self.with_reviews
+
+    def describe(self) -> str:
+        parts = []
+        if self.brands:
+            parts.append("brand " + " or ".join(self.brands))
+        if self.categories:
+            parts.append("category " + ", ".join(self.categories))
+        if self.min_price is not None and self.max_price is not None:
+            parts.append(f"price {self.min_price:g}-{self.max_price:g}")
+        elif self.max_price is not None:
+            parts.append(f"price under {self.max_price:g}")
+        elif self.min_price is not None:
+            parts.append(f"price over {self.min_price:g}")
+        if self.min_rating is not None:
+            parts.append(f"rating {self.min_rating:g}+")
+        if self.terms:
+            parts.append("matching '" + " ".join(self.terms) + "'")
+        if self.with_reviews:
+            parts.append("customer reviews")
+        if self.sort == "price":
+            parts.append("lowest price first")
+        elif self.sort == "rating":
+            parts.append("highest rating first")
+        return ", ".join(parts)
+
+def _amount(number: str, suffix: Optional[str]) -> float:
+    value = float(number.replace(",", ""))
+    return value * 1000 if suffix else value
+
+def _strip(text: str, span) -> str:
+    # Blank out a consumed span so later patterns don't re-read its numbers
+    return text[:span[0]] + " " * (span[1] - span[0]) + text[span[1]:]
+
+def parse_query(text: str, brands: Dict[str, str], categories: Set[str]) -> ProductQuery:
+    """
+    Extract price bounds, rating threshold, sort intent, brands and category terms from a question.
+    brands maps lowercase brand name -> display name; categories is the set of
+    normalized breadcrumb tokens in the catalog.
+    """
+    query = ProductQuery()
+    rest = text.lower()
+
+    # Rating first: "rated above 4" must not become a price floor of 4
+    for pattern in RATING_MIN:
+        m = pattern.search(rest)
+        if m and float(m.group(1)) <= 5:
+            query.min_rating = float(m.group(1))
+            rest = _strip(rest, m.span())
+            break
+
+    m = PRICE_BETWEEN.search(rest) or PRICE_RANGE.search(rest)
+    if m:
+        low, high = _amount(m.group(1), m.group(2)), _amount(m.group(3), m.group(4))
+        query.min_price, query.max_price = min(low, high), max(low, high)
+        rest = _strip(rest, m.span())
+    else:
+        m = PRICE_MAX.search(rest)
+        if m:
+            query.max_price = _amount(m.group(1), m.group(2))
+            rest = _strip(rest, m.span())
+        m = PRICE_MIN.search(rest)
+        if m:
+            query.min_price = _amount(m.group(1), m.group(2))
+            rest = _strip(rest, m.span())
+
+    # "cheapest" / "top rated" / "reviews" order or narrow the result instead of being searched as text
+    for pattern, attr, value in ((SORT_BY_RATING, "sort", "rating"), (SORT_BY_PRICE, "sort", "price"),
+                                 (WITH_REVIEWS, "with_reviews", True)):
+        m = pattern.search(rest)
+        if m:
+            if getattr(query, attr) in (None, False):
+                setattr(query, attr, value)
+            rest = _strip(rest, m.span())
+
+    # Brands: longest names first so "bombay shaving company" wins over "bombay"
+    for key in sorted(brands, key=len, reverse=True):
+        m = re.search(rf"(?<![a-z0-9]){re.escape(key)}(?![a-z0-9])", rest)
+        if m:
+            query.brands.append(brands[key])
+            rest = _strip(rest, m.span())
+
+    for token in TOKEN_PATTERN.findall(rest):
+        if token in STOPWORDS or token in CONSTRAINT_WORDS or token.isdigit():
+            continue
+        token = normalize_token(token)
+        if token in categories:
+            if token not in query.categories:
+                query.categories.append(token)
+        else:
+            query.terms.append(token)
+
+    return query
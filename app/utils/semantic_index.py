@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _bucket(feature: str, dim: int) -> int:
+    # crc32 is stable across processes, unlike the built-in str hash
+    return zlib.crc32(feature.encode("utf-8")) % dim
+
+def _word_features(word: str) -> List[str]:
+    padded = f"^{word}$"
+    return [f"w:{word}"] + [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+class SemanticIndex:
+    """
+    CPU-only vector index over hashed n-gram TF-IDF features.
+    Each product is a row of an L2-normalized float32 matrix, so cosine
+    top-k for a query is a single matrix-vector product. Character trigrams
+    let "frizzy" meet "anti-frizz" and "moisturising" meet "moisturizer"
+    without any model download.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.idf = np.ones(dim, dtype=np.float32)
+        self._buckets: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _bucket_ids(self, text: Optional[str]) -> List[int]:
+        # Catalog text repeats heavily, so buckets are memoized per word and per bigram
+        if not text or not isinstance(text, str):
+            return []
+        cache = self._buckets
+        words = WORD_PATTERN.findall(text.lower())
+        ids: List[int] = []
+        for w in words:
+            word_ids = cache.get(w)
+            if word_ids is None:
+                word_ids = cache[w] = [_bucket(f, self.dim) for f in _word_features(w)]
+            ids.extend(word_ids)
+        for a, b in zip(words, words[1:]):
+            key = f"{a}_{b}"
+            bigram_ids = cache.get(key)
+            if bigram_ids is None:
+                bigram_ids = cache[key] = [_bucket(f"b:{key}", self.dim)]
+            ids.extend(bigram_ids)
+        return ids
+
+    def build(self, texts: Iterable[Optional[str]]):
+        """Vectorize every text; row i of the matrix corresponds to texts[i]"""
+        rows, cols, counts = [], [], []
+        n_docs = 0
+        for row_id, text in enumerate(texts):
+            n_docs += 1
+            tf = Counter(self._bucket_ids(text))
+            rows.extend([row_id] * len(tf))
+            cols.extend(tf.keys())
+            counts.extend(tf.values())
+
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        doc_freq = np.bincount(cols, minlength=self.dim).astype(np.float32)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + doc_freq)) + 1.0).astype(np.float32)
+
+        # Sublinear term frequency weighted by IDF
+        weights = (1.0 + np.log(np.asarray(counts, dtype=np.float32))) * self.idf[cols]
+        matrix = np.zeros((n_docs, self.dim), dtype=np.float32)
+        matrix[rows, cols] = weights
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        self.matrix = matrix
+
+    def updated(self, texts: Dict[int, Optional[str]], n_rows: int) -> "SemanticIndex":
+        """
+        Copy of the index with only the given rows re-vectorized; rows at or past
+        the current end are appended. IDF weights are kept from the last full build.
+        """
+        index = SemanticIndex(self.dim)
+        index.idf = self.idf
+        index._buckets = self._buckets
+        matrix = np.zeros((n_rows, self.dim), dtype=np.float32)
+        kept = min(len(self), n_rows)
+        matrix[:kept] = self.matrix[:kept]
+        for row_id, text in texts.items():
+            matrix[row_id] = self.vectorize(text)
+        index.matrix = matrix
+        return index
+
+    def memory_bytes(self) -> int:
+        """Approximate resident bytes; a matrix memory-mapped from disk lives in the shared page cache instead"""
+        size = self.idf.nbytes + sys.getsizeof(self._buckets)
+        if not isinstance(self.matrix, np.memmap):
+            size += self.matrix.nbytes
+        # Bucket ids are boxed ints in the per-word memo
+        size += sum(sys.getsizeof(key) + sys.getsizeof(ids) + sys.getsizeof(1 << 20) * len(ids)
+                    for key, ids in self._buckets.items())
+        return size
+
+    def vectorize(self, text: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tf = Counter(self._bucket_ids(text))
+        if tf:
+            ids = np.fromiter(tf.keys(), dtype=np.int64)
+            counts = np.fromiter(tf.values(), dtype=np.float32)
+            vec[ids] = (1.0 + np.log(counts)) * self.idf[ids]
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def search(self, query: str, top_k: int = 10, min_score: float = 0.05) -> List[Tuple[int, float]]:
+        """Return up to top_k (row_id, cosine) pairs ordered by descending similarity"""
+        if not len(self):
+            return []
+        q = self.vectorize(query)
+        if not q.any():
+            return []
+
+        scores = self.matrix @ q
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if scores[i] >= min_score]
+
+    # ---- persistence next to the catalog ----
+    @staticmethod
+    def paths(csv_path: str) -> Tuple[str, str, str]:
+        base = csv_path + ".semantic"
+        return f"{base}.matrix.npy", f"{base}.idf.npy", f"{base}.json"
+
+    def save(self, csv_path: str, signature: list):
+        matrix_path, idf_path, meta_path = self.paths(csv_path)
+        # Drop the old metadata first so nothing matches the old signature mid-rewrite
+        try:
+            os.remove(meta_path)
+        except OSError:
+            pass
+        # Arrays are swapped in with os.replace: other processes may have the old
+        # matrix memory-mapped, and truncating it in place would crash them
+        suffix = f".tmp-{os.getpid()}-{threading.get_ident()}"
+        for path, array in ((matrix_path, self.matrix), (idf_path, self.idf)):
+            with open(path + suffix, "wb") as f:
+                np.save(f, array)
+            os.replace(path + suffix, path)
+        # Metadata last, so a half-written index is never picked up
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "rows": len(self), "csv_signature": signature}, f)
+        os.replace(meta_path + suffix, meta_path)
+
+    @classmethod
+    def load(cls, csv_path: str, signature: list, dim: int) -> Optional["SemanticIndex"]:
+        """Load a persisted index if it was built from this exact CSV version"""
+        matrix_path, idf_path, meta_path = cls.paths(csv_path)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("csv_signature") != signature or meta.get("dim") != dim:
+                return None
+            index = cls(dim)
+            index.matrix = np.load(matrix_path, mmap_mode="r")
+            index.idf = np.load(idf_path)
+        except (OSError, ValueError):
+            return None
+        if index.matrix.shape != (meta["rows"], dim):
+            return None
+        return index
@@ -0,0 +1,389 @@
+import heapq
+import math
+import re
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Sizes of the boxed values the indexes hold, for memory estimates
+FLOAT_BYTES = sys.getsizeof(0.5)
+INT_BYTES = sys.getsizeof(1 << 20)
+
+# Rows kept in impact order across all cached posting lists (4 bytes each)
+IMPACT_CACHE_POSTINGS = 2_000_000
+# Queries touching fewer postings than this, or asking for more rows, are scored exhaustively
+IMPACT_MIN_POSTINGS = 5_000
+IMPACT_MAX_TOP_K = 100
+
+# Most trigram-sharing words that are re-ranked by edit distance for one misspelling
+MAX_TRIGRAM_CANDIDATES = 50
+
+# Words that carry no product signal in chat questions
+STOPWORDS = frozenset("""
+a an and are any as at be best buy can do does for from get give good have i in is it
+its me my of on or please product products recommend show some something that the
+there this to what which with you your
+""".split())
+
+# Relative weight of each searchable field when scoring (BM25F-style)
+DEFAULT_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "brand": 2.0,
+    "breadcrumbs": 1.5,
+    "description": 1.0,
+    "reviews": 0.5,
+}
+
+def normalize_token(token: str) -> str:
+    """Light plural folding so "trimmers" matches "trimmer" (not a full stemmer)"""
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase text and split into alphanumeric tokens, dropping stopwords"""
+    if not text or not isinstance(text, str):
+        return []
+    return [normalize_token(t) for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class InvertedIndex:
+    """
+    Weighted-field inverted index with BM25 ranking.
+    Postings map token -> {row_id: weighted term frequency}, so a query only
+    touches the rows that contain at least one of its tokens. A copy shares its
+    posting lists with the original until it writes to one (copy-on-write).
+    Unfiltered top-k queries over long posting lists walk the lists in impact
+    order (threshold algorithm) and stop once no unseen row can enter the top k;
+    the orders are cached per token until the index changes.
+    """
+
+    def __init__(self, field_weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.doc_lengths: Dict[int, float] = {}
+        self._row_tokens: Dict[int, Tuple[str, ...]] = {}
+        self._total_length = 0.0
+        # Tokens whose posting list belongs to this index alone and may be changed in place
+        self._owned: Set[str] = set()
+        # Bumped on every change; impact orders are only valid for the version they were built at
+        self._version = 0
+        self._impact_orders: "OrderedDict[str, array]" = OrderedDict()
+        self._impact_version = 0
+        self._impact_postings = 0
+        self._impact_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, row_id: int, fields: Dict[str, Optional[str]]):
+        """Index one row; fields maps field name -> raw text"""
+        if row_id in self.doc_lengths:
+            self.remove(row_id)
+        self._version += 1
+
+        term_freqs: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in self.field_weights.items():
+            for token in tokenize(fields.get(field)):
+                term_freqs[token] = term_freqs.get(token, 0.0) + weight
+                length += weight
+
+        tokens = []
+        for token, tf in term_freqs.items():
+            # Interned, so every row's token list shares the posting keys instead of holding copies
+            token = sys.intern(token)
+            self._writable(token)[row_id] = tf
+            tokens.append(token)
+        self.doc_lengths[row_id] = length
+        self._row_tokens[row_id] = tuple(tokens)
+        self._total_length += length
+
+    def _writable(self, token: str) -> Dict[int, float]:
+        plist = self.postings.get(token)
+        if token not in self._owned:
+            plist = self.postings[token] = dict(plist) if plist else {}
+            self._owned.add(token)
+        return plist
+
+    def copy(self) -> "InvertedIndex":
+        """
+        Independent copy whose postings can be updated without touching this index.
+        Posting lists are shared and only duplicated when one side changes them.
+        """
+        other = InvertedIndex(self.field_weights, self.k1, self.b)
+        other.postings = dict(self.postings)
+        other.doc_lengths = dict(self.doc_lengths)
+        other._row_tokens = dict(self._row_tokens)
+        other._total_length = self._total_length
+        # Every list is shared now, so neither side may change one in place
+        self._owned = set()
+        return other
+
+    def memory_bytes(self) -> int:
+        """Approximate resident bytes of the postings, document lengths and per-row token lists"""
+        size = sum(sys.getsizeof(d) for d in (self.postings, self.doc_lengths, self._row_tokens, self._owned))
+        # One boxed float per posting; posting lists shared with a copy are counted by both
+        size += sum(sys.getsizeof(token) + sys.getsizeof(plist) + FLOAT_BYTES * len(plist)
+                    for token, plist in self.postings.items())
+        # A length and a row id per document; the row id object is shared by every structure
+        size += (FLOAT_BYTES + INT_BYTES) * len(self.doc_lengths)
+        size += sum(sys.getsizeof(tokens) for tokens in self._row_tokens.values())
+        size += sum(sys.getsizeof(rows) for rows in list(self._impact_orders.values()))
+        return size
+
+    def remove(self, row_id: int):
+        """Remove a row from the index"""
+        length = self.doc_lengths.pop(row_id, None)
+        if length is None:
+            return
+        self._version += 1
+        self._total_length -= length
+        for token in self._row_tokens.pop(row_id, ()):
+            if token not in self.postings:
+                continue
+            plist = self._writable(token)
+            plist.pop(row_id, None)
+            if not plist:
+                del self.postings[token]
+                self._owned.discard(token)
+
+    def search(self, query: str, top_k: int = 10, allowed=None) -> List[Tuple[int, float]]:
+        """Return up to top_k (row_id, score) pairs ordered by descending BM25 score"""
+        return self.score_tokens(tokenize(query), top_k, allowed)
+
+    def score_tokens(self, tokens: Iterable[str], top_k: int = 10, allowed=None) -> List[Tuple[int, float]]:
+        """Score rows containing any of tokens; allowed (a boolean array by row id) restricts candidates"""
+        n_docs = len(self.doc_lengths)
+        if not n_docs or top_k <= 0:
+            return []
+        # BM25 per posting is weight * tf / (tf + base + slope * length)
+        base = self.k1 * (1 - self.b)
+        slope = self.k1 * self.b / ((self._total_length / n_docs) or 1.0)
+        terms = []
+        for token in set(tokens):
+            plist = self.postings.get(token)
+            if plist:
+                idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+                terms.append((token, plist, idf * (self.k1 + 1)))
+        if not terms:
+            return []
+
+        if (allowed is None and top_k <= IMPACT_MAX_TOP_K
+                and sum(len(plist) for _, plist, _ in terms) >= IMPACT_MIN_POSTINGS):
+            return self._top_by_impact(terms, top_k, base, slope)
+
+        lengths = self.doc_lengths
+        scores: Dict[int, float] = {}
+        for _, plist, weight in terms:
+            if allowed is None:
+                partial = {row_id: weight * tf / (tf + base + slope * lengths[row_id]) for row_id, tf in plist.items()}
+            else:
+                partial = {row_id: weight * tf / (tf + base + slope * lengths[row_id])
+                           for row_id, tf in plist.items() if allowed[row_id]}
+            # Fold the smaller map into the larger one
+            if len(partial) > len(scores):
+                scores, partial = partial, scores
+            for row_id, score in partial.items():
+                scores[row_id] = scores.get(row_id, 0.0) + score
+
+        if len(scores) > top_k:
+            cutoff = heapq.nlargest(top_k, scores.values())[-1]
+            scores = {row_id: score for row_id, score in scores.items() if score >= cutoff}
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+    def _impact_order(self, token: str, plist: Dict[int, float], weight: float, base: float, slope: float) -> array:
+        """Row ids of token's posting list by descending score (ties by row id), cached until the index changes"""
+        version = self._version
+        with self._impact_lock:
+            if self._impact_version != version:
+                self._impact_orders.clear()
+                self._impact_postings = 0
+                self._impact_version = version
+            rows = self._impact_orders.get(token)
+            if rows is not None:
+                self._impact_orders.move_to_end(token)
+                return rows
+
+        lengths = self.doc_lengths
+        rows = array("i", sorted(plist, key=lambda row_id: (
+            -(weight * plist[row_id] / (plist[row_id] + base + slope * lengths[row_id])), row_id)))
+
+        with self._impact_lock:
+            if (self._impact_version == version and token not in self._impact_orders
+                    and len(rows) <= IMPACT_CACHE_POSTINGS):
+                self._impact_orders[token] = rows
+                self._impact_postings += len(rows)
+                while self._impact_postings > IMPACT_CACHE_POSTINGS and self._impact_orders:
+                    _, evicted = self._impact_orders.popitem(last=False)
+                    self._impact_postings -= len(evicted)
+        return rows
+
+    def _top_by_impact(self, terms, top_k: int, base: float, slope: float) -> List[Tuple[int, float]]:
+        """
+        Threshold algorithm: read the posting lists in impact order one depth at a
+        time and fully score each newly seen row. Once the k-th best score beats the
+        sum of the scores at the current depth, no unread row can displace it.
+        """
+        lengths = self.doc_lengths
+        orders = [self._impact_order(token, plist, weight, base, slope) for token, plist, weight in terms]
+        if len(terms) == 1:
+            _, plist, weight = terms[0]
+            return [(row_id, weight * plist[row_id] / (plist[row_id] + base + slope * lengths[row_id]))
+                    for row_id in orders[0][:top_k]]
+
+        heap: List[Tuple[float, int]] = []    # (score, -row_id): the root is the current k-th best
+        seen: Set[int] = set()
+        lists = [(plist, weight, rows, len(rows)) for (_, plist, weight), rows in zip(terms, orders)]
+        for depth in range(max(size for _, _, _, size in lists)):
+            threshold = 0.0
+            frontier_row = -1
+            for plist, weight, rows, size in lists:
+                if depth >= size:
+                    continue
+                row_id = rows[depth]
+                tf = plist[row_id]
+                threshold += weight * tf / (tf + base + slope * lengths[row_id])
+                if row_id > frontier_row:
+                    frontier_row = row_id
+                if row_id in seen:
+                    continue
+                seen.add(row_id)
+                norm = slope * lengths[row_id]
+                score = 0.0
+                for other, other_weight, _, _ in lists:
+                    other_tf = other.get(row_id)
+                    if other_tf is not None:
+                        score += other_weight * other_tf / (other_tf + base + norm)
+                if len(heap) < top_k:
+                    heapq.heappush(heap, (score, -row_id))
+                elif (score, -row_id) > heap[0]:
+                    heapq.heapreplace(heap, (score, -row_id))
+            # An unread row scores at most threshold, and on a tie its id is past every frontier row
+            if len(heap) == top_k and (heap[0][0] > threshold or
+                                       (heap[0][0] == threshold and -heap[0][1] <= frontier_row)):
+                break
+        return [(-neg_row, score) for score, neg_row in sorted(heap, reverse=True)]
+
+
+def trigrams(word: str) -> List[str]:
+    """Padded character trigrams: "beard" -> ^be, bea, ear, ard, rd$"""
+    padded = f"^{word}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """Edit distance between a and b, or max_distance + 1 as soon as it is certain to exceed it"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class TrigramIndex:
+    """
+    Character-trigram index over a vocabulary (product-name and brand words).
+    Candidates for a misspelled word come from its trigram posting lists, so a
+    lookup touches only words that share trigrams with it; the survivors are
+    re-ranked by bounded edit distance. Words whose frequency drops to zero stay
+    in the vocabulary but are never suggested.
+    """
+
+    def __init__(self):
+        self.words: List[str] = []
+        self.frequency: List[int] = []
+        self._word_ids: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self._owned: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        word_id = self._word_ids.get(word)
+        return word_id is not None and self.frequency[word_id] > 0
+
+    def add(self, word: str, count: int = 1):
+        word_id = self._word_ids.get(word)
+        if word_id is not None:
+            self.frequency[word_id] += count
+            return
+        word_id = self._word_ids[word] = len(self.words)
+        self.words.append(word)
+        self.frequency.append(count)
+        for gram in set(trigrams(word)):
+            if gram not in self._owned:
+                self.postings[gram] = list(self.postings.get(gram, ()))
+                self._owned.add(gram)
+            self.postings[gram].append(word_id)
+
+    def remove(self, word: str, count: int = 1):
+        """Undo add(word, count), e.g. for the old values of a replaced row"""
+        word_id = self._word_ids.get(word)
+        if word_id is not None:
+            self.frequency[word_id] = max(0, self.frequency[word_id] - count)
+
+    def copy(self) -> "TrigramIndex":
+        """Independent copy that can grow without touching this index; gram lists are copied on write"""
+        other = TrigramIndex()
+        other.words = list(self.words)
+        other.frequency = list(self.frequency)
+        other._word_ids = dict(self._word_ids)
+        other.postings = dict(self.postings)
+        self._owned = set()
+        return other
+
+    def memory_bytes(self) -> int:
+        """Approximate resident bytes of the vocabulary and its trigram posting lists"""
+        size = sum(sys.getsizeof(c) for c in (self.words, self.frequency, self._word_ids, self.postings, self._owned))
+        # Word ids are shared by _word_ids and the gram lists
+        size += sum(sys.getsizeof(w) for w in self.words) + INT_BYTES * len(self.words)
+        size += sum(sys.getsizeof(gram) + sys.getsizeof(ids) for gram, ids in self.postings.items())
+        return size
+
+    def candidates(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Vocabulary words within max_distance edits as (word, distance, frequency), closest first"""
+        if word in self:
+            return [(word, 0, self.frequency[self._word_ids[word]])]
+        if max_distance is None:
+            max_distance = 1 if len(word) <= 4 else 2
+
+        grams = set(trigrams(word))
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for word_id in self.postings.get(gram, ()):
+                shared[word_id] = shared.get(word_id, 0) + 1
+
+        # Each edit destroys at most three padded trigrams
+        min_shared = max(1, len(grams) - 3 * max_distance)
+        shortlist = [(word_id, count) for word_id, count in shared.items()
+                     if count >= min_shared and self.frequency[word_id]]
+        # Only the words sharing the most trigrams are worth an edit-distance check
+        if len(shortlist) > MAX_TRIGRAM_CANDIDATES:
+            shortlist = heapq.nlargest(MAX_TRIGRAM_CANDIDATES, shortlist, key=lambda item: item[1])
+        ranked = []
+        for word_id, count in shortlist:
+            candidate = self.words[word_id]
+            distance = bounded_levenshtein(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            ranked.append(((distance, -count, -self.frequency[word_id]), candidate))
+        ranked.sort()
+        return [(candidate, key[0], -key[2]) for key, candidate in ranked]
+
+    def lookup(self, word: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """Closest vocabulary word within max_distance edits (ties go to the more frequent word)"""
+        ranked = self.candidates(word, max_distance)
+        return ranked[0][0] if ranked else None
@@ -0,0 +1,16 @@
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Query parameters that never change which product a URL points to
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "ref", "ref_", "referrer", "source", "src", "sr", "qid", "spm"}
+
+def canonical_url(url: str) -> str:
+    """Normalize a URL so the same product page always maps to the same key"""
+    if not url:
+        return ""
+    parts = urlparse(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunparse((parts.scheme.lower() or "https", parts.netloc.lower(), path, "", urlencode(query), ""))
@@ -0,0 +1,81 @@
+"""
+Pandas vs lite knowledge-base backends on catalogs of realistic size.
+
+Each backend is measured in a fresh interpreter, so import time and peak RSS
+are not polluted by the other backend: import time of the backend module,
+load time and peak RSS after loading the catalog, and the latency of the
+query methods the chat graph calls.
+
+Run with: python -m benchmarks.bench_backends
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import write_catalog
+
+SIZES = [50, 500, 3_000]
+BACKENDS = {
+    "pandas": ("app.utils.csv_handler", "CSVKnowledgeBase"),
+    "lite": ("app.utils.lite_kb", "LiteKnowledgeBase"),
+}
+
+# Runs in the child interpreter; prints one JSON line
+CHILD = r"""
+import importlib, json, os, resource, sys, time
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+from benchmarks.common import timeit
+module_name, class_name, csv_path = sys.argv[1:4]
+
+start = time.perf_counter()
+module = importlib.import_module(module_name)
+import_ms = (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+kb = getattr(module, class_name)(csv_path)
+load_ms = (time.perf_counter() - start) * 1000
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+queries = {
+    "search": lambda: kb.search_products("beardo cordless trimmer", top_k=5).to_list(),
+    "filter": lambda: kb.filter_products(kb.parse_query("nivea shampoo under 1500 rated above 4"), top_k=5).to_list(),
+    "best value": lambda: kb.get_best_value_products(top_n=5).to_list(),
+    "top rated": lambda: kb.get_top_rated_products(top_n=5).to_list(),
+    "summary": lambda: kb.get_product_summary(),
+}
+print(json.dumps({
+    "import_ms": import_ms,
+    "load_ms": load_ms,
+    "rss_mb": rss_mb,
+    "pandas_loaded": "pandas" in sys.modules,
+    "queries": {name: timeit(fn, repeat=50) for name, fn in queries.items()},
+}))
+"""
+
+def measure(backend: str, csv_path: str) -> dict:
+    module_name, class_name = BACKENDS[backend]
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "benchmark"))
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, module_name, class_name, csv_path],
+        capture_output=True, text=True, check=True, env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            csv_path = write_catalog(os.path.join(tmp, f"catalog_{n}.csv"), n)
+            print(f"\nCatalog: {n} rows")
+            results = {backend: measure(backend, csv_path) for backend in BACKENDS}
+            print(f"  {'':>12} " + " ".join(f"{b:>10}" for b in results))
+            for key, label in [("import_ms", "import ms"), ("load_ms", "load ms"), ("rss_mb", "peak RSS MB")]:
+                print(f"  {label:>12} " + " ".join(f"{r[key]:10.1f}" for r in results.values()))
+            print(f"  {'pandas used':>12} " + " ".join(f"{str(r['pandas_loaded']):>10}" for r in results.values()))
+            for query in results["pandas"]["queries"]:
+                print(f"  {query:>12} " + " ".join(f"{r['queries'][query]:10.3f}" for r in results.values()) + "  ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+PDP extraction: BeautifulSoup selector cascade vs the single-pass lxml engine.
+
+The baseline is the extractor the engine replaced: an html.parser soup queried
+with one select()/select_one() per fallback selector, an attribute scan over
+every element for the rating and a full get_text() of the document. Both run
+on the same synthetic product pages (JSON-LD, meta-only and markup-only
+variants); fields are compared before timing.
+
+Run with: python -m benchmarks.bench_extract
+"""
+import re
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from benchmarks.common import PDP_KINDS, synthetic_pdp_pages
+from app.tools.pdp_extract import (
+    CTA_PATTERNS, clean_description_text, extract_breadcrumbs_from_jsonld, extract_brand_from_jsonld,
+    extract_product, extract_reviews_from_jsonld, find_jsonld_of_type, parse_jsonld_texts, parse_rating_string,
+)
+
+N_PAGES = 60
+BASE_URL = "https://shop.example.com/"
+MAX_REVIEWS = 5
+
+def _brand_from_dom(soup):
+    for sel in ["[itemprop='brand']", ".brand", ".product-brand", ".brand-name", ".manufacturer",
+                ".product-manufacturer", "meta[name='brand']", "meta[property='product:brand']"]:
+        el = soup.select_one(sel)
+        if el:
+            val = (el.get("content") or "") if el.name == "meta" else el.get_text(strip=True)
+            if val:
+                return val
+    title = soup.select_one("h1, h1.title, .pdp-title")
+    if title:
+        m = re.search(r'by\s+([A-Za-z0-9 &\.-]{2,50})$', title.get_text(" ", strip=True), flags=re.I)
+        if m:
+            return m.group(1).strip()
+    return ""
+
+def _rating_from_dom(soup):
+    for el in soup.select("[aria-label], [title], [alt]"):
+        for attr in ("aria-label", "title", "alt"):
+            v = el.get(attr)
+            if v:
+                rv = parse_rating_string(v)
+                if rv is not None:
+                    return f"{rv}/5"
+    m = re.search(r'(\d(?:\.\d)?)\s*(?:/|out of)\s*5', soup.get_text(" ", strip=True))
+    return f"{float(m.group(1))}/5" if m else None
+
+def _reviews_from_dom(soup):
+    collected = []
+    for sel in [".review", ".reviewCard", ".user-review", ".comment", ".product-review", ".rvw"]:
+        for el in soup.select(sel):
+            text = el.get_text(" ", strip=True)
+            if not text or len(text) < 30:
+                continue
+            rating_text = ""
+            for attr in ("aria-label", "title", "alt"):
+                rv = parse_rating_string(el.get(attr) or "")
+                if rv:
+                    rating_text = f"{rv}/5"
+                    break
+            inner = el.select_one("[aria-label], .rating, .stars, .ratingValue")
+            if inner and not rating_text:
+                rv = parse_rating_string(inner.get("aria-label") or inner.get("title") or inner.get_text(" ", strip=True))
+                if rv:
+                    rating_text = f"{rv}/5"
+            auth = el.select_one(".author, .user-name, .review-author")
+            collected.append(f"{auth.get_text(' ', strip=True) if auth else ''}|{rating_text}|{text}")
+            if len(collected) >= MAX_REVIEWS:
+                break
+        if collected:
+            break
+    return collected
+
+def cascade_extract(html: str, base_url: str) -> dict:
+    """The BeautifulSoup extractor replaced by app.tools.pdp_extract"""
+    soup = BeautifulSoup(html, "html.parser")
+    out = dict.fromkeys(["name", "brand", "price", "currency", "description", "images", "breadcrumbs", "rating", "review_count", "reviews"], "")
+    blocks = parse_jsonld_texts([t.string or t.get_text() or "" for t in soup.select("script[type='application/ld+json']")])
+    product = find_jsonld_of_type(blocks, "Product")
+
+    out["name"] = (product or {}).get("name") or ""
+    if not out["name"]:
+        og = soup.select_one("meta[property='og:title'], meta[name='og:title']")
+        out["name"] = (og.get("content") or "") if og else ""
+    if not out["name"] and soup.select_one("h1"):
+        out["name"] = soup.select_one("h1").get_text(" ", strip=True)
+    out["brand"] = extract_brand_from_jsonld(product) or _brand_from_dom(soup)
+
+    offers = (product or {}).get("offers") or {}
+    if isinstance(offers, list):
+        offers = offers[0] if offers else {}
+    if offers:
+        out["price"] = offers.get("price") or offers.get("priceSpecification", {}).get("price") or ""
+        out["currency"] = offers.get("priceCurrency") or ""
+    if not out["price"]:
+        el = soup.select_one("[itemprop='price'], .price, .product-price, .selling-price, .a-price")
+        if el:
+            out["price"] = el.get("content") or el.get_text(" ", strip=True)
+
+    desc = (product or {}).get("description") or ""
+    if not desc:
+        el = soup.select_one("meta[property='og:description'], meta[name='description']")
+        desc = (el.get("content") or "") if el else ""
+    if not desc:
+        el = soup.select_one("[itemprop='description']")
+        desc = (el.get_text(" ", strip=True) or el.get("content") or "") if el else ""
+    if not desc:
+        for sel in ["div.pdp-description", "div.product-description", "#description", ".pdp-product-more", ".productDescription"]:
+            el = soup.select_one(sel)
+            if el and el.get_text(strip=True):
+                desc = el.get_text(" ", strip=True)
+                break
+    out["description"] = clean_description_text(desc)
+
+    imgs = []
+    image = (product or {}).get("image")
+    imgs.extend(image if isinstance(image, list) else [image] if isinstance(image, str) else [])
+    if not imgs and soup.select_one("meta[property='og:image']"):
+        imgs.append(soup.select_one("meta[property='og:image']").get("content"))
+    if not imgs:
+        for img in soup.select("img"):
+            src = img.get("src") or img.get("data-src") or img.get("data-lazy-src")
+            if src and len(imgs) < 6:
+                imgs.append(urljoin(base_url, src))
+    out["images"] = ", ".join(imgs)
+
+    bc = extract_breadcrumbs_from_jsonld(blocks)
+    if not bc:
+        for sel in ["nav[aria-label*='breadcrumb']", "nav.breadcrumb", ".breadcrumbs", ".breadcrumb", "ul.breadcrumbs", "ol.breadcrumb"]:
+            el = soup.select_one(sel)
+            texts = [a.get_text(" ", strip=True) for a in el.select("a, li, span") if a.get_text(strip=True)] if el else []
+            if texts:
+                if out["name"] and texts[-1].strip() == out["name"].strip():
+                    texts = texts[:-1]
+                bc = "/".join(texts)
+                break
+    out["breadcrumbs"] = "/".join(p.strip() for p in bc.split("/") if p.strip() and len(p.strip()) < 80 and not any(pat.search(p) for pat in CTA_PATTERNS))
+
+    reviews, rating, count = extract_reviews_from_jsonld(product, max_reviews=MAX_REVIEWS)
+    agg = find_jsonld_of_type(blocks, "AggregateRating") if not rating else None
+    if agg:
+        rv = agg.get("ratingValue") or agg.get("rating")
+        rating, count = (f"{rv}/5" if rv else None), agg.get("reviewCount") or agg.get("ratingCount")
+    if not rating:
+        rating, count = _rating_from_dom(soup), None
+    out["reviews"] = " || ".join(reviews or _reviews_from_dom(soup))
+    out["rating"] = rating or ""
+    out["review_count"] = count or ""
+    return {k: " ".join(v.split()) if isinstance(v, str) else v for k, v in out.items()}
+
+def pages_per_second(fn, pages, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html, BASE_URL)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+def main():
+    pages = synthetic_pdp_pages(N_PAGES)
+    size_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"Fixtures: {len(pages)} product pages ({', '.join(PDP_KINDS)}), {size_kb:.0f} KB on average")
+
+    mismatches = [(i, k) for i, html in enumerate(pages)
+                  for k, v in cascade_extract(html, BASE_URL).items() if extract_product(html, BASE_URL, MAX_REVIEWS)[k] != v]
+    print(f"Field mismatches between extractors: {len(mismatches)}" + (f" (first: {mismatches[:5]})" if mismatches else ""))
+
+    for kind in PDP_KINDS:
+        subset = pages[PDP_KINDS.index(kind)::len(PDP_KINDS)]
+        before = pages_per_second(cascade_extract, subset)
+        after = pages_per_second(lambda html, base: extract_product(html, base, MAX_REVIEWS), subset)
+        print(f"  {kind:>7}: cascade {before:7.1f} pages/s | single pass {after:7.1f} pages/s | {after / before:5.1f}x")
+
+if __name__ == "__main__":
+    main()
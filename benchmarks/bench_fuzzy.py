@@ -0,0 +1,34 @@
+"""
+Typo-tolerant lookups on a 100k-product catalog.
+
+Measures the trigram candidate lookup alone and a full search_products call
+with misspelled queries (both should stay in the low milliseconds).
+
+Run with: python -m benchmarks.bench_fuzzy
+"""
+import os
+import tempfile
+
+from benchmarks.common import timeit, write_catalog
+from app.utils.csv_handler import CSVKnowledgeBase
+
+N_ROWS = 100_000
+
+TYPOS = ["bearddo", "philps", "gilete", "mamaerth", "moisturiser", "condtioner", "shampo", "lipstik"]
+QUERIES = ["bearddo trimer", "philps shampo", "gilete beard oil", "lakmee lipstik"]
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        kb = CSVKnowledgeBase(write_catalog(os.path.join(tmp, "catalog.csv"), N_ROWS))
+
+    print(f"Catalog: {kb.get_product_count()} rows, {len(kb.trigrams)} name/brand words in trigram index")
+    for word in TYPOS:
+        ms = timeit(lambda: kb.trigrams.lookup(word), repeat=50)
+        print(f"  lookup {word!r:>15} -> {kb.trigrams.lookup(word)!r:<15} {ms:6.3f} ms")
+    for query in QUERIES:
+        ms = timeit(lambda: kb.search_products(query, top_k=5).to_list(), repeat=10)
+        top = kb.search_products(query, top_k=1)
+        print(f"  search {query!r:>20} {ms:7.2f} ms  top: {top[0]['name'] if len(top) else '-'}")
+
+if __name__ == "__main__":
+    main()
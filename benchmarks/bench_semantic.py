@@ -0,0 +1,61 @@
+"""
+Keyword (BM25) vs semantic (hashed n-gram vectors) product search.
+
+Queries are paraphrased (plurals, British spellings, partial words) and each
+has a ground truth of (brand, product noun). Reports per-query latency and
+precision@10 / hit@10 against that ground truth.
+
+Run with: python -m benchmarks.bench_semantic
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.common import timeit, write_catalog
+from app.utils.csv_handler import CSVKnowledgeBase
+
+N_ROWS = 20_000
+TOP_K = 10
+
+QUERIES = [
+    ("dove moisturising cream", "Dove", "moisturizer"),
+    ("beardo trimmers", "Beardo", "trimmer"),
+    ("shampoos by philips", "Philips", "shampoo"),
+    ("lakme lipstick shades", "Lakme", "lipstick"),
+    ("nivea conditioners for frizzy hair", "Nivea", "conditioner"),
+    ("gillette beard oils", "Gillette", "beard oil"),
+    ("mamaearth facewash", "Mamaearth", "face wash"),
+    ("ustraa serums", "Ustraa", "serum"),
+]
+
+def relevant(product, brand, noun):
+    return product.get("brand") == brand and noun in str(product.get("name", ""))
+
+def evaluate(search):
+    precision, hits = 0.0, 0
+    for query, brand, noun in QUERIES:
+        results = list(search(query))
+        good = sum(relevant(p, brand, noun) for p in results)
+        precision += good / TOP_K
+        hits += good > 0
+    return precision / len(QUERIES), hits / len(QUERIES)
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        kb = CSVKnowledgeBase(write_catalog(os.path.join(tmp, "catalog.csv"), N_ROWS))
+        start = time.perf_counter()
+        kb.semantic_search("warm up")
+        build_ms = (time.perf_counter() - start) * 1000
+
+        modes = [
+            ("keyword", lambda q: kb.search_products(q, top_k=TOP_K)),
+            ("semantic", lambda q: kb.semantic_search(q, top_k=TOP_K)),
+        ]
+        print(f"Catalog: {kb.get_product_count()} rows, vector index built in {build_ms:.0f} ms")
+        for label, search in modes:
+            latency = sum(timeit(lambda: search(q), repeat=5) for q, _, _ in QUERIES) / len(QUERIES)
+            precision, hit_rate = evaluate(search)
+            print(f"{label:>9}: {latency:7.2f} ms/query | precision@{TOP_K} {precision:.2f} | hit@{TOP_K} {hit_rate:.2f}")
+
+if __name__ == "__main__":
+    main()
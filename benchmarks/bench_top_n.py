@@ -0,0 +1,36 @@
+"""
+Top-N selection: full sort_values().head() vs partial nsmallest/nlargest.
+
+Run with: python -m benchmarks.bench_top_n
+"""
+import os
+import tempfile
+
+from benchmarks.common import timeit, write_catalog
+from app.utils.csv_handler import CSVKnowledgeBase
+
+N_ROWS = 100_000
+TOP_N = 5
+
+def full_sort_best_value(df):
+    return df.dropna(subset=['price_numeric']).sort_values('price_numeric').head(TOP_N).to_dict('records')
+
+def full_sort_top_rated(df):
+    return df.dropna(subset=['rating_numeric']).sort_values('rating_numeric', ascending=False).head(TOP_N).to_dict('records')
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        kb = CSVKnowledgeBase(write_catalog(os.path.join(tmp, "catalog.csv"), N_ROWS))
+
+    print(f"Catalog: {kb.get_product_count()} rows, top_n={TOP_N}")
+    cases = [
+        ("best value", lambda: full_sort_best_value(kb.df), lambda: kb.get_best_value_products(top_n=TOP_N).to_list()),
+        ("top rated", lambda: full_sort_top_rated(kb.df), lambda: kb.get_top_rated_products(top_n=TOP_N).to_list()),
+    ]
+    for label, before, after in cases:
+        before_ms = timeit(before)
+        after_ms = timeit(after)
+        print(f"{label:>12}: full sort {before_ms:8.2f} ms | partial select {after_ms:8.2f} ms | {before_ms / after_ms:5.1f}x")
+
+if __name__ == "__main__":
+    main()
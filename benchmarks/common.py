@@ -0,0 +1,103 @@
+"""Shared helpers for the micro-benchmarks in this directory"""
+import csv
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, List
+
+# Settings are loaded at import time by the app modules; benchmarks never call the LLM
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+FIELDNAMES = ["name", "brand", "price", "link", "image", "description", "breadcrumbs", "rating", "review_count", "reviews"]
+
+BRANDS = ["Beardo", "Philips", "Nivea", "Lakme", "Mamaearth", "Dove", "Gillette", "Bombay Shaving Company", "Ustraa", "WOW"]
+CATEGORIES = ["Home/Men/Grooming/Trimmers", "Home/Hair/Conditioner", "Home/Hair/Shampoo", "Home/Skin/Moisturizer", "Home/Makeup/Lipstick"]
+NOUNS = ["trimmer", "conditioner", "shampoo", "moisturizer", "lipstick", "beard oil", "face wash", "serum"]
+ADJECTIVES = ["nourishing", "cordless", "matte", "hydrating", "anti-frizz", "herbal", "waterproof", "lightweight"]
+
+def synthetic_rows(n: int, seed: int = 42) -> List[Dict[str, str]]:
+    """Generate n scraped-looking product rows"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        brand = rng.choice(BRANDS)
+        noun = rng.choice(NOUNS)
+        adjective = rng.choice(ADJECTIVES)
+        rows.append({
+            "name": f"{brand} {adjective} {noun} {i}",
+            "brand": brand,
+            "price": f"₹{rng.randint(99, 4999):,}",
+            "link": f"https://shop.example.com/p/{i}",
+            "image": f"https://img.example.com/{i}.jpg",
+            "description": f"A {adjective} {noun} from {brand} for everyday use, suitable for dry and frizzy hair or sensitive skin.",
+            "breadcrumbs": rng.choice(CATEGORIES),
+            "rating": f"{rng.uniform(2.5, 5):.1f}/5" if rng.random() > 0.1 else "",
+            "review_count": str(rng.randint(0, 5000)),
+            "reviews": f"user{i}|4.0/5|Really liked this {noun}" if rng.random() > 0.3 else "",
+        })
+    return rows
+
+def write_catalog(path: str, n: int, seed: int = 42) -> str:
+    """Write a synthetic catalog CSV with n rows and return its path"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(synthetic_rows(n, seed))
+    return path
+
+def timeit(fn: Callable, repeat: int = 20) -> float:
+    """Return the best wall time of fn() in milliseconds over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+PDP_KINDS = ["jsonld", "meta", "dom"]
+
+def synthetic_pdp(row: Dict[str, str], kind: str, rng: random.Random) -> str:
+    """
+    Render a product page for row the way a real site would:
+    "jsonld" carries Product/BreadcrumbList JSON-LD, "meta" only og/meta tags and
+    itemprops, "dom" nothing but markup. Every page has a large menu, footer
+    and inline scripts around the product block.
+    """
+    menu = "".join(f'<li><a href="/c/{j}" title="Category {j}">Category {j}</a><span aria-label="menu item {j}">+</span></li>'
+                   for j in range(rng.randint(150, 400)))
+    footer = "".join(f'<p class="footer-text">Shipping, returns and warranty terms, section {j}, apply to all orders.</p>' for j in range(60))
+    scripts = "".join(f'<script>window.__state{j} = {{"chunk": "{"x" * 200}"}};</script>' for j in range(20))
+    reviews = "".join(
+        f'<div class="review"><span class="author">user{k}</span><span aria-label="{rng.randint(1, 5)} out of 5 stars"></span>'
+        f'<p>Really liked this product, works as described and arrived quickly ({k}).</p></div>' for k in range(8))
+    crumbs = "".join(f"<li><a href='/{c}'>{c}</a></li>" for c in row["breadcrumbs"].split("/"))
+    if kind == "jsonld":
+        product = {
+            "@context": "https://schema.org", "@type": "Product", "name": row["name"],
+            "brand": {"@type": "Brand", "name": row["brand"]}, "description": row["description"],
+            "image": [row["image"]], "offers": {"@type": "Offer", "price": row["price"], "priceCurrency": "INR"},
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.3", "reviewCount": row["review_count"]},
+        }
+        breadcrumbs = {"@context": "https://schema.org", "@type": "BreadcrumbList",
+                       "itemListElement": [{"position": i + 1, "name": c} for i, c in enumerate(row["breadcrumbs"].split("/"))]}
+        head = "".join(f'<script type="application/ld+json">{json.dumps(block)}</script>' for block in (product, breadcrumbs))
+        body = f"<h1>{row['name']}</h1>{reviews}"
+    elif kind == "meta":
+        head = (f'<meta property="og:title" content="{row["name"]}"><meta name="description" content="{row["description"]}">'
+                f'<meta property="og:image" content="{row["image"]}">')
+        body = (f'<h1>{row["name"]}</h1><div itemprop="brand"><span>{row["brand"]}</span></div>'
+                f'<span itemprop="price" content="{row["price"]}">{row["price"]}</span>'
+                f'<nav aria-label="breadcrumb"><ol>{crumbs}</ol></nav><div class="rating" aria-label="4.1 out of 5 stars"></div>{reviews}')
+    else:
+        head = ""
+        body = (f'<h1 class="pdp-title">{row["name"]} by {row["brand"]}</h1><div class="price-block"><span class="selling-price">{row["price"]}</span></div>'
+                f'<div class="pdp-description">Details\n{row["description"]}\nAdd to bag</div><ul class="breadcrumbs">{crumbs}</ul>'
+                f'<p>Rated 4.2/5 by verified buyers</p>{reviews}<img src="/img/{rng.randint(1, 999)}.jpg">')
+    return (f"<!DOCTYPE html><html><head><title>{row['name']}</title>{head}{scripts}</head>"
+            f"<body><header><ul>{menu}</ul></header><main>{body}</main><!-- recommendations --><footer>{footer}</footer></body></html>")
+
+def synthetic_pdp_pages(n: int, seed: int = 42) -> List[str]:
+    """n product pages cycling through PDP_KINDS"""
+    rng = random.Random(seed)
+    return [synthetic_pdp(row, PDP_KINDS[i % len(PDP_KINDS)], rng) for i, row in enumerate(synthetic_rows(n, seed))]
@@ -0,0 +1,213 @@
+"""
+Shared fixtures: import paths and settings for the app modules, a local HTTP
+server that serves the fixture pages the fetch and page-cache tests request,
+and small catalogs for the knowledge-base tests.
+"""
+import csv
+import gzip
+import os
+import sys
+import tempfile
+import threading
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The scraper modules import each other by bare name, the same way scraper_tool loads them
+sys.path.insert(0, os.path.join(ROOT, "app", "tools"))
+sys.path.insert(0, ROOT)
+# app.config needs an API key; catalog files go to a throwaway data directory
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="chatbot-tests-"))
+
+PRODUCT_HTML = (
+    '<html><head><script type="application/ld+json">'
+    '{"@type": "Product", "name": "Fixture Trimmer", "brand": "Acme", "offers": {"price": "1299"}}'
+    "</script></head><body><h1>Fixture Trimmer</h1>" + "<p>Cordless, 60 minute runtime.</p>" * 50 + "</body></html>"
+)
+# Client-rendered page: no product data until a browser runs its scripts
+SHELL_HTML = '<html><body><div id="root"></div><script src="/app.js"></script></body></html>'
+BOT_WALL_HTML = "<html><head><title>Robot Check</title></head><body>Please solve the captcha to continue.</body></html>"
+ETAG = '"fixture-v1"'
+# Two listing pages of product cards, linked by a "Next" pagination link
+LISTING_PAGES = {"/listing": range(1, 6), "/listing?page=2": range(6, 10)}
+
+
+def listing_html(path: str) -> str:
+    cards = "".join(
+        f'<div class="product"><a href="/product/{i}"><h3>Trimmer {i}</h3></a><span class="price">₹{i}99</span></div>'
+        for i in LISTING_PAGES[path]
+    )
+    next_link = '<a href="/listing?page=2">Next</a>' if path == "/listing" else ""
+    return f"<html><body>{cards}{next_link}</body></html>"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, so connection reuse is observable
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.requests.append((self.path, dict(self.headers)))
+
+        if self.path == "/redirect":
+            return self._send(302, b"", {"Location": "/product"})
+        if self.path == "/redirect-loop":
+            return self._send(302, b"", {"Location": "/redirect-loop"})
+        if self.path == "/blocked":
+            return self._send(403, b"<html>Forbidden</html>")
+        if self.path == "/wall":
+            return self._send(200, BOT_WALL_HTML.encode("utf-8"))
+        if self.path in LISTING_PAGES:
+            return self._send(200, listing_html(self.path).encode("utf-8"))
+        if self.path == "/shell":
+            return self._send(200, SHELL_HTML.encode("utf-8"))
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == ETAG:
+                return self._send(304, b"", {"ETag": ETAG})
+            return self._send(200, PRODUCT_HTML.encode("utf-8"), {"ETag": ETAG})
+        if self.path.startswith("/product"):
+            body = PRODUCT_HTML.encode("utf-8")
+            headers = {}
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            return self._send(200, body, headers)
+        self._send(404, b"<html>Not found</html>")
+
+    def _send(self, status: int, body: bytes, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+
+class FixtureServer:
+    """Handle on the running server; connections holds the client address of every request"""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = set()
+        self.httpd.requests = []
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}{path}"
+
+    @property
+    def connections(self) -> set:
+        return self.httpd.connections
+
+    @property
+    def requests(self) -> list:
+        return self.httpd.requests
+
+    def reset(self):
+        with self.httpd.lock:
+            self.httpd.connections.clear()
+            self.httpd.requests.clear()
+
+
+@pytest.fixture(scope="session")
+def _server():
+    server = FixtureServer()
+    server.thread.start()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+@pytest.fixture
+def fixture_server(_server):
+    _server.reset()
+    return _server
+
+
+@pytest.fixture
+def client():
+    from http_fetch import HttpClient
+    client = HttpClient("pytest-fixture-client")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def scrape_general():
+    # get_page / get_static_page live next to the Selenium driver code
+    pytest.importorskip("selenium")
+    import scrape_general
+    return scrape_general
+
+
+@pytest.fixture
+def limiter(scrape_general):
+    return scrape_general.DomainLimiter(min_interval=0.0, max_concurrent=2)
+
+
+class FakeDriver:
+    """Stands in for Chromium: "renders" every URL to the product page"""
+
+    def __init__(self):
+        self.visited = []
+        self.page_source = ""
+
+    def get(self, url):
+        self.visited.append(url)
+        self.page_source = PRODUCT_HTML
+
+    def execute_script(self, script, *args):
+        return True
+
+
+class FakePool:
+    """BrowserPool stand-in whose lease() hands out one FakeDriver"""
+
+    def __init__(self):
+        self.driver = FakeDriver()
+
+    def lease(self):
+        return nullcontext(self.driver)
+
+    def stats(self):
+        return {"leases": len(self.driver.visited)}
+
+
+@pytest.fixture
+def fake_pool():
+    return FakePool()
+
+
+CATALOG_FIELDS = ["name", "brand", "price", "link", "image", "description", "breadcrumbs", "rating", "review_count", "reviews"]
+
+
+def write_catalog(path, rows) -> str:
+    """Catalog CSV with the scraper's columns; rows give only the fields they need"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CATALOG_FIELDS)
+        writer.writeheader()
+        for i, row in enumerate(rows):
+            writer.writerow({"link": f"https://shop.example/p/{i}", **row})
+    return str(path)
+
+
+@pytest.fixture(params=["pandas", "lite"])
+def kb_class(request):
+    """Each knowledge-base backend in turn"""
+    if request.param == "lite":
+        from app.utils.lite_kb import LiteKnowledgeBase
+        return LiteKnowledgeBase
+    pytest.importorskip("pandas")
+    from app.utils.csv_handler import CSVKnowledgeBase
+    return CSVKnowledgeBase
@@ -0,0 +1,13 @@
+from conftest import write_catalog
+from app.utils import catalog_cache
+
+
+def test_failed_merge_keeps_the_existing_catalog(tmp_path, monkeypatch):
+    base = write_catalog(tmp_path / "base.csv", [{"name": "Nivea Cream", "brand": "Nivea"}])
+    addition = write_catalog(tmp_path / "addition.csv", [{"name": "Dove Shampoo", "brand": "Dove", "link": "https://shop.example/dove"}])
+
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(catalog_cache.catalog_store, "catalog_file", broken)
+
+    assert catalog_cache.merge_catalogs(base, addition) == base
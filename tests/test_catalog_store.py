@@ -0,0 +1,58 @@
+import csv
+import os
+
+from conftest import CATALOG_FIELDS
+from app.utils import catalog_store as catalog_store_module
+from app.utils.catalog_store import CatalogStore
+from app.utils.catalog_stream import CatalogStream
+
+URL = "https://shop.example/listing"
+
+
+def test_partial_catalog_keeps_committed_rows_without_claiming_the_source(tmp_path):
+    store = CatalogStore(str(tmp_path / "store"))
+    csv_path = str(tmp_path / "session.csv")
+    stream = CatalogStream(csv_path, CATALOG_FIELDS, checkpoint_rows=2)
+    for i in range(3):
+        stream.write({"name": f"Trimmer {i}", "brand": "Acme", "link": f"https://shop.example/p/{i}"})
+    # The scrape fails after two committed rows; the third was written but never checkpointed
+    stream._file.flush()
+
+    shared = store.ingest_csv(URL, csv_path, complete=False)
+
+    with open(shared, newline="", encoding="utf-8") as f:
+        assert [row["name"] for row in csv.DictReader(f)] == ["Trimmer 0", "Trimmer 1"]
+    assert store.get_product("https://shop.example/p/1")["brand"] == "Acme"
+    # A later request for the URL scrapes it again instead of reusing the partial catalog
+    assert store.catalog_for_source(URL) is None
+    stream.close()
+    assert store.ingest_csv(URL, csv_path) is not None
+    assert store.catalog_for_source(URL) is not None
+
+
+def test_directories_are_created_on_first_write(tmp_path):
+    store = CatalogStore(str(tmp_path / "store"))
+    assert not os.path.exists(tmp_path / "store")
+    assert store.get_product("https://shop.example/p/1") is None
+
+    store.catalog_path(store.put_products([{"name": "Trimmer", "link": "https://shop.example/p/1"}]))
+    assert os.path.isdir(store.catalog_dir)
+
+
+def test_products_file_is_compacted_when_mostly_superseded(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_store_module, "COMPACT_MIN_LINES", 20)
+    writer = CatalogStore(str(tmp_path / "store"))
+    # Stands in for another process reading the same store
+    reader = CatalogStore(str(tmp_path / "store"))
+    rows = [{"name": f"Trimmer {i}", "link": f"https://shop.example/p/{i}"} for i in range(5)]
+    products_path = os.path.join(writer.root, "products.jsonl")
+
+    for scrape in range(12):
+        writer.put_products([dict(row, price=f"₹{scrape}99") for row in rows])
+        assert reader.get_product("https://shop.example/p/3")["price"] == f"₹{scrape}99"
+        with open(products_path, encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+        assert lines <= 20 + len(rows)
+
+    assert lines < 12 * len(rows)
+    assert [reader.get_product(row["link"])["price"] for row in rows] == ["₹1199"] * len(rows)
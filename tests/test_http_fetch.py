@@ -0,0 +1,114 @@
+import csv
+
+import pytest
+
+from conftest import BOT_WALL_HTML, PRODUCT_HTML
+from http_fetch import BOT_WALL_MAX_BYTES, looks_like_bot_wall
+
+
+def test_keep_alive_reuses_one_connection(client, fixture_server):
+    for _ in range(3):
+        assert client.get(fixture_server.url("/product")).status == 200
+
+    assert len(fixture_server.connections) == 1
+    stats = client.stats()
+    assert stats["opened"] == 1
+    assert stats["reused"] == 2
+    assert stats["idle"] == 1
+
+
+def test_gzip_body_is_decoded(client, fixture_server):
+    resp = client.get(fixture_server.url("/product"))
+
+    assert "gzip" in fixture_server.requests[0][1]["Accept-Encoding"]
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.text == PRODUCT_HTML
+    assert 0 < resp.wire_bytes < len(resp.body)
+
+
+def test_redirect_is_followed(client, fixture_server):
+    resp = client.get(fixture_server.url("/redirect"))
+
+    assert resp.status == 200
+    assert resp.url == fixture_server.url("/product")
+    assert [path for path, _ in fixture_server.requests] == ["/redirect", "/product"]
+    # Both hops go over the same keep-alive connection
+    assert len(fixture_server.connections) == 1
+
+
+def test_redirect_loop_is_bounded(client, fixture_server):
+    with pytest.raises(ValueError):
+        client.get(fixture_server.url("/redirect-loop"), max_redirects=3)
+    assert len(fixture_server.requests) == 4
+
+
+@pytest.mark.parametrize("status, html, expected", [
+    (200, PRODUCT_HTML, False),
+    (200, BOT_WALL_HTML, True),
+    (403, "<html>Forbidden</html>", True),
+    (429, "", True),
+    (503, PRODUCT_HTML, True),
+    # A full page that merely mentions a captcha is not an interstitial
+    (200, PRODUCT_HTML + "captcha" + " " * BOT_WALL_MAX_BYTES, False),
+])
+def test_looks_like_bot_wall(status, html, expected):
+    assert looks_like_bot_wall(status, html) is expected
+
+
+@pytest.mark.parametrize("path", ["/wall", "/blocked"])
+def test_static_page_rejects_bot_walls(scrape_general, client, fixture_server, path):
+    assert scrape_general.get_static_page(fixture_server.url(path), client) is None
+
+
+def test_static_page_metrics(scrape_general, client, fixture_server):
+    html, page = scrape_general.get_static_page(fixture_server.url("/product"), client)
+
+    assert html == PRODUCT_HTML
+    assert page["served_by"] == "http"
+    assert page["status"] == 200
+    assert 0 < page["bytes"] < len(PRODUCT_HTML)
+
+
+def test_get_page_uses_http_when_usable(scrape_general, client, limiter, fake_pool, fixture_server):
+    parsed, page = scrape_general.get_page(
+        fixture_server.url("/product"), fake_pool, str, lambda html: "Fixture Trimmer" in html, limiter, client
+    )
+
+    assert page["served_by"] == "http"
+    assert parsed == PRODUCT_HTML
+    assert fake_pool.driver.visited == []
+
+
+@pytest.mark.parametrize("path", ["/shell", "/wall", "/blocked"])
+def test_get_page_falls_back_to_browser(scrape_general, client, limiter, fake_pool, fixture_server, path):
+    url = fixture_server.url(path)
+    parsed, page = scrape_general.get_page(url, fake_pool, str, lambda html: "Fixture Trimmer" in html, limiter, client)
+
+    assert page["served_by"] == "browser"
+    assert parsed == PRODUCT_HTML
+    assert fake_pool.driver.visited == [url]
+    assert [p for p, _ in fixture_server.requests] == [path]
+
+
+def test_get_page_without_client_goes_straight_to_browser(scrape_general, limiter, fake_pool, fixture_server):
+    url = fixture_server.url("/product")
+    _, page = scrape_general.get_page(url, fake_pool, str, bool, limiter)
+
+    assert page["served_by"] == "browser"
+    assert fixture_server.requests == []
+
+
+def test_scrape_listing_end_to_end(scrape_general, limiter, fake_pool, fixture_server, tmp_path):
+    output = tmp_path / "catalog.csv"
+    summary = scrape_general.scrape(fixture_server.url("/listing"), str(output), pool=fake_pool, limiter=limiter,
+                                    infinite_scroll=False)
+
+    with open(output, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["name"] for row in rows] == [f"Trimmer {i}" for i in range(1, 10)]
+    assert [row["price"] for row in rows] == [f"₹{i}99" for i in range(1, 10)]
+    # Brand only comes from the product page, so every PDP was fetched and merged
+    assert {row["brand"] for row in rows} == {"Acme"}
+    assert set(summary["served_by"].values()) == {"http"}
+    assert len(summary["served_by"]) == 11
+    assert fake_pool.driver.visited == []
@@ -0,0 +1,118 @@
+import gc
+import os
+import random
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from conftest import write_catalog
+
+CATALOG = [
+    {"name": "Nivea Cream", "brand": "Nivea", "price": "", "rating": "4.5"},
+    {"name": "Dove Shampoo", "brand": "Dove", "price": "₹199", "rating": ""},
+    {"name": "Philips Trimmer", "brand": "Philips", "price": "₹1,499", "rating": "4.1"},
+    {"name": "Beardo Oil", "brand": "Beardo", "price": "₹349", "rating": ""},
+]
+
+
+def synthetic_catalog(n: int):
+    rng = random.Random(7)
+    brands = ["Beardo", "Philips", "Nivea", "Dove", "Gillette", "Ustraa"]
+    nouns = ["trimmer", "shampoo", "beard oil", "face wash", "serum", "conditioner"]
+    return [
+        {
+            "name": f"{rng.choice(brands)} {rng.choice(nouns)} {i}",
+            "brand": rng.choice(brands),
+            "price": f"₹{rng.randint(99, 4999):,}",
+            "description": f"A {rng.choice(nouns)} for everyday use, batch {i}, suitable for sensitive skin.",
+            "breadcrumbs": rng.choice(["Home/Men/Grooming", "Home/Hair/Shampoo", "Home/Skin/Face"]),
+            "rating": f"{rng.uniform(2.5, 5):.1f}" if rng.random() > 0.1 else "",
+            "review_count": str(rng.randint(0, 5000)),
+            "reviews": f"user{i}|Really liked this one" if rng.random() > 0.3 else "",
+        }
+        for i in range(n)
+    ]
+
+
+def names(results):
+    return [row["name"] for row in results]
+
+
+def plain_rows(results):
+    # Missing values are separate NaN objects that never compare equal
+    return [{key: value for key, value in row.items() if value == value} for row in results]
+
+
+def test_best_value_skips_unpriced_rows(kb_class, tmp_path):
+    kb = kb_class(write_catalog(tmp_path / "catalog.csv", CATALOG))
+
+    assert names(kb.get_best_value_products(top_n=10)) == ["Dove Shampoo", "Beardo Oil", "Philips Trimmer"]
+
+
+def test_top_rated_skips_unrated_rows(kb_class, tmp_path):
+    kb = kb_class(write_catalog(tmp_path / "catalog.csv", CATALOG))
+
+    assert names(kb.get_top_rated_products(top_n=10)) == ["Nivea Cream", "Philips Trimmer"]
+
+
+def test_memory_bytes_tracks_traced_allocations(kb_class, tmp_path):
+    path = write_catalog(tmp_path / "catalog.csv", synthetic_catalog(2000))
+    kb_class(path)    # first load pays for imports and module-level caches
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kb = kb_class(path)
+        gc.collect()
+        traced = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    usage = kb.memory_usage()
+    assert usage["indexes"]["index"] > sum(usage["columns"].values())
+    assert 0.75 * traced <= kb.memory_bytes() <= 1.25 * traced
+
+
+def test_sidecar_load_keeps_strings_mapped_and_matches_csv(tmp_path):
+    pytest.importorskip("pandas")
+    from app.utils.columnar import StringColumn
+    from app.utils.csv_handler import CSVKnowledgeBase
+    from app.utils.query_parser import ProductQuery
+
+    path = write_catalog(tmp_path / "catalog.csv", synthetic_catalog(500))
+    parsed = CSVKnowledgeBase(path)
+    assert parsed.save_sidecar()
+    mapped = CSVKnowledgeBase(path)
+
+    # Free text stays in the mapped blob; only the frame's numeric columns are pandas data
+    assert isinstance(mapped._columns["description"], StringColumn)
+    assert "description" not in mapped.df.columns
+    assert mapped.memory_usage()["mapped_bytes"] > 0
+    assert mapped.memory_bytes() < parsed.memory_bytes()
+
+    query = ProductQuery(max_price=2000, brands=["Philips"], categories=["grooming"], with_reviews=True, sort="rating")
+    assert plain_rows(mapped.get_all_products()) == plain_rows(parsed.get_all_products())
+    assert names(mapped.filter_products(query)) == names(parsed.filter_products(query))
+    assert names(mapped.search_products("beard oil")) == names(parsed.search_products("beard oil"))
+    assert len(mapped.get_products_with_reviews()) == len(parsed.get_products_with_reviews())
+
+    row = {"name": "Philips trimmer 9000", "brand": "Philips", "price": "₹999", "link": "https://shop.example/p/9000"}
+    assert mapped.upsert_rows([row]) == parsed.upsert_rows([row]) == (0, 1)
+    assert names(mapped.search_products("trimmer 9000"))[0] == "Philips trimmer 9000"
+
+
+def test_semantic_index_is_persisted_at_ingest(kb_class, tmp_path, monkeypatch):
+    from app.utils import catalog_search
+    from app.utils.semantic_index import SemanticIndex
+
+    monkeypatch.setattr(catalog_search.settings, "search_mode", "semantic")
+    path = write_catalog(tmp_path / "catalog.csv", synthetic_catalog(200))
+    kb_class(path).save_semantic_index()
+    assert all(os.path.exists(p) for p in SemanticIndex.paths(path))
+
+    kb = kb_class(path)
+    results = names(kb.semantic_search("philips beard trimmer"))
+    # Served from the mapped matrix written at ingest, not rebuilt
+    assert isinstance(kb._semantic.matrix, np.memmap)
+    assert results and all(name.startswith("Philips") for name in results[:3])
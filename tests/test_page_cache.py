@@ -0,0 +1,168 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import page_cache as page_cache_module
+from conftest import ETAG, PRODUCT_HTML
+from page_cache import PageCache
+
+TTL = 60
+
+
+class Clock:
+    """Stands in for page_cache's time module so entries can be aged without sleeping"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(page_cache_module, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return tmp_path
+
+
+def make_cache(data_dir, mode: str = "normal", ttl: int = TTL) -> PageCache:
+    # Same layout as scraper_tool: <data_dir>/page_cache
+    return PageCache(os.path.join(data_dir, "page_cache"), ttl_seconds=ttl, mode=mode)
+
+
+def blob_count(cache: PageCache) -> int:
+    return sum(len(files) for _, _, files in os.walk(cache.blob_dir))
+
+
+def test_put_and_get_roundtrip(data_dir, clock):
+    cache = make_cache(data_dir)
+    cache.put("https://shop.example/p/1", PRODUCT_HTML, "http", etag=ETAG)
+
+    assert cache.get("https://shop.example/p/1") == PRODUCT_HTML
+    page = cache.lookup("https://shop.example/p/1")
+    assert page.served_by == "http"
+    assert page.validators() == {"If-None-Match": ETAG}
+    assert cache.get("https://shop.example/p/2") is None
+
+
+def test_identical_html_shares_one_blob(data_dir, clock):
+    cache = make_cache(data_dir)
+    cache.put("https://shop.example/p/1", PRODUCT_HTML, "http")
+    cache.put("https://shop.example/p/2", PRODUCT_HTML, "browser")
+
+    assert blob_count(cache) == 1
+    assert cache.get("https://shop.example/p/2") == PRODUCT_HTML
+
+
+def test_entry_goes_stale_after_ttl(data_dir, clock):
+    cache = make_cache(data_dir)
+    cache.put("https://shop.example/p/1", PRODUCT_HTML, "http")
+
+    clock.now += TTL
+    assert cache.get("https://shop.example/p/1") == PRODUCT_HTML
+    clock.now += 1
+    assert cache.get("https://shop.example/p/1") is None
+    # The stale entry is still there for a conditional re-fetch
+    page = cache.lookup("https://shop.example/p/1")
+    assert page is not None and not page.fresh
+    assert cache.stats()["stale"] == 2
+
+
+def test_lowered_ttl_applies_to_existing_entries(data_dir, clock):
+    make_cache(data_dir, ttl=TTL).put("https://shop.example/p/1", PRODUCT_HTML, "http")
+
+    clock.now += 10
+    assert make_cache(data_dir, ttl=5).get("https://shop.example/p/1") is None
+    assert make_cache(data_dir, ttl=TTL).get("https://shop.example/p/1") == PRODUCT_HTML
+
+
+def test_replay_serves_any_age_and_never_writes(data_dir, clock):
+    make_cache(data_dir).put("https://shop.example/p/1", PRODUCT_HTML, "http")
+    clock.now += 100 * TTL
+
+    replay = make_cache(data_dir, mode="replay")
+    assert replay.get("https://shop.example/p/1") == PRODUCT_HTML
+    replay.put("https://shop.example/p/2", PRODUCT_HTML, "http")
+    assert replay.get("https://shop.example/p/2") is None
+    assert replay.stats()["writes"] == 0
+
+
+def test_prune_drops_old_entries_and_unreferenced_blobs(data_dir, clock):
+    cache = make_cache(data_dir)
+    cache.put("https://shop.example/p/1", PRODUCT_HTML, "http")
+    clock.now += 3600
+    cache.put("https://shop.example/p/2", "<html>newer</html>", "http")
+
+    assert cache.prune(max_age_seconds=60) == 1
+    assert cache.lookup("https://shop.example/p/1") is None
+    assert cache.get("https://shop.example/p/2") == "<html>newer</html>"
+    assert blob_count(cache) == 1
+
+
+def test_get_page_caches_http_fetch(scrape_general, client, limiter, fake_pool, fixture_server, data_dir, clock):
+    cache = make_cache(data_dir)
+    url = fixture_server.url("/product")
+
+    _, first = scrape_general.get_page(url, fake_pool, str, bool, limiter, client, cache)
+    parsed, second = scrape_general.get_page(url, fake_pool, str, bool, limiter, client, cache)
+
+    assert (first["served_by"], second["served_by"]) == ("http", "cache")
+    assert parsed == PRODUCT_HTML
+    assert len(fixture_server.requests) == 1
+
+
+def test_get_page_revalidates_stale_entry_with_304(scrape_general, client, limiter, fake_pool, fixture_server,
+                                                   data_dir, clock):
+    cache = make_cache(data_dir)
+    url = fixture_server.url("/etag")
+    scrape_general.get_page(url, fake_pool, str, bool, limiter, client, cache)
+    assert cache.lookup(url).etag == ETAG
+
+    clock.now += TTL + 1
+    parsed, page = scrape_general.get_page(url, fake_pool, str, bool, limiter, client, cache)
+
+    assert page["served_by"] == "revalidated"
+    assert parsed == PRODUCT_HTML
+    _, headers = fixture_server.requests[-1]
+    assert headers["If-None-Match"] == ETAG
+    assert cache.lookup(url).fresh
+    assert cache.stats()["revalidated"] == 1
+    assert fake_pool.driver.visited == []
+
+
+def test_get_page_replay_never_touches_network(scrape_general, client, limiter, fake_pool, fixture_server,
+                                               data_dir, clock):
+    url = fixture_server.url("/product")
+    make_cache(data_dir).put(url, PRODUCT_HTML, "http")
+    clock.now += 100 * TTL
+    replay = make_cache(data_dir, mode="replay")
+
+    parsed, hit = scrape_general.get_page(url, fake_pool, str, bool, limiter, client, replay)
+    missing, miss = scrape_general.get_page(fixture_server.url("/shell"), fake_pool, str, bool, limiter, client, replay)
+
+    assert (hit["served_by"], parsed) == ("cache", PRODUCT_HTML)
+    assert (miss["served_by"], missing) == ("miss", None)
+    assert fixture_server.requests == []
+    assert fake_pool.driver.visited == []
+
+
+def test_prune_if_due_runs_at_most_once_per_interval(data_dir, clock):
+    cache = make_cache(data_dir)
+    cache.put("https://shop.example/p/1", PRODUCT_HTML, "http")
+    clock.now += 3600
+
+    assert cache.prune_if_due(max_age_seconds=3600 * 24) == 0
+    cache.put("https://shop.example/p/2", "<html>newer</html>", "http")
+    clock.now += 60
+    # Inside the interval: nothing is pruned even though p/1 is now past the max age
+    assert cache.prune_if_due(max_age_seconds=600) == 0
+    clock.now += page_cache_module.PAGE_CACHE_PRUNE_INTERVAL
+    assert cache.prune_if_due(max_age_seconds=600 + page_cache_module.PAGE_CACHE_PRUNE_INTERVAL) == 1
+    assert make_cache(data_dir, mode="replay").prune_if_due(max_age_seconds=0) == 0
@@ -0,0 +1,35 @@
+import pytest
+
+from app.utils.parsing import parse_count, parse_number
+
+
+@pytest.mark.parametrize("text, value", [
+    ("₹1,299", 1299.0),
+    ("Rs. 499.00", 499.0),
+    ("1,29,999", 129999.0),
+    ("1.299,00", 1299.0),
+    ("₹1 299", 1299.0),
+    ("12 345,50 €", 12345.5),
+    ("4.3 out of 5", 4.3),
+    # Space grouping never merges a rating with the count after it
+    ("4 120 ratings", 4.0),
+    ("5 100 reviews", 5.0),
+    ("4.3 1 234", 4.3),
+])
+def test_parse_number(text, value):
+    assert parse_number(text) == value
+
+
+@pytest.mark.parametrize("text, count", [
+    ("1,234 ratings", 1234.0),
+    ("1.2k reviews", 1200.0),
+    ("2 lakh ratings", 200000.0),
+    ("4.5 (1,234)", 1234.0),
+    ("4.3 out of 5 (1,234)", 1234.0),
+    ("3/5 (87)", 87.0),
+    ("4 120 ratings", 120.0),
+    ("5 100 reviews", 100.0),
+    ("1 299", 1299.0),
+])
+def test_parse_count(text, count):
+    assert parse_count(text) == count
@@ -0,0 +1,40 @@
+import pytest
+
+from app.utils.query_parser import parse_query
+
+
+def parse(text: str):
+    return parse_query(text, {}, set())
+
+
+@pytest.mark.parametrize("text, rating", [
+    ("trimmers rated above 4", 4.0),
+    ("rating of 4.5/5", 4.5),
+    ("4+ stars", 4.0),
+    ("4 stars beard oil", 4.0),
+    ("4 star and above shampoo", 4.0),
+    ("4-star rated shampoo", 4.0),
+    ("4.5+ rating", 4.5),
+    ("beard oil 3+ rated", 3.0),
+    ("trimmer with rating of 4 under 2000", 4.0),
+])
+def test_rating_threshold(text, rating):
+    assert parse(text).min_rating == rating
+
+
+@pytest.mark.parametrize("text", [
+    "shampoo 200+ ml",
+    "1500+ range trimmers",
+    "products 1000+",
+    "trimmer for 5 star grooming",
+    "ratings above 1500",
+    "rating above 8",
+    "4.55 stars",
+])
+def test_numbers_that_are_not_ratings(text):
+    assert parse(text).min_rating is None
+
+
+def test_rating_does_not_swallow_price():
+    query = parse("trimmer with rating of 4 under 2000")
+    assert (query.min_rating, query.max_price, query.terms) == (4.0, 2000.0, ["trimmer"])
@@ -0,0 +1,45 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from conftest import FakePool
+
+
+class OneDriverPool(FakePool):
+    """A pool of a single driver: lease() blocks while it is out"""
+
+    def __init__(self):
+        super().__init__()
+        self._free = threading.Semaphore(1)
+
+    @contextmanager
+    def lease(self):
+        self._free.acquire()
+        try:
+            yield self.driver
+        finally:
+            self._free.release()
+
+
+def test_scroll_and_pdp_loads_do_not_deadlock(scrape_general, fixture_server, monkeypatch):
+    monkeypatch.setattr(scrape_general, "SCROLL_TIMEOUT", 0.05)
+    limiter = scrape_general.DomainLimiter(min_interval=0.0, max_concurrent=1)
+    pool = OneDriverPool()
+    url = fixture_server.url("/listing")
+    pages = {}
+    scroll = scrape_general.scroll_listing(url, url, pool, scrape_general.ListingFrontier(url, 3), pages, limiter)
+    next(scroll)    # first render done; the scroll keeps its driver
+
+    # A PDP worker starts a browser load while the scroll is between steps
+    pdp = threading.Thread(target=scrape_general.get_page,
+                           args=(fixture_server.url("/product"), pool, str, bool, limiter), daemon=True)
+    pdp.start()
+    time.sleep(0.1)
+    rest = threading.Thread(target=list, args=(scroll,), daemon=True)
+    rest.start()
+
+    rest.join(timeout=5)
+    pdp.join(timeout=5)
+    assert not rest.is_alive() and not pdp.is_alive()
+    assert f"{url}#scroll-1" in pages
+    assert pool.driver.visited[-1] == fixture_server.url("/product")
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import app.utils.text_index as text_index
+from app.utils.text_index import InvertedIndex, TrigramIndex
+
+WORDS = ["beard", "oil", "trimmer", "shampoo", "gillette", "cream", "matte", "lipstick"]
+
+
+def random_index(seed: int = 11, rows: int = 600) -> InvertedIndex:
+    # Few distinct words and lengths, so many rows tie on score
+    rng = random.Random(seed)
+    index = InvertedIndex()
+    for row_id in range(rows):
+        index.add(row_id, {
+            "name": " ".join(rng.choices(WORDS, k=rng.randint(1, 3))),
+            "brand": rng.choice(WORDS[:3]),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 2))),
+        })
+    return index
+
+
+@pytest.mark.parametrize("tokens", [["beard"], ["beard", "oil"], ["gillette", "beard", "oil"], ["cream", "matte", "nope"]])
+@pytest.mark.parametrize("top_k", [1, 5, 40])
+def test_impact_order_matches_exhaustive_ranking(monkeypatch, tokens, top_k):
+    index = random_index()
+    expected = index.score_tokens(tokens, top_k, allowed=[True] * len(index))
+    monkeypatch.setattr(text_index, "IMPACT_MIN_POSTINGS", 0)
+
+    assert index.score_tokens(tokens, top_k) == expected
+    # Cached orders are dropped once the index changes
+    index.remove(expected[0][0])
+    assert index.score_tokens(tokens, top_k) == index.score_tokens(tokens, top_k, allowed=[True] * 600)
+
+
+def test_impact_cache_is_bounded(monkeypatch):
+    index = random_index()
+    monkeypatch.setattr(text_index, "IMPACT_MIN_POSTINGS", 0)
+    budget = max(len(index.postings["beard"]), len(index.postings["oil"]))
+    monkeypatch.setattr(text_index, "IMPACT_CACHE_POSTINGS", budget)
+
+    index.score_tokens(["beard"])
+    index.score_tokens(["oil"])
+
+    assert list(index._impact_orders) == ["oil"]
+    assert index._impact_postings == len(index.postings["oil"])
+
+
+def test_trigram_candidates_are_capped(monkeypatch):
+    trigrams = TrigramIndex()
+    for i in range(20):
+        trigrams.add(f"trimmer{i:02d}x")
+    trigrams.add("trimmerx", 5)
+    monkeypatch.setattr(text_index, "MAX_TRIGRAM_CANDIDATES", 3)
+
+    # The closest word shares the most trigrams, so it survives the cap
+    assert trigrams.lookup("trimerx") == "trimmerx"
+    assert len(trigrams.candidates("trimerx", max_distance=4)) <= 3